@@ -0,0 +1 @@
+"""Shared building blocks for the Smart Taxi Advisor web app and CLI."""
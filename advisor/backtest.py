@@ -0,0 +1,250 @@
+"""Replay flight days against zone profile variants to tune exit_delay and fare_range.
+
+Days come from the snapshot store (``advisor.snapshots``) or a seeded
+synthetic generator. Each snapshot is fed to an ``ExitTimeline`` on a
+simulated clock (its fetch time), exactly as a live refresh would be, so a
+day replays in milliseconds. A flight's prediction is the one made when it
+was first seen; it is scored against what the later snapshots recorded:
+the actual landing (``actual_time``), the observed exit (``exit_actual``)
+and the fare (``fare_actual``) when those are known.
+
+The snapshot store records landings, not exits or fares, and the variants
+only differ in exit_delay and fare_range: a sweep with no exit or fare to
+score against raises instead of ranking variants that all look the same.
+
+A sweep runs one variant per worker process over the whole dataset; workers
+load the days themselves from a small picklable spec instead of receiving
+them.
+
+Run: python -m advisor.backtest --synthetic 365
+     python -m advisor.backtest --snapshots ./snapshots --airport BKK
+"""
+import argparse
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from advisor.core import Flight
+from advisor.profiles import fare_bounds, landing_minute
+from advisor.snapshots import SnapshotReader
+from advisor.timeline import DAY, ExitTimeline, anchor, clock_minutes, now_minute
+from advisor.zones import ZoneResolver
+
+DELAY_OFFSETS = (-10, -5, 0, 5, 10)
+FARE_SCALES = (0.9, 1.0, 1.1)
+SNAPSHOT_INTERVAL = 10 * 60
+
+
+def _anchored(hhmm, now_abs):
+    try:
+        return anchor(clock_minutes(hhmm), now_abs)
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def replay(snapshots, profile):
+    """Replay ``(fetched_at, flights)`` in time order; one record per predicted flight.
+
+    Flights are ``advisor.core.Flight`` records (``SnapshotReader.records``) or dicts, which
+    may also carry the observed ``exit_actual``/``fare_actual`` (synthetic days).
+    """
+    resolve = ZoneResolver(profile)
+    avg_fare = {zone: sum(fare_bounds(p['fare_range'])) / 2 for zone, p in profile.items()}
+    records = {}  # (flight key, scheduled landing) -> record
+
+    def build(f, now_abs):
+        zone = resolve(f.origin) or resolve(f.origin_iata)
+        if zone is None or f.arrival < 0:
+            return None
+        land = landing_minute(f, now_abs)
+        exit_minute = land + profile[zone]['exit_delay']
+        records.setdefault((f.key, land), {
+            "zone": zone, "scheduled": land, "predicted": exit_minute,
+            "lead": exit_minute - now_abs, "fare_pred": avg_fare[zone],
+        })
+        return exit_minute, None
+
+    timeline = ExitTimeline()
+    last_seen = {}  # flight_key -> last recorded fields already applied
+    for fetched_at, raw in snapshots:
+        now_abs = now_minute(datetime.fromtimestamp(fetched_at))
+        flights = [f if isinstance(f, Flight) else Flight.from_dict(f) for f in raw]
+        timeline.update(flights, build, now_abs)
+        for f, r in zip(flights, raw):
+            exit_actual, fare_actual = (r.get('exit_actual'), r.get('fare_actual')) if isinstance(r, dict) else (None, None)
+            if f.actual < 0 and not exit_actual and fare_actual is None:
+                continue
+            key = f.key
+            observed = (now_abs // DAY, f.arrival, f.actual, exit_actual, fare_actual)
+            if last_seen.get(key) == observed:
+                continue
+            last_seen[key] = observed
+            if f.arrival < 0 or (rec := records.get((key, landing_minute(f, now_abs)))) is None:
+                continue
+            if f.actual >= 0:
+                rec["landed"] = anchor(f.actual, now_abs)
+            exited = _anchored(exit_actual, now_abs)
+            if exited is not None:
+                rec["exited"] = exited
+            if fare_actual is not None:
+                rec["fare"] = float(fare_actual)
+    return list(records.values())
+
+
+def _stats(errors):
+    if not errors:
+        return None
+    e = np.asarray(errors, dtype=np.float64)
+    return {"n": int(e.size), "bias": round(float(e.mean()), 2), "mae": round(float(np.abs(e).mean()), 2),
+            "p50": round(float(np.percentile(np.abs(e), 50)), 2), "p90": round(float(np.percentile(np.abs(e), 90)), 2)}
+
+
+def summarize(records, profile):
+    """Predicted minus recorded: exit and landing minutes, fare baht; per-zone suggested exit_delay."""
+    zones = {}
+    for r in records:
+        if "exited" in r:
+            zones.setdefault(r["zone"], []).append(r["predicted"] - r["exited"])
+    return {
+        "flights": len(records),
+        "exit": _stats([r["predicted"] - r["exited"] for r in records if "exited" in r]),
+        "landing": _stats([r["scheduled"] - r["landed"] for r in records if "landed" in r]),
+        "fare": _stats([r["fare_pred"] - r["fare"] for r in records if "fare" in r]),
+        "lead": _stats([r["lead"] for r in records]),
+        "zones": {
+            zone: dict(_stats(errs), exit_delay=profile[zone]['exit_delay'],
+                       suggested_exit_delay=max(1, int(round(profile[zone]['exit_delay'] - float(np.median(errs))))))
+            for zone, errs in sorted(zones.items())
+        },
+    }
+
+
+def variants(base, delay_offsets=DELAY_OFFSETS, fare_scales=FARE_SCALES):
+    """``[(name, profile)]``: every zone's exit_delay shifted and fare_range scaled together."""
+    out = []
+    for offset in delay_offsets:
+        for scale in fare_scales:
+            profile = {}
+            for zone, p in base.items():
+                lo, hi = fare_bounds(p['fare_range'])
+                profile[zone] = dict(p, exit_delay=max(1, p['exit_delay'] + offset),  # profiles require >= 1
+                                     fare_range=f"{int(round(lo * scale))}-{int(round(hi * scale))}")
+            out.append((f"delay{offset:+d} fare x{scale:.2f}", profile))
+    return out
+
+
+def synthetic_days(profile, days, seed=0, flights_per_day=300, start=datetime(2026, 1, 1),
+                   true_delay_offset=8, late_sigma=12):
+    """Seeded flight days with hidden ground truth, as ``(fetched_at, flights)`` snapshots.
+
+    True exits are ``true_delay_offset`` minutes later than the profile says
+    and true fares sit 10% under the profile midpoint, so a sweep should find
+    its way back to those numbers.
+    """
+    rng = random.Random(seed)
+    hubs = [(zone, hub) for zone, p in profile.items() for hub in p['hubs']]
+    others = ["Chiang Mai", "Phuket", "Hat Yai", "Yangon", "Phnom Penh"]
+    for d in range(days):
+        day = start + timedelta(days=d)
+        flights = []
+        for i in range(flights_per_day):
+            zone, origin = rng.choice(hubs) if rng.random() < 0.7 else (None, rng.choice(others))
+            scheduled = rng.randrange(24 * 60)
+            landed = scheduled + int(rng.gauss(5, late_sigma))
+            delay = profile[zone]['exit_delay'] + true_delay_offset if zone else 30
+            exited = landed + int(round(delay * math.exp(rng.gauss(0, 0.15))))
+            lo, hi = fare_bounds(profile[zone]['fare_range']) if zone else (250, 400)
+            base = {"flight_number": f"XX{i:03d}", "airline": "Synthetic", "origin": origin,
+                    "arrival_time": f"{scheduled // 60:02}:{scheduled % 60:02}"}
+            landed_f = dict(base, actual_time=f"{landed // 60 % 24:02}:{landed % 60:02}")
+            exited_f = dict(landed_f, exit_actual=f"{exited // 60 % 24:02}:{exited % 60:02}",
+                            fare_actual=round(rng.uniform(lo, hi) * 0.9))
+            flights.append((scheduled - 180, landed, exited, base, landed_f, exited_f))
+        for tick in range(0, 24 * 60, SNAPSHOT_INTERVAL // 60):
+            visible = []
+            for first, landed, exited, base, landed_f, exited_f in flights:
+                if first <= tick <= exited + 30:
+                    visible.append(exited_f if tick >= exited else landed_f if tick >= landed else base)
+            fetched = day + timedelta(minutes=tick)
+            yield fetched.timestamp(), visible
+
+
+def load_days(spec):
+    """Snapshots for a dataset spec: ``("synthetic", profile, days, seed)`` or ``("snapshots", root, airport, start, end)``."""
+    if spec[0] == "synthetic":
+        _, profile, days, seed = spec
+        return synthetic_days(profile, days, seed)
+    _, root, airport, start, end = spec
+    return SnapshotReader(root).records(airport, start, end)
+
+
+def evaluate(spec, name, profile):
+    return name, summarize(replay(load_days(spec), profile), profile)
+
+
+def sweep(spec, candidates, workers=None):
+    """Evaluate each ``(name, profile)`` on its own process; results sorted by exit MAE (plus fare MAE / 100).
+
+    Raises ValueError when the data has no observed exit or fare: nothing tells the variants apart.
+    """
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(evaluate, spec, name, profile) for name, profile in candidates]
+        results = [f.result() for f in futures]
+    if not any(s["exit"] or s["fare"] for _, s in results):
+        flights = max((s["flights"] for _, s in results), default=0)
+        raise ValueError(f"nothing to score: {flights} flights replayed, none with an observed exit (exit_actual) "
+                         "or fare (fare_actual); recorded snapshots only hold landings")
+    key = lambda r: (r[1]["exit"] or {}).get("mae", 0) + (r[1]["fare"] or {}).get("mae", 0) / 100
+    return sorted(results, key=key)
+
+
+def format_report(results):
+    lines = [f"{'variant':<22} {'flights':>8} {'exit bias':>10} {'exit MAE':>9} {'exit p90':>9} {'fare MAE':>9}"]
+    for name, s in results:
+        e, f = s["exit"] or {}, s["fare"] or {}
+        lines.append(f"{name:<22} {s['flights']:>8} {e.get('bias', float('nan')):>10.1f} {e.get('mae', float('nan')):>9.1f} "
+                     f"{e.get('p90', float('nan')):>9.1f} {f.get('mae', float('nan')):>9.0f}")
+    name, best = results[0]
+    if best["landing"]:
+        lines.append(f"\nscheduled vs actual landing: bias {best['landing']['bias']:+.1f} min, MAE {best['landing']['mae']:.1f} min")
+    if best["zones"]:
+        lines.append(f"per-zone exit_delay suggestion ({name}):")
+        for zone, z in best["zones"].items():
+            lines.append(f"  {zone:<12} {z['exit_delay']:>3} -> {z['suggested_exit_delay']:>3} min  (n={z['n']}, MAE {z['mae']:.1f})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from advisor.core import PROFILES
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--snapshots", help="snapshot store root (SNAPSHOT_DIR)")
+    parser.add_argument("--airport", default="BKK")
+    parser.add_argument("--start", help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", help="last day, YYYY-MM-DD")
+    parser.add_argument("--synthetic", type=int, metavar="DAYS", help="replay DAYS of seeded synthetic flights instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--json", help="also write the full results here")
+    args = parser.parse_args(argv)
+    profile = {zone: dict(p) for zone, p in PROFILES.current().zones.items()}  # plain dicts pickle to the workers
+    if args.snapshots:
+        spec = ("snapshots", args.snapshots, args.airport, args.start, args.end)
+    else:
+        spec = ("synthetic", profile, args.synthetic or 30, args.seed)
+    try:
+        results = sweep(spec, variants(profile), args.workers)
+    except ValueError as e:
+        parser.exit(1, f"backtest: {e}\n")
+    print(format_report(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(dict(results), fh, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Thread-safe TTL + LRU cache with single-flight fetches.
+
+Used by the web app in front of upstream APIs (AviationStack etc.):
+
+* every key has its own TTL, the store is bounded and evicts least recently used;
+* concurrent misses for the same key are coalesced into one upstream call;
+* after expiry an entry can still be served for ``stale_ttl`` seconds while a
+  background thread refreshes it (stale-while-revalidate).
+
+Storage is pluggable. ``MemoryBackend`` keeps entries in-process;
+``SQLiteBackend`` keeps them in a file in the shared temp dir so warm
+instances and cold starts reuse one fetched flight list. Pick one with the
+``CACHE_BACKEND`` env var (``memory`` or ``sqlite``, path in ``CACHE_PATH``).
+Expiry times are wall-clock seconds stored alongside each entry.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """In-process LRU store of ``key -> (value, expires, stale_until)``."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key, value, expires, stale_until):
+        self._data[key] = (value, expires, stale_until)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """SQLite file store shared by every process on the host.
+
+    Values are JSON encoded. Each write is a single transaction, so readers
+    never see a half-written entry, and concurrent writers serialize on the
+    database lock (WAL mode, busy timeout) instead of failing.
+    """
+
+    def __init__(self, path=None, maxsize=128, timeout=5.0):
+        self.path = path or os.path.join(tempfile.gettempdir(), "smart_taxi_cache.sqlite3")
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.evictions = 0
+        self._local = threading.local()
+        with self._conn() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires REAL NOT NULL, stale_until REAL NOT NULL, touched REAL NOT NULL)"
+            )
+
+    def _conn(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db = self._local.db = _Tx(db)
+        return db
+
+    def get(self, key):
+        with self._conn() as db:
+            row = db.execute("SELECT value, expires, stale_until FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE cache SET touched = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]), row[1], row[2]
+
+    def set(self, key, value, expires, stale_until):
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._conn() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, stale_until, touched) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, expires, stale_until, now),
+            )
+            db.execute("DELETE FROM cache WHERE stale_until < ?", (now,))
+            n = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            if n > self.maxsize:
+                db.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY touched LIMIT ?)",
+                    (n - self.maxsize,),
+                )
+                self.evictions += n - self.maxsize
+
+    def delete(self, key):
+        with self._conn() as db:
+            db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._conn() as db:
+            db.execute("DELETE FROM cache")
+
+    def __len__(self):
+        with self._conn() as db:
+            return db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class _Tx:
+    """``with`` block = one IMMEDIATE transaction on an autocommit connection."""
+
+    def __init__(self, db):
+        self.db = db
+        self.execute = db.execute
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+
+
+BACKENDS = {"memory": MemoryBackend, "sqlite": SQLiteBackend}
+
+
+def make_backend(name=None, maxsize=128, path=None):
+    """Build the backend named by ``name`` or the ``CACHE_BACKEND`` env var."""
+    name = (name or os.environ.get("CACHE_BACKEND", "memory")).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"unknown CACHE_BACKEND {name!r}, expected one of {sorted(BACKENDS)}")
+    if name == "sqlite":
+        return SQLiteBackend(path or os.environ.get("CACHE_PATH"), maxsize=maxsize)
+    return MemoryBackend(maxsize)
+
+
+class _InFlight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    def __init__(self, maxsize=128, ttl=600, stale_ttl=0, clock=time.time, backend=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self.backend = backend if backend is not None else MemoryBackend(maxsize)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "coalesced": 0, "fetches": 0, "errors": 0}
+
+    # ---- plain get/set ----
+    def get(self, key, default=None):
+        """Return a fresh value or ``default``; does not count stale entries."""
+        with self._lock:
+            entry = self.backend.get(key)
+            if entry is not None and self._clock() < entry[1]:
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+            return default
+
+    def set(self, key, value, ttl=None, stale_ttl=None):
+        with self._lock:
+            self._store(key, value, ttl, stale_ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self.backend.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self.backend.clear()
+
+    def peek(self, key, default=None):
+        """Fresh or stale value without ever fetching; ``default`` once past the stale window."""
+        with self._lock:
+            entry = self.backend.get(key)
+            now = self._clock()
+            if entry is None or now >= entry[2]:
+                self._stats["misses"] += 1
+                return default
+            self._stats["hits" if now < entry[1] else "stale"] += 1
+            return entry[0]
+
+    def expires_in(self, key):
+        """Seconds until ``key`` stops being fresh (negative once stale), None when absent."""
+        with self._lock:
+            entry = self.backend.get(key)
+            return None if entry is None else entry[1] - self._clock()
+
+    def _store(self, key, value, ttl, stale_ttl):
+        now = self._clock()
+        expires = now + (self.ttl if ttl is None else ttl)
+        stale_until = expires + (self.stale_ttl if stale_ttl is None else stale_ttl)
+        self.backend.set(key, value, expires, stale_until)
+
+    # ---- single-flight ----
+    def get_or_fetch(self, key, fetch, ttl=None, stale_ttl=None):
+        """Return the cached value for ``key`` or call ``fetch()`` once for all waiters.
+
+        ``fetch`` returning None is treated as "no data" and is not cached.
+        Exceptions from ``fetch`` propagate to every coalesced caller.
+        """
+        with self._lock:
+            entry = self.backend.get(key)
+            now = self._clock()
+            if entry is not None and now < entry[1]:
+                self._stats["hits"] += 1
+                return entry[0]
+            if entry is not None and now < entry[2]:
+                self._stats["stale"] += 1
+                if key not in self._inflight:
+                    self._inflight[key] = _InFlight()
+                    threading.Thread(target=self._run, args=(key, fetch, ttl, stale_ttl), daemon=True).start()
+                return entry[0]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self._stats["misses"] += 1
+                self._inflight[key] = _InFlight()
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        return self._run(key, fetch, ttl, stale_ttl, raise_errors=True)
+
+    def _run(self, key, fetch, ttl, stale_ttl, raise_errors=False):
+        flight = self._inflight[key]
+        try:
+            value = fetch()
+        except Exception as e:
+            value = None
+            flight.error = e
+        with self._lock:
+            self._stats["fetches"] += 1
+            if flight.error is not None:
+                self._stats["errors"] += 1
+            elif value is not None:
+                self._store(key, value, ttl, stale_ttl)
+            self._inflight.pop(key, None)
+        flight.value = value
+        flight.done.set()
+        if raise_errors and flight.error is not None:
+            raise flight.error
+        return value
+
+    @property
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, evictions=self.backend.evictions, size=len(self.backend), inflight=len(self._inflight))
+
+    def __len__(self):
+        return len(self.backend)
@@ -0,0 +1,126 @@
+"""Flight analysis core shared by the web app, the CLI and the tests.
+
+One source of zone profiles and events (``PROFILES``, see
+``advisor.profiles``), one golden-window calculation and one demo
+generator. Flights are ``Flight`` records: ``__slots__`` and times as
+integer minutes of the day (-1 when unknown), parsed once when the record
+is built instead of on every analysis.
+
+``analyze(flights, now)`` is the whole pipeline for one-shot callers such
+as the CLI. The web app feeds the same ``Profiles.build_alert`` to its
+incremental ``ExitTimeline``.
+"""
+import os
+import random
+from operator import itemgetter
+
+from advisor.profiles import DEFAULT_PATH, ProfileSource
+from advisor.timeline import hhmm, now_minute
+
+# Zone profiles and city events live in data/profiles.json (PROFILES_PATH), hot-reloaded
+PROFILES = ProfileSource(os.environ.get("PROFILES_PATH") or DEFAULT_PATH)
+
+
+def parse_minute(value):
+    """'HH:MM' (or an ISO timestamp) -> minute of day; -1 when missing or malformed."""
+    if not value:
+        return -1
+    if 'T' in value:
+        value = value.split('T')[-1]
+    hh, _, mm = value.partition(':')
+    mm = mm[:2]
+    if not (hh.isdigit() and mm.isdigit()):
+        return -1
+    h, m = int(hh), int(mm)
+    return h * 60 + m if h < 24 and m < 60 else -1
+
+
+class Flight:
+    """One arrival. ``arrival``/``actual`` are minutes of the day, -1 when unknown."""
+    __slots__ = ("airline", "flight_number", "origin", "origin_iata", "terminal", "arrival", "actual", "status", "date")
+
+    def __init__(self, airline, flight_number, origin, arrival, origin_iata=None, terminal=None, actual=-1, status=None, date=None):
+        self.airline = airline
+        self.flight_number = flight_number
+        self.origin = origin
+        self.arrival = arrival
+        self.origin_iata = origin_iata
+        self.terminal = terminal
+        self.actual = actual
+        self.status = status
+        self.date = date
+
+    @classmethod
+    def from_dict(cls, d):
+        """From the dict shape of ``advisor.ingest.parse_record`` (and the JSON cache/snapshots)."""
+        return cls(d.get('airline') or 'Unknown', d.get('flight_number') or 'N/A', d.get('origin') or 'Unknown',
+                   parse_minute(d.get('arrival_time')), d.get('origin_iata'), d.get('terminal'),
+                   parse_minute(d.get('actual_time')), d.get('status'), d.get('date'))
+
+    def to_dict(self):
+        return {"airline": self.airline, "flight_number": self.flight_number, "origin": self.origin,
+                "origin_iata": self.origin_iata, "terminal": self.terminal, "arrival_time": hhmm(self.arrival),
+                "actual_time": hhmm(self.actual), "status": self.status, "date": self.date}
+
+    @property
+    def key(self):
+        return f"{self.flight_number}|{self.origin}|{self.date or ''}"
+
+    def get(self, name, default=None):
+        """Read-only dict view, for modules that take either records or dicts (forecast, snapshots)."""
+        getter = _DICT_VIEW.get(name)
+        return default if getter is None else getter(self)
+
+    def __getitem__(self, name):
+        if name not in _DICT_VIEW:
+            raise KeyError(name)
+        return _DICT_VIEW[name](self)
+
+    def _values(self):
+        return (self.airline, self.flight_number, self.origin, self.origin_iata, self.terminal,
+                self.arrival, self.actual, self.status, self.date)
+
+    def __eq__(self, other):
+        return isinstance(other, Flight) and self._values() == other._values()
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __repr__(self):
+        return f"Flight({self.flight_number!r}, {self.origin!r}, {hhmm(self.arrival)!r})"
+
+
+_DICT_VIEW = {
+    "airline": lambda f: f.airline, "flight_number": lambda f: f.flight_number, "origin": lambda f: f.origin,
+    "origin_iata": lambda f: f.origin_iata, "terminal": lambda f: f.terminal, "status": lambda f: f.status,
+    "date": lambda f: f.date, "arrival_time": lambda f: hhmm(f.arrival), "actual_time": lambda f: hhmm(f.actual),
+}
+
+
+def analyze(flights, now=None, profiles=None):
+    """Alerts for every A+ flight, in exit order (correct across midnight)."""
+    now_abs = now_minute(now)
+    build = (profiles or PROFILES.current()).build_alert
+    built = [b for b in (build(f, now_abs) for f in flights) if b is not None]
+    built.sort(key=itemgetter(0))
+    return [alert for _, alert in built]
+
+
+DEMO_AIRLINES = ["Emirates", "Qatar Airways", "Thai Airways", "China Eastern", "Lufthansa", "EVA Air", "Spring Airlines", "IndiGo", "ANA", "Korean Air"]
+DEMO_ORIGINS = ["London", "Dubai", "Frankfurt", "Tokyo", "Shanghai", "Singapore", "Mumbai", "Beijing", "Seoul", "Moscow"]
+
+
+# DEMO_SEED: every call returns the same demo flights (for the hour), e.g. for benchmarks against a live server
+DEMO_SEED = os.environ.get("DEMO_SEED")
+
+
+def demo_flights(now=None, rng=None):
+    """12-20 random arrivals over the next couple of hours."""
+    if rng is None:
+        rng = random.Random(int(DEMO_SEED)) if DEMO_SEED else random
+    base = now_minute(now) % (24 * 60) // 60 * 60
+    return [Flight(rng.choice(DEMO_AIRLINES),
+                   f"{rng.choice(['TG', 'EK', 'QR', 'LH', '9C', '6E', 'NH', 'KE'])}{rng.randint(100, 999)}",
+                   rng.choice(DEMO_ORIGINS),
+                   (base + rng.randint(0, 2) * 60) % (24 * 60) + rng.randint(0, 59))
+            for _ in range(rng.randint(12, 20))]
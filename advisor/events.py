@@ -0,0 +1,104 @@
+"""Time-aware city event radar: which events let out soon, near the driver.
+
+An event's crowd leaves over ``LET_OUT_MINUTES`` after its ``end_time``, so
+its let-out interval ``[end, end + LET_OUT_MINUTES]`` overlaps the query
+window ``[now, now + within]`` exactly when ``end`` falls in
+``[now - LET_OUT_MINUTES, now + within]``. With one fixed interval length,
+a list sorted by end time is an exact interval index: one bisect range.
+
+``EventIndex`` buckets events into the same lat/lng cells as
+``advisor.geo`` and keeps each cell sorted by end time. A query only visits
+the cells overlapping the radius' bounding box and, in each, only the
+events in the time range; the rest of the calendar is never touched.
+
+Events with a ``date`` (the day they end) are indexed by absolute minute.
+Events with only an ``end_time`` recur daily and are kept in a separate
+minute-of-day list per cell, queried day by day across midnight.
+"""
+import bisect
+import math
+from datetime import datetime
+from functools import lru_cache
+
+from advisor.geo import CELL_DEG, KM_PER_DEG_LAT, haversine_km
+from advisor.scoring import FUEL_COST_PER_KM, expected_fare
+from advisor.timeline import DAY, now_minute
+
+LET_OUT_MINUTES = 30  # crowd still streaming out this long after end_time
+
+
+@lru_cache(maxsize=4096)
+def day_minute(date):
+    """"2026-01-17" -> absolute minute (``advisor.timeline`` epoch) of that midnight."""
+    return now_minute(datetime.strptime(date, "%Y-%m-%d"))
+
+
+class EventIndex:
+    def __init__(self, events, cell_deg=CELL_DEG, let_out=LET_OUT_MINUTES):
+        """``events`` carry lat/lng, ``end_minute`` (minute of day) and optionally ``date``."""
+        self.cell_deg = cell_deg
+        self.let_out = let_out
+        self.events = tuple(events)
+        self._dated = {}  # cell -> sorted [(end_abs, i)]
+        self._daily = {}  # cell -> sorted [(end minute of day, i)]
+        for i, e in enumerate(self.events):
+            cell = self._cell(e["lat"], e["lng"])
+            if e.get("date"):
+                self._dated.setdefault(cell, []).append((day_minute(e["date"]) + e["end_minute"], i))
+            else:
+                self._daily.setdefault(cell, []).append((e["end_minute"], i))
+        for grid in (self._dated, self._daily):
+            for entries in grid.values():
+                entries.sort()
+
+    def __len__(self):
+        return len(self.events)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg))
+
+    def _cells(self, grid, lat, lng, radius_km):
+        if lat is None or radius_km is None:
+            return grid.items()
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlng = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(abs(lat) + dlat)), 1e-6))
+        r0, c0 = self._cell(lat - dlat, lng - dlng)
+        r1, c1 = self._cell(lat + dlat, lng + dlng)
+        if (r1 - r0 + 1) * (c1 - c0 + 1) > len(grid):
+            return [(cell, entries) for cell, entries in grid.items() if r0 <= cell[0] <= r1 and c0 <= cell[1] <= c1]
+        return [(cell, grid[cell]) for cell in ((r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)) if cell in grid]
+
+    def ending(self, start, end, lat=None, lng=None, radius_km=None):
+        """``[(end_abs, event_index)]`` for events ending in ``[start, end]`` (absolute minutes), grid-filtered."""
+        found = []
+        for _, entries in self._cells(self._dated, lat, lng, radius_km):
+            lo = bisect.bisect_left(entries, (start,))
+            hi = bisect.bisect_left(entries, (end + 1,))
+            found.extend(entries[lo:hi])
+        daily = self._cells(self._daily, lat, lng, radius_km)
+        if daily:
+            for base in range(start - start % DAY, end + 1, DAY):
+                lo_m, hi_m = max(start - base, 0), min(end - base, DAY - 1)
+                for _, entries in daily:
+                    lo = bisect.bisect_left(entries, (lo_m,))
+                    hi = bisect.bisect_left(entries, (hi_m + 1,))
+                    found.extend((base + m, i) for m, i in entries[lo:hi])
+        return found
+
+    def radar(self, now_abs, within, lat=None, lng=None, radius_km=None, cost_per_km=FUEL_COST_PER_KM):
+        """Events letting out between now and ``within`` minutes from now, best first.
+
+        Returns ``[(score, end_abs, distance_km, event)]``; score is the crowd-weighted
+        average fare (``advisor.scoring.expected_fare``) minus the drive there. Without a
+        location the distance is None and nothing is deducted.
+        """
+        located = lat is not None and lng is not None
+        scored = []
+        for end_abs, i in self.ending(now_abs - self.let_out, now_abs + within, lat if located else None, lng, radius_km):
+            e = self.events[i]
+            dist = haversine_km(lat, lng, e["lat"], e["lng"]) if located else None
+            if dist is not None and radius_km is not None and dist > radius_km:
+                continue
+            scored.append((expected_fare(e) - (dist or 0.0) * cost_per_km, end_abs, dist, e))
+        scored.sort(key=lambda t: (-t[0], t[1]))
+        return scored
@@ -0,0 +1,66 @@
+"""Batch ranking for fleet dispatchers.
+
+Drivers come in as NDJSON (one ``{"id", "lat", "lng"}`` per line) and are
+scored in fixed-size chunks against a shared list of opportunities, so a
+fleet of any size streams through in constant memory: one chunk of drivers
+and one (chunk x opportunities) score matrix at a time.
+"""
+import json
+
+from advisor.scoring import rank
+
+CHUNK_SIZE = 256
+
+
+def iter_drivers(lines):
+    """Yield ``(line_no, driver, error)`` from NDJSON lines (bytes or str)."""
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            d = json.loads(line)
+            driver = {"id": d.get("id", n), "lat": float(d["lat"]), "lng": float(d["lng"])}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            yield n, None, f"{e.__class__.__name__}: {e}"
+            continue
+        yield n, driver, None
+
+
+def rank_fleet(lines, opportunities, k=3, chunk_size=CHUNK_SIZE):
+    """Yield one result dict per input line, in input order."""
+    chunk = []
+    for n, driver, error in iter_drivers(lines):
+        if error is not None:
+            yield from _flush(chunk, opportunities, k)
+            chunk = []
+            yield {"line": n, "error": error}
+            continue
+        chunk.append(driver)
+        if len(chunk) >= chunk_size:
+            yield from _flush(chunk, opportunities, k)
+            chunk = []
+    yield from _flush(chunk, opportunities, k)
+
+
+def _flush(chunk, opportunities, k):
+    if not chunk:
+        return
+    if not opportunities:
+        for d in chunk:
+            yield {"id": d["id"], "opportunities": []}
+        return
+    ranked = rank([(d["lat"], d["lng"]) for d in chunk], opportunities, k)
+    for d, row in zip(chunk, ranked):
+        yield {
+            "id": d["id"],
+            "opportunities": [
+                {"type": opportunities[i]["type"], "name": opportunities[i]["name"], "score": round(score, 1), "distance_km": round(dist, 2)}
+                for i, score, dist in row
+            ],
+        }
+
+
+def to_ndjson(results):
+    for r in results:
+        yield json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
@@ -0,0 +1,127 @@
+"""Per-minute passenger outflow ("flush rate") forecast per terminal.
+
+Instead of one exit time per flight, each flight spreads its passengers
+over its zone's exit-delay distribution (a discretized log-normal with the
+profile's ``exit_delay`` as median). Arrivals are kept as per-minute counts
+per (terminal, zone); the curve is one ``np.convolve`` per bucket and is
+cached until a flight is added, removed or changed.
+"""
+import math
+import threading
+from collections import Counter
+
+import numpy as np
+
+from advisor.profiles import landing_minute
+from advisor.timeline import flight_key
+
+PASSENGERS_PER_FLIGHT = 220
+DELAY_SIGMA = 0.25  # log-normal shape: most passengers within +/-25% of the median delay
+DEFAULT_TERMINAL = "main"
+
+
+def delay_kernel(median_delay, sigma=DELAY_SIGMA):
+    """Share of a flight's passengers leaving k minutes after landing (sums to 1)."""
+    lo = max(1, int(median_delay * math.exp(-3 * sigma)))
+    hi = int(math.ceil(median_delay * math.exp(3 * sigma)))
+    k = np.arange(hi + 1, dtype=np.float64)
+    pdf = np.zeros_like(k)
+    x = k[lo:]
+    pdf[lo:] = np.exp(-((np.log(x) - math.log(median_delay)) ** 2) / (2 * sigma ** 2)) / x
+    return pdf / pdf.sum()
+
+
+class FlowForecast:
+    def __init__(self, profile, resolve_zone, passengers=PASSENGERS_PER_FLIGHT):
+        self.passengers = passengers
+        self._resolve = resolve_zone
+        self._kernels = {zone: delay_kernel(p['exit_delay']) * passengers for zone, p in profile.items()}
+        self._max_kernel = max(len(k) for k in self._kernels.values())
+        self._arrivals = {}  # (terminal, zone) -> Counter(abs_minute -> flights)
+        self._flights = {}   # key -> (signature, terminal, zone, land_minute)
+        self._last_flights = None
+        self._version = 0
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def update(self, flights, now_abs):
+        """Apply only the difference between ``flights`` (``advisor.core.Flight`` records) and the previous list."""
+        with self._lock:
+            if flights is self._last_flights:
+                return False
+            seen = set()
+            changed = False
+            for f in flights:
+                key = flight_key(f)
+                seen.add(key)
+                signature = (f.arrival, f.origin, f.origin_iata, f.terminal)
+                old = self._flights.get(key)
+                if old is not None and old[0] == signature:
+                    continue
+                if old is not None:
+                    self._move(old[1:], -1)
+                    del self._flights[key]
+                entry = self._entry(f, now_abs)
+                if entry is not None:
+                    self._flights[key] = (signature,) + entry
+                    self._move(entry, +1)
+                changed = changed or old is not None or entry is not None
+            for key in [k for k in self._flights if k not in seen]:
+                self._move(self._flights.pop(key)[1:], -1)
+                changed = True
+            self._last_flights = flights
+            if changed:
+                self._version += 1
+            return changed
+
+    def _entry(self, f, now_abs):
+        zone = self._resolve(f.origin) or self._resolve(f.origin_iata)
+        if zone not in self._kernels:
+            return None
+        if f.arrival < 0:
+            return None
+        land = landing_minute(f, now_abs)  # on its own date: yesterday's and today's run are not both "today"
+        if land + len(self._kernels[zone]) <= now_abs:
+            return None  # everyone has already left
+        return f.terminal or DEFAULT_TERMINAL, zone, land
+
+    def _move(self, entry, delta):
+        terminal, zone, land = entry
+        bucket = self._arrivals.setdefault((terminal, zone), Counter())
+        bucket[land] += delta
+        if bucket[land] <= 0:
+            del bucket[land]
+
+    def curve(self, now_abs, horizon=180):
+        """``{"total": array, "terminals": {name: array}}``, passengers/minute for [now, now+horizon)."""
+        with self._lock:
+            cache_key = (self._version, now_abs, horizon)
+            if self._cache is not None and self._cache[0] == cache_key:
+                return self._cache[1]
+            start = now_abs - self._max_kernel
+            size = horizon + self._max_kernel
+            terminals = {}
+            for (terminal, zone), bucket in self._arrivals.items():
+                minutes = np.fromiter((m - start for m in bucket if start <= m < now_abs + horizon), dtype=np.int64)
+                if not minutes.size:
+                    continue
+                counts = np.fromiter((bucket[m + start] for m in minutes), dtype=np.float64)
+                arrivals = np.bincount(minutes, weights=counts, minlength=size)[:size]
+                outflow = np.convolve(arrivals, self._kernels[zone])[:size]
+                if terminal in terminals:
+                    terminals[terminal] += outflow[self._max_kernel:]
+                else:
+                    terminals[terminal] = outflow[self._max_kernel:].copy()
+            total = sum(terminals.values()) if terminals else np.zeros(horizon)
+            result = {"total": total, "terminals": terminals}
+            self._cache = (cache_key, result)
+            return result
+
+
+def peak_window(curve, width=15):
+    """(start offset, passengers) of the busiest ``width``-minute window."""
+    if len(curve) < width:
+        return 0, float(np.sum(curve))
+    sums = np.convolve(curve, np.ones(width), mode="valid")
+    i = int(np.argmax(sums))
+    return i, float(sums[i])
@@ -0,0 +1,133 @@
+"""Distance helpers and a grid index for EV charging stations.
+
+``StationIndex`` buckets stations into fixed lat/lng cells once at startup.
+k-nearest searches rings of cells outward from the driver and stops as soon
+as the next ring cannot beat the k-th best distance; radius queries only
+touch the cells overlapping the bounding box. With a few thousand stations
+both are well under a millisecond.
+"""
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0
+CELL_DEG = 0.05  # ~5.5 km at Bangkok's latitude
+KM_PER_DEG_LAT = 111.32
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    dlat, dlng = math.radians(lat2 - lat1), math.radians(lng2 - lng1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def charger_tags(charger_types):
+    """Normalized tags for filtering: dc / ac / ccs / chademo / ultra."""
+    tags = set()
+    for t in charger_types:
+        t = t.lower()
+        if t.startswith("dc") or "fast" in t:
+            tags.add("dc")
+        if t.startswith("ac"):
+            tags.add("ac")
+        for name in ("ccs", "chademo", "ultra"):
+            if name in t:
+                tags.add(name)
+    return frozenset(tags)
+
+
+class StationIndex:
+    def __init__(self, stations, cell_deg=CELL_DEG):
+        self.cell_deg = cell_deg
+        self.stations = list(stations)
+        self._tags = [charger_tags(s.get("charger_types", ())) for s in self.stations]
+        self._grid = {}
+        for i, s in enumerate(self.stations):
+            self._grid.setdefault(self._cell(s["lat"], s["lng"]), []).append(i)
+        rows = [c[0] for c in self._grid] or [0]
+        cols = [c[1] for c in self._grid] or [0]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self):
+        return len(self.stations)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg))
+
+    def _match(self, i, provider, charger, open_24h):
+        s = self.stations[i]
+        if provider and s.get("provider", "").lower() != provider:
+            return False
+        if charger and charger not in self._tags[i]:
+            return False
+        if open_24h is not None and bool(s.get("open_24h")) != open_24h:
+            return False
+        return True
+
+    def _ring(self, row, col, r):
+        if r == 0:
+            yield row, col
+            return
+        for dc in range(-r, r + 1):
+            yield row - r, col + dc
+            yield row + r, col + dc
+        for dr in range(-r + 1, r):
+            yield row + dr, col - r
+            yield row + dr, col + r
+
+    def nearest(self, lat, lng, k=3, provider=None, charger=None, open_24h=None):
+        """k nearest matching stations as ``[(distance_km, station)]``, closest first."""
+        provider = provider.lower() if provider else None
+        charger = charger.lower() if charger else None
+        row, col = self._cell(lat, lng)
+        # Smallest cell edge in km: a station in ring r is at least (r - 1) edges away
+        edge_km = self.cell_deg * KM_PER_DEG_LAT * min(1.0, math.cos(math.radians(abs(lat) + self.cell_deg)))
+        min_row, max_row, min_col, max_col = self._bounds
+        best = []  # max-heap of (-dist, i)
+        r = 0
+        while k > 0 and self._grid:
+            if len(best) == k and (r - 1) * edge_km > -best[0][0]:
+                break
+            for cell in self._ring(row, col, r):
+                for i in self._grid.get(cell, ()):
+                    if not self._match(i, provider, charger, open_24h):
+                        continue
+                    s = self.stations[i]
+                    d = haversine_km(lat, lng, s["lat"], s["lng"])
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, i))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, i))
+            if row - r <= min_row and row + r >= max_row and col - r <= min_col and col + r >= max_col:
+                break  # every occupied cell has been visited
+            r += 1
+        return [(-nd, self.stations[i]) for nd, i in sorted(best, reverse=True)]
+
+    def filter(self, provider=None, charger=None, open_24h=None):
+        """All matching stations, in data order (no location)."""
+        provider = provider.lower() if provider else None
+        charger = charger.lower() if charger else None
+        return [s for i, s in enumerate(self.stations) if self._match(i, provider, charger, open_24h)]
+
+    def within(self, lat, lng, radius_km, provider=None, charger=None, open_24h=None):
+        """Matching stations within ``radius_km`` as ``[(distance_km, station)]``, closest first."""
+        provider = provider.lower() if provider else None
+        charger = charger.lower() if charger else None
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlng = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(abs(lat) + dlat)), 1e-6))
+        min_row, max_row, min_col, max_col = self._bounds
+        r0, c0 = self._cell(lat - dlat, lng - dlng)
+        r1, c1 = self._cell(lat + dlat, lng + dlng)
+        r0, r1 = max(r0, min_row), min(r1, max_row)
+        c0, c1 = max(c0, min_col), min(c1, max_col)
+        found = []
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                for i in self._grid.get((r, c), ()):
+                    if not self._match(i, provider, charger, open_24h):
+                        continue
+                    s = self.stations[i]
+                    d = haversine_km(lat, lng, s["lat"], s["lng"])
+                    if d <= radius_km:
+                        found.append((d, s))
+        found.sort(key=lambda x: x[0])
+        return found
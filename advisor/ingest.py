@@ -0,0 +1,154 @@
+"""Paginated, multi-airport AviationStack ingestion into an incrementally merged store.
+
+``ingest`` pages through the full arrivals list of several airports at
+once. The first page of every airport goes out together; once their
+``pagination.total`` is known, every remaining page of every airport goes
+out in a second round. Both rounds are flat fan-outs on their own
+``PAGE_POOL``: ``ingest`` itself runs inside tasks of the shared upstream pool
+(dashboard sections, the single-flight cache fetch), and page fetches queued
+on that same pool would wait behind their own callers.
+
+``parse_record`` builds the app's flight dict from one AviationStack record
+in a single pass: timestamps are sliced (``2026-01-17T18:25:00+00:00`` ->
+``18:25`` and ``2026-01-17``) instead of ``strptime``-ed, and missing
+sections fall back to defaults instead of raising.
+
+``FlightStore`` keeps one ``advisor.core.Flight`` per (flight number, arrival
+date) for each airport. A merge only replaces records whose status or times
+changed, and ``flights(airport)`` hands out the same list object until one
+does, so ``ExitTimeline.update`` skips an unchanged refresh entirely.
+"""
+import threading
+
+from advisor.core import Flight
+from advisor.upstream import Source, UpstreamError, fetch_json, gather
+
+PAGE_SIZE = 100  # AviationStack's maximum ``limit``
+MAX_PAGES = 10
+PAGE_POOL = "ingest"
+DROPPED_STATUSES = frozenset({"cancelled", "diverted"})  # nobody comes out of the terminal
+_EMPTY = {}
+
+
+def parse_record(f):
+    airline = f.get('airline') or _EMPTY
+    flight = f.get('flight') or _EMPTY
+    departure = f.get('departure') or _EMPTY
+    arrival = f.get('arrival') or _EMPTY
+    scheduled = arrival.get('scheduled') or ""
+    actual = arrival.get('actual') or ""
+    return {
+        "airline": airline.get('name') or 'Unknown',
+        "flight_number": flight.get('iata') or 'N/A',
+        "origin": departure.get('airport') or 'Unknown',
+        "origin_iata": departure.get('iata'),
+        "terminal": arrival.get('terminal'),
+        "arrival_time": scheduled[11:16] or "00:00",
+        "actual_time": actual[11:16] or None,
+        "status": f.get('flight_status'),
+        "date": scheduled[:10] or None,
+    }
+
+
+def parse_page(data):
+    """``(records, total)`` for one page of ``/v1/flights``."""
+    if 'error' in data:
+        raise UpstreamError(f"flights: {data['error']}")
+    records = [parse_record(f) for f in data.get('data') or () if isinstance(f, dict)]
+    total = (data.get('pagination') or _EMPTY).get('total')
+    return records, len(records) if total is None else total
+
+
+def page_source(source, airport, offset, limit=PAGE_SIZE):
+    """``source`` narrowed to one page of one airport's arrivals."""
+    params = source.params() if callable(source.params) else source.params
+    params = dict(params or _EMPTY, arr_iata=airport, limit=limit, offset=offset)
+    return Source(source.name, source.url, params=params, parse=parse_page,
+                  timeout=source.timeout, retries=source.retries, backoff=source.backoff)
+
+
+def ingest(source, airports, fetch=fetch_json, page_size=PAGE_SIZE, max_pages=MAX_PAGES, timeout=None):
+    """Every page of every airport's arrivals.
+
+    Returns ``{"flights": {airport: records}, "complete": [airports with every page],
+    "errors": {"BKK@200": reason}, "calls": upstream requests made}``. An airport
+    whose first page failed is missing from ``flights``.
+    """
+    page = lambda airport, offset: (lambda: fetch(page_source(source, airport, offset, page_size)))
+    first, errors = gather({airport: page(airport, 0) for airport in airports}, timeout=timeout, pool=PAGE_POOL)
+    tasks = {}
+    for airport, (_, total) in first.items():
+        for offset in range(page_size, min(total, page_size * max_pages), page_size):
+            tasks[(airport, offset)] = page(airport, offset)
+    rest, rest_errors = gather(tasks, timeout=timeout, pool=PAGE_POOL) if tasks else ({}, {})
+    flights, complete = {}, []
+    for airport in airports:
+        if airport not in first:
+            continue
+        records = list(first[airport][0])
+        offsets = sorted(offset for a, offset in tasks if a == airport)
+        for offset in offsets:
+            if (airport, offset) in rest:
+                records += rest[(airport, offset)][0]
+        flights[airport] = records
+        if all((airport, offset) in rest for offset in offsets):
+            complete.append(airport)
+    errors.update({f"{airport}@{offset}": reason for (airport, offset), reason in rest_errors.items()})
+    return {"flights": flights, "complete": complete, "errors": errors, "calls": len(airports) + len(tasks)}
+
+
+class FlightStore:
+    def __init__(self):
+        self._airports = {}  # airport -> {(flight_number, date): Flight}
+        self._lists = {}     # airport -> list handed out until the next change
+        self._last = None
+        self._lock = threading.Lock()
+
+    def merge(self, airport, records, complete=True):
+        """Apply one fetch of ``airport`` (``parse_record`` dicts).
+
+        Cancelled/diverted flights and flights missing from a complete fetch are dropped.
+        """
+        stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            current = self._airports.setdefault(airport, {})
+            seen = set()
+            for r in records:
+                flight = Flight.from_dict(r)
+                key = (flight.flight_number, flight.date)
+                if flight.status in DROPPED_STATUSES:
+                    if current.pop(key, None) is not None:
+                        stats["removed"] += 1
+                    continue
+                seen.add(key)
+                old = current.get(key)
+                if old == flight:
+                    stats["unchanged"] += 1
+                    continue
+                current[key] = flight
+                stats["changed" if old is not None else "added"] += 1
+            if complete:
+                for key in [k for k in current if k not in seen]:
+                    del current[key]
+                    stats["removed"] += 1
+            if stats["added"] or stats["changed"] or stats["removed"]:
+                self._lists.pop(airport, None)
+        return stats
+
+    def sync(self, result):
+        """Merge an ``ingest`` result; a no-op when handed the same result object again."""
+        if result is self._last:
+            return
+        for airport, records in result["flights"].items():
+            self.merge(airport, records, complete=airport in result["complete"])
+        self._last = result
+
+    def flights(self, airport):
+        with self._lock:
+            out = self._lists.get(airport)
+            if out is None:
+                out = self._lists[airport] = list(self._airports.get(airport, _EMPTY).values())
+            return out
+
+    def __len__(self):
+        return sum(len(records) for records in self._airports.values())
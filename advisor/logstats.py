@@ -0,0 +1,253 @@
+"""Summarize a Vercel log export (e.g. ``logs_result.csv``) in one streaming pass.
+
+An export mixes three kinds of rows per request: the edge row, the
+function's log lines (``message``, possibly a multi-line traceback inside a
+quoted field) and the invocation report carrying ``durationMs``,
+``maxMemoryUsed``, ``memorySize`` and ``instanceId``. Latency, memory and
+error rates come from invocation reports; tracebacks from log lines.
+
+Memory stays constant in the export size: latencies go into log-bucketed
+histograms (~1% relative error, mergeable and subtractable) instead of
+lists; only per-path, per-instance and per-traceback counters are kept.
+The first invocation of each ``instanceId`` (by timestamp, exports are
+newest-first) is its cold start; warm = all - cold.
+
+Run: python -m advisor.logstats logs_result.csv [--json summary.json]
+"""
+import argparse
+import csv
+import json
+import math
+import re
+import sys
+from collections import Counter
+from urllib.parse import urlsplit
+
+GROWTH = 1.02
+TRACEBACK = "Traceback (most recent call last):"
+FRAME_RE = re.compile(r'File "([^"]+)", line (\d+), in (\S+)')
+
+
+class Histogram:
+    """Log-bucketed counts: ``percentile`` is within ~1% of the exact value."""
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value, n=1):
+        self.buckets[self._bucket(value)] += n
+        self.count += n
+        self.total += value * n
+        self.max = max(self.max, value)
+
+    def subtract(self, other):
+        out = Histogram()
+        out.buckets = self.buckets - other.buckets
+        out.count = self.count - other.count
+        out.total = self.total - other.total
+        top = max((b for b, n in out.buckets.items() if n > 0), default=None)
+        out.max = 0.0 if top is None else min(self.max, GROWTH ** top)
+        return out
+
+    @staticmethod
+    def _bucket(value):
+        return 0 if value < 1 else 1 + int(math.log(value, GROWTH))
+
+    @staticmethod
+    def _value(bucket):
+        return 0.0 if bucket == 0 else GROWTH ** (bucket - 0.5)
+
+    def percentile(self, q):
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self._value(bucket), self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return {"count": 0}
+        return {"count": self.count, "mean": round(self.total / self.count, 1),
+                **{f"p{q}": round(self.percentile(q), 1) for q in (50, 95, 99)}, "max": round(self.max, 1)}
+
+
+class PathStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.status = Counter()
+        self.memory_used = 0
+        self.memory_size = 0
+        self.min_headroom = None
+
+    def add(self, duration, status, used, size):
+        self.latency.add(duration)
+        self.status[status // 100 if status else 0] += 1
+        if used and size:
+            self.memory_used = max(self.memory_used, used)
+            self.memory_size = max(self.memory_size, size)
+            headroom = size - used
+            self.min_headroom = headroom if self.min_headroom is None else min(self.min_headroom, headroom)
+
+    def summary(self, cold):
+        n = self.latency.count
+        return {
+            "requests": n,
+            "latency_ms": self.latency.summary(),
+            "cold_ms": cold.summary(),
+            "warm_ms": self.latency.subtract(cold).summary(),
+            "errors_4xx": self.status[4], "errors_5xx": self.status[5],
+            "error_rate": round((self.status[4] + self.status[5]) / n, 4) if n else 0.0,
+            "error_rate_5xx": round(self.status[5] / n, 4) if n else 0.0,
+            "memory": {"max_used_mb": self.memory_used, "memory_size_mb": self.memory_size, "min_headroom_mb": self.min_headroom,
+                       "headroom_pct": round(100 * self.min_headroom / self.memory_size, 1) if self.memory_size else None},
+        }
+
+
+def _number(value):
+    try:
+        return float(value) if value not in ("", None) else None
+    except ValueError:
+        return None
+
+
+def path_of(request_path):
+    """'host/api/x' or a full URL -> '/api/x'."""
+    if "://" in request_path:
+        return urlsplit(request_path).path or "/"
+    i = request_path.find("/")
+    return request_path[i:] if i >= 0 else "/"
+
+
+def traceback_signature(message):
+    """(exception line, innermost frame) for a traceback message, None otherwise."""
+    if TRACEBACK not in message:
+        return None
+    lines = [line for line in message.splitlines() if line.strip()]
+    exception = lines[-1].strip() if lines else ""
+    frames = FRAME_RE.findall(message)
+    app_frames = [f for f in frames if "/_vendor/" not in f[0] and "site-packages" not in f[0]] or frames
+    where = f"{app_frames[-1][0]}:{app_frames[-1][1]} in {app_frames[-1][2]}" if app_frames else ""
+    return exception, where
+
+
+class LogStats:
+    def __init__(self):
+        self.paths = {}
+        self.deployments = {}
+        self.instances = {}  # instanceId -> (first timestamp, path, duration, deployment)
+        self.tracebacks = {}
+        self.errors = Counter()  # error-level messages without a traceback, by first line
+        self.cache = Counter()
+        self.rows = 0
+
+    def add(self, row):
+        self.rows += 1
+        message = row.get("message") or ""
+        path = path_of(row.get("requestPath") or "")
+        if message:
+            self._add_message(row, message, path)
+        duration = _number(row.get("durationMs"))
+        if duration is None:
+            if row.get("vercelCache") and not row.get("type"):
+                self.cache[row["vercelCache"]] += 1
+            return
+        status = int(_number(row.get("responseStatusCode")) or 0)
+        used, size = _number(row.get("maxMemoryUsed")), _number(row.get("memorySize"))
+        deployment = row.get("deploymentId") or "unknown"
+        self.paths.setdefault(path, PathStats()).add(duration, status, used, size)
+        self.deployments.setdefault(deployment, PathStats()).add(duration, status, used, size)
+        instance = row.get("instanceId")
+        ts = _number(row.get("timestampInMs")) or 0
+        if instance:
+            first = self.instances.get(instance)
+            if first is None or ts < first[0]:
+                self.instances[instance] = (ts, path, duration, deployment)
+
+    def _add_message(self, row, message, path):
+        signature = traceback_signature(message)
+        if signature is not None:
+            group = self.tracebacks.get(signature)
+            ts = row.get("TimeUTC") or ""
+            if group is None:
+                group = self.tracebacks[signature] = {"exception": signature[0], "where": signature[1], "count": 0,
+                                                      "paths": Counter(), "first_seen": ts, "last_seen": ts}
+            group["count"] += 1
+            group["paths"][path] += 1
+            group["first_seen"] = min(group["first_seen"], ts)
+            group["last_seen"] = max(group["last_seen"], ts)
+        elif row.get("level") == "error":
+            self.errors[message.splitlines()[0][:200]] += 1
+
+    def summary(self):
+        cold_paths, cold_deployments = {}, {}
+        for _, path, duration, deployment in self.instances.values():
+            cold_paths.setdefault(path, Histogram()).add(duration)
+            cold_deployments.setdefault(deployment, Histogram()).add(duration)
+        by_count = lambda kv: -kv[1].latency.count
+        return {
+            "rows": self.rows,
+            "instances": len(self.instances),
+            "paths": {p: s.summary(cold_paths.get(p, Histogram())) for p, s in sorted(self.paths.items(), key=by_count)},
+            "deployments": {d: s.summary(cold_deployments.get(d, Histogram())) for d, s in sorted(self.deployments.items(), key=by_count)},
+            "cache": dict(self.cache),
+            "tracebacks": sorted(({**g, "paths": dict(g["paths"])} for g in self.tracebacks.values()), key=lambda g: -g["count"]),
+            "errors": dict(self.errors.most_common()),
+        }
+
+
+def analyze(lines):
+    """Stream an export (any iterable of CSV lines, e.g. an open file) into a summary dict."""
+    csv.field_size_limit(sys.maxsize)
+    stats = LogStats()
+    for row in csv.DictReader(lines):
+        stats.add(row)
+    return stats.summary()
+
+
+def format_table(summary):
+    fmt = lambda v: "-" if v is None else f"{v:.0f}"
+    lines = [f"{summary['rows']} rows, {summary['instances']} instances", "",
+             f"{'path':<28} {'reqs':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'cold p50':>9} {'warm p50':>9} {'err%':>6} {'5xx%':>6} {'mem max/size MB':>16}"]
+    for path, s in summary["paths"].items():
+        lat, cold, warm, mem = s["latency_ms"], s["cold_ms"], s["warm_ms"], s["memory"]
+        lines.append(f"{path[:28]:<28} {s['requests']:>6} {fmt(lat.get('p50')):>7} {fmt(lat.get('p95')):>7} {fmt(lat.get('p99')):>7} "
+                     f"{fmt(cold.get('p50')):>9} {fmt(warm.get('p50')):>9} {100 * s['error_rate']:>6.1f} {100 * s['error_rate_5xx']:>6.1f} "
+                     f"{fmt(mem['max_used_mb']):>7}/{fmt(mem['memory_size_mb']):<8}")
+    if summary["tracebacks"]:
+        lines += ["", "tracebacks:"]
+        for g in summary["tracebacks"]:
+            lines.append(f"  {g['count']:>5}x {g['exception']}")
+            lines.append(f"         at {g['where']}  ({', '.join(g['paths'])}; {g['first_seen']} .. {g['last_seen']})")
+    if summary["errors"]:
+        lines += ["", "other errors:"] + [f"  {n:>5}x {msg}" for msg, n in summary["errors"].items()]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("export", help="Vercel log export CSV, or - for stdin")
+    parser.add_argument("--json", help="write the full summary here (- for stdout)")
+    args = parser.parse_args(argv)
+    if args.export == "-":
+        summary = analyze(sys.stdin)
+    else:
+        with open(args.export, newline="", encoding="utf-8") as fh:
+            summary = analyze(fh)
+    if args.json == "-":
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        return
+    print(format_table(summary))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
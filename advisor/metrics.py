@@ -0,0 +1,226 @@
+"""Per-stage timers, upstream counters and an opt-in sampling profiler.
+
+``with stage("analyze"):`` times a block into the ``smart_taxi_stage_seconds``
+histogram and, inside a request started with ``begin_request()``, into that
+request's ``Server-Timing`` header. ``render()`` is the Prometheus text
+format for ``/metrics``.
+
+METRICS=0 turns all of it off: ``stage()`` hands back one shared no-op
+context manager and the request hooks return immediately.
+
+PROFILE_INTERVAL_MS=5 starts a ``SamplingProfiler`` thread that samples every
+thread's stack and keeps folded counts ("a;b;c 42"), the input format of
+flamegraph.pl and speedscope.
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+ENABLED = os.environ.get("METRICS", "1").lower() not in ("0", "false", "no")
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+_local = threading.local()
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    pairs = ",".join(f'{n}="{escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class CounterMetric:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name + _labels(self.labels, k), v) for k, v in sorted(self._values.items())]
+
+
+class HistogramMetric:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, tuple(labels), tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        out = []
+        with self._lock:
+            items = sorted(self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += n
+                out.append((f"{self.name}_bucket" + _labels(self.labels + ("le",), labels + (bound,)), cumulative))
+            out.append((f"{self.name}_sum" + _labels(self.labels, labels), round(series[-1], 6)))
+            out.append((f"{self.name}_count" + _labels(self.labels, labels), cumulative))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []  # callables returning [(name, kind, help, value)] at scrape time
+
+    def counter(self, name, help, labels=()):
+        metric = CounterMetric(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=BUCKETS):
+        metric = HistogramMetric(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        self.collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for m in self.metrics:
+            lines += [f"# HELP {m.name} {m.help}", f"# TYPE {m.name} {m.kind}"]
+            lines += [f"{name} {value}" for name, value in m.samples()]
+        for fn in self.collectors:
+            for name, kind, help, value in fn():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram("smart_taxi_stage_seconds", "Time spent in each request stage.", ("stage",))
+REQUEST_SECONDS = REGISTRY.histogram("smart_taxi_request_seconds", "Request latency by endpoint.", ("endpoint", "status"))
+UPSTREAM_SECONDS = REGISTRY.histogram("smart_taxi_upstream_seconds", "Latency of each upstream HTTP attempt.", ("source",))
+UPSTREAM_CALLS = REGISTRY.counter("smart_taxi_upstream_requests_total", "Upstream HTTP attempts by outcome.", ("source", "outcome"))
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, self.name)
+        timings = getattr(_local, "timings", None)
+        if timings is not None:
+            timings.append((self.name, elapsed))
+
+
+def stage(name):
+    return _Stage(name) if ENABLED else _NOOP
+
+
+def observe_upstream(source, outcome, elapsed):
+    if ENABLED:
+        UPSTREAM_SECONDS.observe(elapsed, source)
+        UPSTREAM_CALLS.inc(source, outcome)
+
+
+def begin_request():
+    if ENABLED:
+        _local.timings = []
+        _local.start = time.perf_counter()
+
+
+def end_request(endpoint, status):
+    """Record the request and return its ``Server-Timing`` header value (None when disabled)."""
+    if not ENABLED:
+        return None
+    timings = getattr(_local, "timings", None)
+    if timings is None:
+        return None
+    total = time.perf_counter() - _local.start
+    _local.timings = None
+    REQUEST_SECONDS.observe(total, endpoint or "unknown", status)
+    merged = {}
+    for name, elapsed in timings:
+        merged[name] = merged.get(name, 0.0) + elapsed
+    parts = [f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in merged.items()]
+    return ", ".join(parts + [f"total;dur={total * 1000:.2f}"])
+
+
+class SamplingProfiler:
+    """Samples every other thread's stack every ``interval`` seconds into folded-stack counts."""
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self, reset=False):
+        stacks = self.stacks
+        if reset:
+            self.stacks = Counter()
+        return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+
+PROFILER = None
+if os.environ.get("PROFILE_INTERVAL_MS"):
+    PROFILER = SamplingProfiler(float(os.environ["PROFILE_INTERVAL_MS"]) / 1000).start()
@@ -0,0 +1,135 @@
+"""Rate-limited, deduplicating LINE Notify dispatcher.
+
+``Dispatcher.dispatch`` posts one message per token on a small worker pool
+over the shared keep-alive session (``advisor.upstream.get_session``).
+Every post takes a slot from that token's bucket (LINE allows 1000 calls an
+hour per token) and from a global bucket, retries 429/5xx with jittered
+backoff (honouring ``Retry-After``), and is skipped when the token was
+already sent the very same message. ``last_sent`` is keyed by ``token_id``
+(a short SHA-256), so persisting it never writes a subscriber's token to disk.
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from advisor.metrics import observe_upstream
+from advisor.upstream import RETRY_STATUS, get_session
+
+LINE_NOTIFY_URL = "https://notify-api.line.me/api/notify"
+
+
+class TokenBucket:
+    """``rate`` tokens per second, bursts of up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._stamp = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, n=1):
+        """Take ``n`` tokens, going into debt if there are not enough; returns seconds to wait before using them."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= n
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+def digest(message):
+    return hashlib.blake2b(message.encode(), digest_size=12).hexdigest()
+
+
+def token_id(token):
+    """Short SHA-256 of a LINE token: what state files keep instead of the secret."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def retry_after(response):
+    try:
+        return max(0.0, float(response.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+class Dispatcher:
+    def __init__(self, url=LINE_NOTIFY_URL, workers=8, rate=10.0, per_token_rate=1000 / 3600, per_token_burst=5,
+                 retries=3, backoff=1.0, timeout=10, session=None, sleep=time.sleep, clock=time.monotonic):
+        self.url = url
+        self.workers = workers
+        self.per_token_rate = per_token_rate
+        self.per_token_burst = per_token_burst
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session
+        self.sleep = sleep
+        self._clock = clock
+        self.bucket = TokenBucket(rate, clock=clock)
+        self._buckets = {}
+        self.last_sent = {}  # token_id(token) -> digest of the last message delivered to it
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def _token_bucket(self, token):
+        with self._lock:
+            bucket = self._buckets.get(token)
+            if bucket is None:
+                bucket = self._buckets[token] = TokenBucket(self.per_token_rate, self.per_token_burst, self._clock)
+            return bucket
+
+    def send(self, token, message):
+        """Deliver one message; returns "sent", "duplicate" or "failed: <reason>"."""
+        key, tid = digest(message), token_id(token)
+        if self.last_sent.get(tid) == key:
+            outcome = "duplicate"
+        else:
+            outcome = self._post(token, message)
+            if outcome == "sent":
+                self.last_sent[tid] = key
+        with self._lock:
+            self.stats[outcome.split(":")[0]] += 1
+        return outcome
+
+    def _post(self, token, message):
+        import requests
+        session = self.session or get_session()
+        error = None
+        for attempt in range(self.retries + 1):
+            self.sleep(max(self._token_bucket(token).reserve(), self.bucket.reserve()))
+            start = time.perf_counter()
+            delay = None
+            try:
+                response = session.post(self.url, headers={"Authorization": f"Bearer {token}"},
+                                        data={"message": message}, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                observe_upstream("line_notify", "timeout" if isinstance(e, requests.Timeout) else "connection_error",
+                                 time.perf_counter() - start)
+                error = e.__class__.__name__
+            else:
+                status = response.status_code
+                observe_upstream("line_notify", "ok" if status == 200 else f"http_{status}", time.perf_counter() - start)
+                if status == 200:
+                    return "sent"
+                error = f"HTTP {status}"
+                if status not in RETRY_STATUS:
+                    break
+                delay = retry_after(response)
+            if attempt < self.retries:
+                self.sleep(delay if delay is not None else random.uniform(0, self.backoff * 2 ** attempt))
+        return f"failed: {error}"
+
+    def dispatch(self, messages):
+        """Send ``(token, message)`` pairs concurrently; returns ``{token: outcome}``."""
+        messages = dict(messages)
+        if not messages:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(messages)), thread_name_prefix="notify") as pool:
+            futures = {token: pool.submit(self.send, token, message) for token, message in messages.items()}
+            return {token: future.result() for token, future in futures.items()}
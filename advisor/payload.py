@@ -0,0 +1,70 @@
+"""Response payload helpers for the polled JSON endpoints.
+
+* ``content_etag`` hashes a payload (minus volatile keys like the clock, also
+  inside dashboard sections) so an unchanged poll can be answered with 304;
+* ``compact_alerts`` sends per-zone metadata once and each alert as a row;
+* ``compress`` picks br/gzip from Accept-Encoding.
+"""
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+ZONE_FIELDS = ("note", "icon", "color", "fare_range", "fare_min", "fare_max")
+ALERT_FIELDS = ("airline", "flight", "origin", "land_time", "exit_time", "exit_at", "zone")
+MIN_COMPRESS_BYTES = 512
+VOLATILE_KEYS = ("current_time", "updated")  # the server clock, not content
+
+
+def dumps(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def content_etag(payload, exclude=VOLATILE_KEYS):
+    stable = payload
+    if isinstance(payload, dict):
+        stable = {k: {kk: vv for kk, vv in v.items() if kk not in exclude} if isinstance(v, dict) else v
+                  for k, v in payload.items() if k not in exclude}
+    return hashlib.blake2b(dumps(stable).encode(), digest_size=12).hexdigest()
+
+
+def compact_alerts(alerts):
+    """``(zones, rows)``: zone metadata keyed by zone name, alerts as ALERT_FIELDS rows."""
+    zones = {}
+    rows = []
+    for a in alerts:
+        if a['zone'] not in zones:
+            zones[a['zone']] = {k: a[k] for k in ZONE_FIELDS if k in a}
+        rows.append([a.get(k) for k in ALERT_FIELDS])
+    return zones, rows
+
+
+def compact_flights(payload):
+    """Rewrite ``payload['alerts']`` into the compact zone table + rows format."""
+    zones, rows = compact_alerts(payload['alerts'])
+    return dict(payload, alerts=rows, alert_fields=list(ALERT_FIELDS), zones=zones, format="compact")
+
+
+def choose_encoding(accept_encoding):
+    accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body, accept_encoding):
+    """Return ``(body, encoding)``; small bodies are left alone."""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    encoding = choose_encoding(accept_encoding)
+    if encoding == "br":
+        return brotli.compress(body, quality=5), encoding
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6), encoding
+    return body, None
@@ -0,0 +1,235 @@
+"""Refresh upstream caches ahead of expiry instead of on a driver's request.
+
+Each ``Job`` re-fetches one cache key shortly before its TTL runs out. The
+refresh interval follows the arrival banks: ``HOURLY_WEIGHT`` gives the
+17:00-01:00 peak three times the daytime rate and the small hours a tenth
+of it. Jobs against a metered API carry a ``QuotaBudget`` which spreads
+the monthly call limit over the rest of the month by those weights, and
+refuses any call that would run ahead of the monthly pace.
+
+``Prefetcher.run_due()`` does one pass. ``start()`` runs passes on a
+background thread (gunicorn and other long-running servers); a Vercel cron
+hitting the prefetch endpoint calls ``run_due()`` directly. Without a
+thread, a request that finds the cache cold calls ``fill()``: one refresh,
+charged to the budget, that concurrent requests wait on instead of repeating.
+
+With several workers or instances the shared cache backend
+(``CACHE_BACKEND=sqlite``) lets one refresh serve them all, and the quota
+count lives in its own SQLite file so every process spends from the same
+budget. That only holds if every process opens the same file: the default
+path is in the temp dir, which on Vercel is per instance, so each instance
+would spend its own full monthly limit. Cron mode on serverless needs
+``path`` (``QUOTA_PATH``) on storage all instances share.
+"""
+import calendar
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+HOURLY_WEIGHT = (3, 1.5, 0.3, 0.3, 0.3, 0.3, 0.5, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1.5, 3, 3, 3, 3, 3, 3, 3)
+MIN_INTERVAL = 120
+MAX_INTERVAL = 6 * 3600
+
+
+def month_bounds(now):
+    """(start, end) epoch seconds of the local calendar month containing ``now``."""
+    d = datetime.fromtimestamp(now)
+    start = datetime(d.year, d.month, 1)
+    days = calendar.monthrange(d.year, d.month)[1]
+    return start.timestamp(), start.timestamp() + days * 86400
+
+
+def weighted_hours(start, end, weights=HOURLY_WEIGHT):
+    """Sum of hourly weights between two timestamps (partial hours count pro rata)."""
+    total = 0.0
+    t = start
+    while t < end:
+        hour_end = (t // 3600 + 1) * 3600
+        total += weights[datetime.fromtimestamp(t).hour] * (min(hour_end, end) - t) / 3600
+        t = hour_end
+    return total
+
+
+class QuotaBudget:
+    """Monthly call budget shared by every process that opens the same SQLite file.
+
+    ``path`` defaults to the temp dir, shared by the workers of one machine only.
+    """
+
+    def __init__(self, monthly_limit, path=None, reserve=0.05, burst=0.01, clock=time.time):
+        self.monthly_limit = monthly_limit
+        self.allowance = int(monthly_limit * (1 - reserve))
+        self.burst = max(1, int(monthly_limit * burst))
+        self.path = path or os.path.join(tempfile.gettempdir(), "smart_taxi_quota.sqlite3")
+        self._clock = clock
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS quota (month TEXT PRIMARY KEY, used INTEGER NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+
+    @staticmethod
+    def _month(now):
+        return datetime.fromtimestamp(now).strftime("%Y-%m")
+
+    def used(self, now=None):
+        now = self._clock() if now is None else now
+        db = self._connect()
+        try:
+            row = db.execute("SELECT used FROM quota WHERE month = ?", (self._month(now),)).fetchone()
+        finally:
+            db.close()
+        return row[0] if row else 0
+
+    def pace(self, now):
+        """Calls allowed by ``now``: the month's allowance pro rata by weighted hours, plus a small burst."""
+        start, end = month_bounds(now)
+        return self.allowance * weighted_hours(start, now) / weighted_hours(start, end) + self.burst
+
+    def try_spend(self, n=1, now=None):
+        now = self._clock() if now is None else now
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT used FROM quota WHERE month = ?", (self._month(now),)).fetchone()
+            used = row[0] if row else 0
+            if used + n > min(self.allowance, self.pace(now)):
+                db.execute("ROLLBACK")
+                return False
+            db.execute("INSERT OR REPLACE INTO quota (month, used) VALUES (?, ?)", (self._month(now), used + n))
+            db.execute("COMMIT")
+            return True
+        finally:
+            db.close()
+
+    def interval(self, now=None, weights=HOURLY_WEIGHT, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        """Seconds between calls right now that spend what is left evenly (by weight) until month end."""
+        now = self._clock() if now is None else now
+        _, end = month_bounds(now)
+        left = self.allowance - self.used(now)
+        if left <= 0:
+            return max_interval
+        per_weighted_hour = left / max(weighted_hours(now, end, weights), 1e-9)
+        rate = per_weighted_hour * weights[datetime.fromtimestamp(now).hour]  # calls per hour
+        return min(max(3600 / rate if rate > 0 else max_interval, min_interval), max_interval)
+
+
+def adaptive_interval(base, weights=HOURLY_WEIGHT, clock=time.time):
+    """Fixed ``base`` seconds at weight 1, shorter at peaks and longer overnight."""
+    def interval(now=None):
+        weight = weights[datetime.fromtimestamp(clock() if now is None else now).hour]
+        return min(max(base / weight, MIN_INTERVAL / 2), MAX_INTERVAL)
+    return interval
+
+
+class Job:
+    def __init__(self, key, fetch, interval, budget=None, cost=1, lead=60, retry=60):
+        self.key = key
+        self.fetch = fetch
+        self.interval = interval  # callable(now) -> seconds until the next refresh
+        self.budget = budget
+        self.cost = cost  # quota calls per refresh, or a callable returning them
+        self.lead = lead
+        self.retry = retry
+        self.retry_at = 0.0
+        self.last = None  # (timestamp, outcome)
+
+
+class Prefetcher:
+    def __init__(self, cache, jobs, clock=time.time, tick=15):
+        self.cache = cache
+        self.jobs = {job.key: job for job in jobs}
+        self._clock = clock
+        self.tick = tick
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def due(self, now=None):
+        now = self._clock() if now is None else now
+        out = []
+        for job in self.jobs.values():
+            if now < job.retry_at:
+                continue
+            remaining = self.cache.expires_in(job.key)
+            if remaining is None or remaining <= job.lead:
+                out.append(job)
+        return out
+
+    def run_due(self, now=None):
+        """One pass: refresh every due job. Returns ``{key: outcome}`` for the jobs it touched."""
+        with self._lock:
+            now = self._clock() if now is None else now
+            return {job.key: self._refresh(job, now) for job in self.due(now)}
+
+    def _refresh(self, job, now):
+        cost = job.cost() if callable(job.cost) else job.cost
+        if job.budget is not None and not job.budget.try_spend(cost, now=now):
+            outcome = "quota"
+        else:
+            try:
+                value = job.fetch()
+            except Exception as e:
+                value, outcome = None, f"error: {e}"
+            else:
+                outcome = "refreshed" if value is not None else "empty"
+            if value is not None:
+                self.cache.set(job.key, value, ttl=job.interval(now) + job.lead)
+        if outcome != "refreshed":
+            job.retry_at = now + job.retry
+        job.last = (now, outcome)
+        return outcome
+
+    def fill(self, key, now=None):
+        """Cold cache: refresh ``key`` once, charged to its budget, and return the cached value (None if it failed).
+
+        Concurrent callers wait on the one refresh; a failed one is not retried before ``job.retry``.
+        """
+        job = self.jobs[key]
+        with self._lock:
+            now = self._clock() if now is None else now
+            if self.cache.peek(key) is None and now >= job.retry_at:
+                self._refresh(job, now)
+            return self.cache.peek(key)
+
+    def wake(self):
+        """Ask the background thread for an immediate pass (e.g. a request found the cache empty)."""
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="prefetcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_due()
+            except Exception:
+                pass  # a bad pass must not kill the scheduler; the next tick retries
+            self._wake.wait(self.tick)
+            self._wake.clear()
+
+    def status(self):
+        now = self._clock()
+        return {
+            key: {
+                "expires_in": None if (left := self.cache.expires_in(key)) is None else round(left),
+                "interval": round(job.interval(now)),
+                "last": {"at": datetime.fromtimestamp(job.last[0]).strftime("%H:%M:%S"), "outcome": job.last[1]} if job.last else None,
+                "quota_used": job.budget.used(now) if job.budget else None,
+            }
+            for key, job in self.jobs.items()
+        }
@@ -0,0 +1,175 @@
+"""Zone profiles and city events, loaded from a versioned data file.
+
+``data/profiles.json`` holds ``{"version": n, "zones": {...}, "events": [...]}``.
+Each version of the file is compiled once into a ``Profiles`` snapshot:
+read-only mappings and tuples, the ``ZoneResolver`` hub matcher, the
+per-zone alert fields with ``fare_range`` already split into
+``fare_min``/``fare_max``, and the events with their fares parsed the same
+way plus their end minute and crowd-based demand, indexed by end time and
+location (``advisor.events.EventIndex``). Requests share the snapshot;
+nothing is rebuilt or mutated per request.
+
+``ProfileSource.current()`` stats the file at most every ``check_interval``
+seconds and swaps in a new snapshot when its mtime or size changed, so a
+fare edit goes live without a redeploy. A file that fails to parse or
+validate is reported in ``status()`` and the previous snapshot stays in use.
+"""
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from advisor.events import EventIndex, day_minute
+from advisor.scoring import crowd_demand
+from advisor.timeline import CLOCK, DAY, anchor, clock_minutes, unix_time
+from advisor.zones import ZoneResolver
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "profiles.json")
+CHECK_SECONDS = 5.0
+ZONE_KEYS = ("hubs", "exit_delay", "fare_range", "comment", "icon", "color")
+EVENT_KEYS = ("name", "event", "end_time", "people", "fare_range", "icon", "lat", "lng")
+
+
+def fare_bounds(fare_range):
+    """"400-800" -> (400, 800)."""
+    lo, sep, hi = str(fare_range).partition('-')
+    if not (sep and lo.strip().isdigit() and hi.strip().isdigit()) or int(lo) > int(hi):
+        raise ValueError(f"bad fare_range {fare_range!r}")
+    return int(lo), int(hi)
+
+
+def _require(what, item, keys):
+    if not isinstance(item, dict):
+        raise ValueError(f"{what}: expected an object")
+    missing = [k for k in keys if k not in item]
+    if missing:
+        raise ValueError(f"{what}: missing {', '.join(missing)}")
+
+
+def _zone(name, z):
+    _require(f"zone {name}", z, ZONE_KEYS)
+    if not isinstance(z['hubs'], list) or not all(isinstance(h, str) and h for h in z['hubs']):
+        raise ValueError(f"zone {name}: hubs must be a list of names")
+    if not isinstance(z['exit_delay'], int) or z['exit_delay'] < 1:
+        raise ValueError(f"zone {name}: exit_delay must be a positive integer")  # forecast.delay_kernel needs a median > 0
+    fare_bounds(z['fare_range'])
+    return MappingProxyType(dict(z, hubs=tuple(z['hubs'])))
+
+
+def crowd_size(people):
+    """"20,000" (or 20000) -> 20000."""
+    text = str(people).replace(',', '').strip()
+    if not text.isdigit():
+        raise ValueError(f"bad people {people!r}")
+    return int(text)
+
+
+def _event(i, e):
+    _require(f"event {i}", e, EVENT_KEYS)
+    lo, hi = fare_bounds(e['fare_range'])
+    crowd = crowd_size(e['people'])
+    if e.get('date'):
+        day_minute(e['date'])  # ValueError on a malformed date
+    return MappingProxyType(dict(e, lat=float(e['lat']), lng=float(e['lng']), fare_min=lo, fare_max=hi,
+                                 end_minute=clock_minutes(e['end_time']), crowd=crowd, demand=crowd_demand(crowd)))
+
+
+def _alert_fields(zone, p):
+    lo, hi = fare_bounds(p['fare_range'])
+    return MappingProxyType({"fare_range": p['fare_range'], "fare_min": lo, "fare_max": hi,
+                             "note": p['comment'], "zone": zone, "icon": p['icon'], "color": p['color']})
+
+
+class Profiles:
+    """One compiled version of the profile file; shared, never modified."""
+    __slots__ = ("version", "zones", "events", "event_index", "resolver", "alert_fields", "exit_delay")
+
+    def __init__(self, data):
+        _require("profiles", data, ("version", "zones", "events"))
+        if not isinstance(data['zones'], dict) or not data['zones']:
+            raise ValueError("profiles: zones must be a non-empty object")
+        if not isinstance(data['events'], list):
+            raise ValueError("profiles: events must be a list")
+        self.version = data['version']
+        self.zones = MappingProxyType({name: _zone(name, z) for name, z in data['zones'].items()})
+        self.events = tuple(_event(i, e) for i, e in enumerate(data['events']))
+        self.event_index = EventIndex(self.events)
+        self.resolver = ZoneResolver(self.zones)
+        self.alert_fields = MappingProxyType({zone: _alert_fields(zone, p) for zone, p in self.zones.items()})
+        self.exit_delay = MappingProxyType({zone: p['exit_delay'] for zone, p in self.zones.items()})
+
+    def build_alert(self, f, now_abs):
+        """(exit_minute, alert) for an A+ flight (an ``advisor.core.Flight``), None otherwise."""
+        zone = self.resolver(f.origin) or self.resolver(f.origin_iata)
+        arrival = f.arrival
+        if zone is None or arrival < 0:
+            return None
+        exit_minute = landing_minute(f, now_abs) + self.exit_delay[zone]
+        return exit_minute, {**self.alert_fields[zone], "airline": f.airline, "flight": f.flight_number,
+                             "origin": f.origin, "land_time": CLOCK[arrival], "exit_time": CLOCK[exit_minute % DAY],
+                             "exit_at": unix_time(exit_minute)}
+
+
+def landing_minute(f, now_abs):
+    """Absolute landing minute: on the flight's own date when known, else the day closest to ``now_abs``."""
+    if f.date:
+        try:
+            return day_minute(f.date) + f.arrival
+        except ValueError:
+            pass
+    return anchor(f.arrival, now_abs)
+
+
+def load(path=DEFAULT_PATH):
+    with open(path, encoding="utf-8") as fh:
+        return Profiles(json.load(fh))
+
+
+class ProfileSource:
+    """The current ``Profiles`` of one file, reloaded when the file changes."""
+
+    def __init__(self, path=DEFAULT_PATH, check_interval=CHECK_SECONDS, clock=time.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self._clock = clock
+        self._profiles = None
+        self._stamp = None  # (mtime_ns, size) of the file last parsed
+        self._checked = None
+        self.reloads = 0
+        self.error = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """The latest good snapshot; the first call raises if the file cannot be loaded."""
+        profiles = self._profiles
+        if profiles is not None and self._clock() - self._checked < self.check_interval:
+            return profiles
+        with self._lock:
+            now = self._clock()
+            if self._profiles is None or now - self._checked >= self.check_interval:
+                self._checked = now
+                self._refresh()
+            return self._profiles
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == self._stamp and self._profiles is not None:
+                return
+            self._stamp = stamp  # a broken file is reported once, not re-parsed every check
+            profiles = load(self.path)
+        except (OSError, ValueError) as e:
+            if self._profiles is None:
+                raise
+            self.error = f"{e.__class__.__name__}: {e}"
+            return
+        if self._profiles is not None:
+            self.reloads += 1
+        self._profiles, self.error = profiles, None
+
+    def status(self):
+        profiles = self._profiles
+        return {"path": self.path, "version": profiles.version if profiles else None,
+                "reloads": self.reloads, "error": self.error}
@@ -0,0 +1,96 @@
+"""Vectorized "Smart Score" for many drivers x many candidate pickup spots.
+
+score = average fare x demand - distance_km * FUEL_COST_PER_KM  (fuel/depreciation, 5 ฿/km)
+
+``demand`` is 1 for the airport and EV stations. For city events it grows with
+the crowd (``crowd_demand``): a 1,000-person fair rarely fills a taxi rank,
+while a 60,000-seat concert empties it.
+
+Everything is computed as one (drivers, candidates) matrix with NumPy, so
+scoring 500 taxis against every venue, EV station and airport rank is a
+handful of array operations instead of a Python loop per pair. That is
+what ``/api/fleet`` uses. A single driver (``/api/flights``, ``/api/events``,
+the dashboard) is scored by ``advisor.events.EventIndex.radar`` with the
+same formula: its grid and end-time index leave only a few events to score,
+so a plain Python loop beats building the matrix.
+
+NumPy is imported on first use, not with the module: a serverless cold
+start that never ranks drivers (``crowd_demand``/``expected_fare`` are
+plain Python) never pays for it.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0
+FUEL_COST_PER_KM = 5.0
+CROWD_SCALE = 10000  # people; a crowd this size gives 63% of full demand
+
+
+def crowd_demand(people):
+    """Share (0-1) of the average fare a taxi can expect from a crowd of ``people``."""
+    return 1.0 - math.exp(-max(people, 0) / CROWD_SCALE)
+
+
+def expected_fare(item):
+    return (item['fare_min'] + item['fare_max']) / 2 * item.get('demand', 1.0)
+
+
+def as_points(points):
+    """(n, 2) float array of (lat, lng) from a list of pairs or an array."""
+    import numpy as np
+    arr = np.asarray(points, dtype=np.float64)
+    return arr.reshape(-1, 2)
+
+
+def distance_matrix(drivers, candidates):
+    """Haversine km between every driver (rows) and every candidate (columns)."""
+    import numpy as np
+    d = np.radians(as_points(drivers))
+    c = np.radians(as_points(candidates))
+    dlat = c[None, :, 0] - d[:, None, 0]
+    dlng = c[None, :, 1] - d[:, None, 1]
+    a = np.sin(dlat / 2) ** 2 + np.cos(d[:, None, 0]) * np.cos(c[None, :, 0]) * np.sin(dlng / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def score_matrix(drivers, candidates, avg_fares, cost_per_km=FUEL_COST_PER_KM):
+    """``(scores, distances)``, both shaped (drivers, candidates)."""
+    import numpy as np
+    dist = distance_matrix(drivers, candidates)
+    fares = np.asarray(avg_fares, dtype=np.float64)
+    return fares[None, :] - dist * cost_per_km, dist
+
+
+def top_k(scores, k):
+    """Column indices of the k best scores per row, best first."""
+    import numpy as np
+    scores = np.atleast_2d(scores)
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+def candidate_arrays(items):
+    """Coordinates and expected fares from dicts with lat/lng/fare_min/fare_max (and optional demand)."""
+    import numpy as np
+    coords = np.array([(i['lat'], i['lng']) for i in items], dtype=np.float64).reshape(-1, 2)
+    fares = np.array([expected_fare(i) for i in items], dtype=np.float64)
+    return coords, fares
+
+
+def rank(drivers, items, k=None, cost_per_km=FUEL_COST_PER_KM):
+    """Per driver: ``[(item_index, score, distance_km), ...]`` best first."""
+    import numpy as np
+    coords, fares = candidate_arrays(items)
+    scores, dist = score_matrix(drivers, coords, fares, cost_per_km)
+    idx = top_k(scores, len(items) if k is None else k)
+    rows = np.arange(scores.shape[0])[:, None]
+    best_scores = scores[rows, idx]
+    best_dist = dist[rows, idx]
+    return [list(zip(idx[r].tolist(), best_scores[r].tolist(), best_dist[r].tolist())) for r in range(len(idx))]
+
@@ -0,0 +1,293 @@
+"""Append-only columnar store of fetched flight lists, for backtesting.
+
+Layout, one partition per airport and day::
+
+    <root>/<AIRPORT>/<YYYY-MM-DD>/
+        strings.jsonl      dictionary: one JSON string per line, id = line number
+        flight.i4 airline.i4 origin.i4 origin_iata.i4 terminal.i4 status.i4
+                           int32 string ids (-1 = missing)
+        scheduled.i2 actual.i2
+                           int16 minute of day (-1 = missing)
+        batches.i8         (fetched_at epoch seconds, row count) per snapshot
+
+Columns are plain little-endian arrays, so the reader maps them with
+``np.memmap`` and scans months of data without parsing. ``batches.i8`` is
+written last and is the commit marker: rows past its total are ignored.
+
+Several processes (gunicorn workers, instances on a shared volume) may
+write the same partition. Every append holds an exclusive ``flock`` on the
+partition's ``.lock`` file, re-reads the strings other writers appended, and
+truncates columns back to the committed row count before writing, so ids
+never clash and rows of two writers never interleave.
+
+``SnapshotRecorder`` does the writing on a background thread behind a
+bounded queue; the request path only does a ``put_nowait``.
+
+The writer takes the ingest dicts or ``advisor.core.Flight`` records. The
+reader hands back records (``records()``, minutes straight from the int16
+columns) or, at the JSON boundary, the app's dicts (``snapshots()``).
+"""
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from advisor.core import Flight
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writer process per store
+    fcntl = None
+
+STRING_COLUMNS = ("flight", "airline", "origin", "origin_iata", "terminal", "status")
+MINUTE_COLUMNS = ("scheduled", "actual")
+FLIGHT_FIELDS = {
+    "flight": "flight_number", "airline": "airline", "origin": "origin", "origin_iata": "origin_iata",
+    "terminal": "terminal", "status": "status", "scheduled": "arrival_time", "actual": "actual_time",
+}
+RECORD_ATTRS = {
+    "flight": "flight_number", "airline": "airline", "origin": "origin", "origin_iata": "origin_iata",
+    "terminal": "terminal", "status": "status", "scheduled": "arrival", "actual": "actual",
+}
+QUEUE_SIZE = 64
+
+
+def _minute(hhmm):
+    try:
+        h, m = map(int, hhmm[-5:].split(':'))
+        return h * 60 + m
+    except (TypeError, ValueError, AttributeError):
+        return -1
+
+
+def _native(arr):
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def _column_file(name):
+    return f"{name}.i4" if name in STRING_COLUMNS else f"{name}.i2"
+
+
+class _Partition:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.strings = {}
+        self._lines = 0  # lines of strings.jsonl loaded = next string id
+        self._read = 0   # bytes of strings.jsonl loaded
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.path, ".lock"), "a") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _load_strings(self):
+        """Pick up strings appended since the last read, by this or another writer."""
+        path = os.path.join(self.path, "strings.jsonl")
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as fh:
+            fh.seek(self._read)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break  # cut off by a crashed writer
+                self.strings.setdefault(json.loads(line), self._lines)
+                self._lines += 1
+                self._read += len(line)
+
+    def _rollback(self):
+        """Drop rows (and a torn batch record) a crashed writer left past the commit marker."""
+        batches_path = os.path.join(self.path, "batches.i8")
+        size = os.path.getsize(batches_path) if os.path.exists(batches_path) else 0
+        if size % 16:
+            os.truncate(batches_path, size - size % 16)
+        rows = 0
+        if size >= 16:
+            with open(batches_path, "rb") as fh:
+                counts = _native(array("q", fh.read(size - size % 16)))
+            rows = sum(counts[1::2])
+        for name in STRING_COLUMNS + MINUTE_COLUMNS:
+            path = os.path.join(self.path, _column_file(name))
+            committed = rows * (4 if name in STRING_COLUMNS else 2)
+            if os.path.exists(path) and os.path.getsize(path) > committed:
+                os.truncate(path, committed)
+
+    def intern(self, value, new_strings):
+        if value is None:
+            return -1
+        value = str(value)
+        sid = self.strings.get(value)
+        if sid is None:
+            sid = self.strings[value] = self._lines
+            self._lines += 1
+            new_strings.append(value)
+        return sid
+
+    def append(self, flights, fetched_at):
+        with self._locked():
+            self._load_strings()
+            self._rollback()
+            new_strings = []
+            columns = {name: array("i") for name in STRING_COLUMNS}
+            columns.update({name: array("h") for name in MINUTE_COLUMNS})
+            for f in flights:
+                if isinstance(f, dict):
+                    for name in STRING_COLUMNS:
+                        columns[name].append(self.intern(f.get(FLIGHT_FIELDS[name]), new_strings))
+                    for name in MINUTE_COLUMNS:
+                        columns[name].append(_minute(f.get(FLIGHT_FIELDS[name])))
+                else:  # Flight: minutes are already ints
+                    for name in STRING_COLUMNS:
+                        columns[name].append(self.intern(getattr(f, RECORD_ATTRS[name]), new_strings))
+                    for name in MINUTE_COLUMNS:
+                        columns[name].append(getattr(f, RECORD_ATTRS[name]))
+            if new_strings:
+                data = "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in new_strings).encode("utf-8")
+                with open(os.path.join(self.path, "strings.jsonl"), "ab") as fh:
+                    fh.write(data)
+                self._read += len(data)
+            for name, arr in columns.items():
+                with open(os.path.join(self.path, _column_file(name)), "ab") as fh:
+                    fh.write(_native(arr).tobytes())
+            with open(os.path.join(self.path, "batches.i8"), "ab") as fh:
+                fh.write(_native(array("q", [int(fetched_at), len(flights)])).tobytes())
+
+
+class SnapshotWriter:
+    """Synchronous writer; ``SnapshotRecorder`` runs one of these on its own thread."""
+
+    def __init__(self, root):
+        self.root = root
+        self._partitions = {}
+
+    def write(self, airport, flights, fetched_at=None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        day = datetime.fromtimestamp(fetched_at).strftime("%Y-%m-%d")
+        key = (airport, day)
+        part = self._partitions.get(key)
+        if part is None:
+            part = self._partitions[key] = _Partition(os.path.join(self.root, airport, day))
+        part.append(flights, fetched_at)
+
+
+class SnapshotRecorder:
+    def __init__(self, root, queue_size=QUEUE_SIZE):
+        self.writer = SnapshotWriter(root)
+        self.queue = queue.Queue(queue_size)
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, airport, flights, fetched_at=None):
+        """Never blocks: when the writer is behind, the snapshot is dropped and counted."""
+        try:
+            self.queue.put_nowait((airport, list(flights), time.time() if fetched_at is None else fetched_at))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            try:
+                self.writer.write(*item)
+                self.written += 1
+            except OSError:
+                self.errors += 1
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self._thread.join()
+
+
+class SnapshotReader:
+    def __init__(self, root):
+        self.root = root
+
+    def airports(self):
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d))) if os.path.isdir(self.root) else []
+
+    def days(self, airport, start=None, end=None):
+        """Partition days (``YYYY-MM-DD`` strings) for ``airport`` within [start, end]."""
+        path = os.path.join(self.root, airport)
+        if not os.path.isdir(path):
+            return []
+        return [d for d in sorted(os.listdir(path)) if (start is None or d >= start) and (end is None or d <= end)]
+
+    def partition(self, airport, day):
+        """Memory-mapped columns for one partition: ``{"batches": (n, 2) int64, name: array, "strings": list}``."""
+        path = os.path.join(self.root, airport, day)
+        batches = self._map(os.path.join(path, "batches.i8"), "<i8").reshape(-1, 2)
+        rows = int(batches[:, 1].sum()) if len(batches) else 0
+        cols = {"batches": batches}
+        for name in STRING_COLUMNS:
+            cols[name] = self._map(os.path.join(path, f"{name}.i4"), "<i4")[:rows]
+        for name in MINUTE_COLUMNS:
+            cols[name] = self._map(os.path.join(path, f"{name}.i2"), "<i2")[:rows]
+        with open(os.path.join(path, "strings.jsonl"), encoding="utf-8") as fh:
+            cols["strings"] = [json.loads(line) for line in fh]
+        return cols
+
+    @staticmethod
+    def _map(path, dtype):
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        itemsize = np.dtype(dtype).itemsize
+        count = os.path.getsize(path) // itemsize
+        return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+    def scan(self, airport, start=None, end=None):
+        """Yield ``(day, columns)`` partitions in day order."""
+        for day in self.days(airport, start, end):
+            yield day, self.partition(airport, day)
+
+    def records(self, airport, start=None, end=None):
+        """Yield ``(fetched_at, flights)`` with flights as ``advisor.core.Flight`` records."""
+        for _, cols in self.scan(airport, start, end):
+            strings = cols["strings"] + [None]  # id -1 -> None
+            flight, airline, origin, iata, terminal, status = (cols[n].tolist() for n in STRING_COLUMNS)
+            scheduled, actual = cols["scheduled"].tolist(), cols["actual"].tolist()
+            offset = 0
+            for fetched_at, count in cols["batches"].tolist():
+                yield fetched_at, [Flight(strings[airline[i]] or 'Unknown', strings[flight[i]] or 'N/A', strings[origin[i]] or 'Unknown',
+                                          scheduled[i], strings[iata[i]], strings[terminal[i]], actual[i], strings[status[i]])
+                                   for i in range(offset, offset + count)]
+                offset += count
+
+    def snapshots(self, airport, start=None, end=None):
+        """Yield ``(fetched_at, flights)`` with flights rebuilt as the app's dicts."""
+        for _, cols in self.scan(airport, start, end):
+            strings = cols["strings"] + [None]  # id -1 -> None
+            clock = [f"{m // 60:02}:{m % 60:02}" for m in range(24 * 60)] + [None]
+            fields = [(FLIGHT_FIELDS[n], strings, cols[n].tolist()) for n in STRING_COLUMNS]
+            fields += [(FLIGHT_FIELDS[n], clock, cols[n].tolist()) for n in MINUTE_COLUMNS]
+            offset = 0
+            for fetched_at, count in cols["batches"].tolist():
+                yield fetched_at, [{field: table[values[i]] for field, table, values in fields} for i in range(offset, offset + count)]
+                offset += count
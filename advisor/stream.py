@@ -0,0 +1,132 @@
+"""Fan-out of flight alert changes to Server-Sent Events subscribers.
+
+One producer publishes alert diffs into a ``Broker``; each connected driver
+owns a bounded queue. A slow client never grows memory: when its queue is
+full the backlog is dropped and it gets a single ``resync`` event telling it
+to reload the snapshot. The broker keeps a short history so a reconnecting
+client (``Last-Event-ID``) only receives what it missed.
+"""
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 32
+HISTORY_SIZE = 256
+
+
+def alert_key(alert):
+    return f"{alert['flight']}|{alert['land_time']}"
+
+
+def diff_alerts(old, new):
+    """``{"added", "changed", "removed"}`` between two alert lists, or None if identical."""
+    old_by_key = {alert_key(a): a for a in old}
+    new_by_key = {alert_key(a): a for a in new}
+    added = [a for k, a in new_by_key.items() if k not in old_by_key]
+    changed = [a for k, a in new_by_key.items() if k in old_by_key and old_by_key[k] != a]
+    removed = [k for k in old_by_key if k not in new_by_key]
+    if not (added or changed or removed):
+        return None
+    return {"added": added, "changed": changed, "removed": removed}
+
+
+def format_sse(event_id, event, data):
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
+
+
+class Subscriber:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+
+    def get(self, timeout):
+        """Next formatted event, or None after ``timeout`` (time for a heartbeat)."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Broker:
+    def __init__(self, queue_size=QUEUE_SIZE, history_size=HISTORY_SIZE):
+        self.queue_size = queue_size
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._history = deque(maxlen=history_size)  # (id, formatted event)
+        self._subscribers = set()
+        self._snapshot = []
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def subscribe(self, last_event_id=None):
+        """Register a client; it starts with missed events (resume) or a full snapshot."""
+        sub = Subscriber(self.queue_size)
+        with self._lock:
+            missed = self._replay(last_event_id)
+            if missed is None:
+                sub.queue.put(format_sse(self._last_id, "snapshot", {"alerts": self._snapshot}))
+            else:
+                # Replay longer than the queue: fall back to a snapshot instead of overflowing
+                if len(missed) >= self.queue_size:
+                    missed = [format_sse(self._last_id, "snapshot", {"alerts": self._snapshot})]
+                for message in missed:
+                    sub.queue.put(message)
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def _replay(self, last_event_id):
+        try:
+            last = int(last_event_id)
+        except (TypeError, ValueError):
+            return None
+        if last == self._last_id:
+            return []
+        if not self._history or last < self._history[0][0] - 1 or last > self._last_id:
+            return None
+        return [message for event_id, message in self._history if event_id > last]
+
+    def publish_alerts(self, alerts):
+        """Diff ``alerts`` against the last snapshot and broadcast the change (if any)."""
+        with self._lock:
+            change = diff_alerts(self._snapshot, alerts)
+            self._snapshot = alerts
+        if change is not None:
+            self.publish("alerts", change)
+        return change
+
+    def publish(self, event, data):
+        with self._lock:
+            event_id = self._last_id = next(self._ids)
+            message = format_sse(event_id, event, data)
+            self._history.append((event_id, message))
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.queue.put_nowait(message)
+            except queue.Full:
+                self._resync(sub, event_id)
+        return event_id
+
+    def _resync(self, sub, event_id):
+        while True:
+            try:
+                sub.queue.get_nowait()
+                sub.dropped += 1
+            except queue.Empty:
+                break
+        sub.queue.put_nowait(format_sse(event_id, "resync", {"reason": "client too slow"}))
@@ -0,0 +1,143 @@
+"""Incrementally maintained timeline of flight exit windows.
+
+Exit times are kept as absolute minutes (minutes since ``EPOCH``), not
+"HH:MM" strings, so a 23:50 China arrival exiting at 01:05 sorts after a
+23:30 exit. Arrivals only carry a clock time; each one is anchored to the
+day that puts it closest to "now" (within +/- 12h).
+
+The timeline is a sorted list of ``(exit_minute, key)`` plus a dict of
+entries. A refresh only re-inserts flights that are new or whose record
+changed; range and "next N" queries are a bisect plus a slice.
+"""
+import bisect
+import threading
+from datetime import datetime, timedelta
+
+EPOCH = datetime(2000, 1, 1)
+DAY = 24 * 60
+CLOCK = tuple(f"{m // 60:02}:{m % 60:02}" for m in range(DAY))  # minute of day -> "HH:MM"
+
+
+def now_minute(now=None):
+    now = now or datetime.now()
+    return int((now - EPOCH).total_seconds() // 60)
+
+
+def unix_time(minute):
+    """Absolute minute -> Unix seconds (server local time, as in ``now_minute``)."""
+    return int((EPOCH + timedelta(minutes=minute)).timestamp())
+
+
+def clock_minutes(hhmm):
+    """'HH:MM' (or an ISO timestamp) -> minute of day."""
+    if 'T' in hhmm:
+        hhmm = hhmm.split('T')[-1][:5]
+    h, m = map(int, hhmm.split(':'))
+    if not (0 <= h < 24 and 0 <= m < 60):
+        raise ValueError(f"bad clock time {hhmm!r}")
+    return h * 60 + m
+
+
+def hhmm(minute):
+    """Minute (of the day or absolute) -> "HH:MM"; None when negative (unknown)."""
+    return None if minute < 0 else CLOCK[minute % DAY]
+
+
+def anchor(minute_of_day, now_abs):
+    """Absolute minute for a clock time, on the day closest to ``now_abs``."""
+    base = now_abs - now_abs % DAY + minute_of_day
+    delta = base - now_abs
+    if delta > DAY // 2:
+        base -= DAY
+    elif delta <= -DAY // 2:
+        base += DAY
+    return base
+
+
+def flight_key(flight):
+    """One key per flight per day: the same flight number on two dates is two flights."""
+    if isinstance(flight, dict):
+        return f"{flight.get('flight_number')}|{flight.get('origin')}|{flight.get('date') or ''}"
+    return flight.key
+
+
+class ExitTimeline:
+    def __init__(self):
+        self._order = []    # sorted (exit_minute, key)
+        self._entries = {}  # key -> (signature, exit_minute, alert)
+        self._last_flights = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, flights, build, now_abs, version=None):
+        """Sync with the upstream flight list.
+
+        ``build(flight, now_abs)`` returns ``(exit_minute, alert)`` or None when
+        the flight is not interesting. A different ``version`` (e.g. a reloaded
+        profile file) drops every entry, so all alerts are rebuilt. Returns
+        counts of what changed.
+        """
+        stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            if version != self._version:
+                self._order, self._entries, self._last_flights = [], {}, None
+                self._version = version
+            if flights is self._last_flights:
+                stats["unchanged"] = len(self._entries)
+                return stats
+            seen = set()
+            for f in flights:
+                key = flight_key(f)
+                seen.add(key)
+                # records (advisor.core.Flight) compare directly; dicts by their items
+                signature = tuple(sorted(f.items())) if isinstance(f, dict) else f
+                old = self._entries.get(key)
+                if old is not None and old[0] == signature:
+                    stats["unchanged"] += 1
+                    continue
+                built = build(f, now_abs)
+                if old is not None:
+                    self._remove(key, old[1])
+                if built is None:
+                    if old is not None:
+                        stats["removed"] += 1
+                    continue
+                exit_minute, alert = built
+                self._entries[key] = (signature, exit_minute, alert)
+                bisect.insort(self._order, (exit_minute, key))
+                stats["changed" if old is not None else "added"] += 1
+            for key in [k for k in self._entries if k not in seen]:
+                self._remove(key, self._entries[key][1])
+                stats["removed"] += 1
+            self._last_flights = flights
+        return stats
+
+    def _remove(self, key, exit_minute):
+        i = bisect.bisect_left(self._order, (exit_minute, key))
+        if i < len(self._order) and self._order[i] == (exit_minute, key):
+            del self._order[i]
+        self._entries.pop(key, None)
+
+    def _slice(self, lo, hi):
+        return [self._entries[key][2] for _, key in self._order[lo:hi]]
+
+    def alerts(self):
+        """Every alert in exit order."""
+        with self._lock:
+            return self._slice(0, len(self._order))
+
+    def between(self, start, end):
+        """Alerts exiting in ``[start, end)`` (absolute minutes)."""
+        with self._lock:
+            lo = bisect.bisect_left(self._order, (start,))
+            hi = bisect.bisect_left(self._order, (end,))
+            return self._slice(lo, hi)
+
+    def next(self, start, n):
+        """The next ``n`` alerts exiting at or after ``start``."""
+        with self._lock:
+            lo = bisect.bisect_left(self._order, (start,))
+            return self._slice(lo, lo + n)
@@ -0,0 +1,124 @@
+"""Concurrent upstream fetching over one pooled keep-alive session.
+
+Every upstream (AviationStack flights, traffic, news) is described by a
+``Source``. ``fetch_json`` runs one source with its own timeout and retries
+with jittered exponential backoff; ``gather`` runs many callables on a
+bounded thread pool and returns partial results when some of them fail.
+
+Tasks that fan out themselves (a dashboard section whose flights fetch pages
+through ``advisor.ingest``) must fan out to a different named pool than the
+one they run on; otherwise the inner tasks queue behind their own parents and
+the pool sits idle until the timeout.
+
+``requests`` (and certifi, urllib3...) is imported on the first real fetch,
+so demo-mode cold starts never load it.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from advisor.metrics import observe_upstream
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_WORKERS = 8
+
+_session = None
+_executors = {}  # pool name -> ThreadPoolExecutor
+_lock = threading.Lock()
+
+
+class Source:
+    def __init__(self, name, url, params=None, parse=None, timeout=5.0, retries=2, backoff=0.3):
+        self.name = name
+        self.url = url
+        self.params = params
+        self.parse = parse
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def __repr__(self):
+        return f"Source({self.name!r}, {self.url!r})"
+
+
+class UpstreamError(Exception):
+    pass
+
+
+def get_session():
+    """Shared keep-alive session; connections are reused across requests and threads."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_executor(pool="upstream"):
+    executor = _executors.get(pool)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                executor = _executors[pool] = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix=pool)
+    return executor
+
+
+def fetch_json(source, session=None, sleep=time.sleep):
+    """GET ``source.url`` and return ``source.parse(json)`` (or the raw JSON)."""
+    import requests
+    session = session or get_session()
+    params = source.params() if callable(source.params) else source.params
+    last_error = None
+    for attempt in range(source.retries + 1):
+        if attempt:
+            # Full jitter: spread retries from many instances instead of stampeding together
+            sleep(random.uniform(0, source.backoff * 2 ** (attempt - 1)))
+        start = time.perf_counter()
+        try:
+            response = session.get(source.url, params=params, timeout=source.timeout)
+            if response.status_code in RETRY_STATUS:
+                observe_upstream(source.name, f"http_{response.status_code}", time.perf_counter() - start)
+                last_error = UpstreamError(f"{source.name}: HTTP {response.status_code}")
+                continue
+            response.raise_for_status()
+            data = response.json()
+            observe_upstream(source.name, "ok", time.perf_counter() - start)
+            return source.parse(data) if source.parse else data
+        except (requests.ConnectionError, requests.Timeout) as e:
+            observe_upstream(source.name, "timeout" if isinstance(e, requests.Timeout) else "connection_error", time.perf_counter() - start)
+            last_error = UpstreamError(f"{source.name}: {e.__class__.__name__}")
+        except (requests.HTTPError, ValueError) as e:
+            observe_upstream(source.name, "error", time.perf_counter() - start)
+            raise UpstreamError(f"{source.name}: {e}") from e
+    raise last_error
+
+
+def gather(tasks, timeout=None, pool="upstream"):
+    """Run ``{name: callable}`` concurrently on the shared ``pool``.
+
+    Returns ``(results, errors)``: every name ends up in exactly one of them.
+    A task still running after ``timeout`` seconds is reported as an error.
+    """
+    executor = get_executor(pool)
+    futures = {executor.submit(fn): name for name, fn in tasks.items()}
+    done, pending = wait(futures, timeout=timeout)
+    results, errors = {}, {}
+    for future in done:
+        name = futures[future]
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = str(e) or e.__class__.__name__
+    for future in pending:
+        future.cancel()
+        errors[futures[future]] = "timeout"
+    return results, errors
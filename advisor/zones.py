@@ -0,0 +1,94 @@
+"""Origin -> zone matching for arriving flights.
+
+The resolver is built once per zone profile table: an exact-match dict
+covers hub names, common airport names and IATA codes, and a single compiled
+alternation regex is the substring fallback. Every answer is memoized per
+origin string, so a repeated origin costs one dict lookup.
+"""
+import re
+
+# Airport names / IATA codes as AviationStack reports them -> hub city in the zone profiles
+KNOWN_AIRPORTS = {
+    # Europe
+    "LHR": "London", "LGW": "London", "Heathrow": "London", "Gatwick": "London",
+    "FRA": "Frankfurt", "Frankfurt International Airport": "Frankfurt",
+    "CDG": "Paris", "Charles De Gaulle": "Paris",
+    "ZRH": "Zurich", "MUC": "Munich", "Franz Josef Strauss": "Munich",
+    "AMS": "Amsterdam", "Schiphol": "Amsterdam",
+    "HEL": "Helsinki", "Helsinki-vantaa": "Helsinki",
+    "CPH": "Copenhagen", "Kastrup": "Copenhagen",
+    # Middle East
+    "DXB": "Dubai", "DOH": "Doha", "Hamad International": "Doha",
+    "AUH": "Abu Dhabi", "IST": "Istanbul", "SAW": "Istanbul",
+    "TLV": "Tel Aviv", "Ben Gurion International": "Tel Aviv",
+    "RUH": "Riyadh", "King Khalid International": "Riyadh", "KWI": "Kuwait",
+    # Russia
+    "SVO": "Moscow", "DME": "Moscow", "VKO": "Moscow", "Sheremetyevo": "Moscow",
+    "Domodedovo": "Moscow", "Vnukovo": "Moscow",
+    "LED": "Saint Petersburg", "Pulkovo": "Saint Petersburg", "OVB": "Novosibirsk",
+    # East Asia
+    "HND": "Tokyo", "NRT": "Tokyo", "Haneda Airport": "Tokyo", "Narita International Airport": "Tokyo",
+    "KIX": "Osaka", "Kansai International": "Osaka",
+    "ICN": "Seoul", "GMP": "Seoul", "Incheon International Airport": "Seoul",
+    "TPE": "Taipei", "Taoyuan International Airport": "Taipei",
+    # China
+    "PVG": "Shanghai", "SHA": "Shanghai", "Pudong International": "Shanghai", "Hongqiao International": "Shanghai",
+    "PEK": "Beijing", "PKX": "Beijing", "Capital International": "Beijing", "Daxing": "Beijing",
+    "CAN": "Guangzhou", "Baiyun International": "Guangzhou",
+    "CTU": "Chengdu", "TFU": "Chengdu", "Shuangliu": "Chengdu", "Tianfu International": "Chengdu",
+    "KMG": "Kunming", "Changshui International": "Kunming",
+    # India
+    "DEL": "Delhi", "Indira Gandhi International": "Delhi",
+    "BOM": "Mumbai", "Chhatrapati Shivaji International": "Mumbai",
+    "CCU": "Kolkata", "Netaji Subhas Chandra Bose International": "Kolkata",
+    "BLR": "Bangalore", "Kempegowda International": "Bangalore",
+}
+
+MEMO_LIMIT = 10000
+
+
+class ZoneResolver:
+    """Resolve a flight origin to its profile zone (or None)."""
+
+    def __init__(self, profile, airports=KNOWN_AIRPORTS):
+        self._zone_order = {zone: i for i, zone in enumerate(profile)}
+        self._hub_zone = {}
+        for zone, data in profile.items():
+            for hub in data['hubs']:
+                self._hub_zone.setdefault(hub, zone)
+        self._exact = dict(self._hub_zone)
+        for name, hub in airports.items():
+            if hub in self._hub_zone:
+                self._exact[name] = self._hub_zone[hub]
+        # Longest hub first so "Saint Petersburg" wins over any shorter overlap
+        hubs = sorted(self._hub_zone, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(h) for h in hubs)) if hubs else None
+        self._memo = {}
+
+    def resolve(self, origin):
+        if not origin:
+            return None
+        try:
+            return self._memo[origin]
+        except KeyError:
+            pass
+        zone = self._exact.get(origin)
+        if zone is None:
+            zone = self._exact.get(origin.strip().upper())
+        if zone is None and self._pattern is not None:
+            zone = self._scan(origin)
+        if len(self._memo) >= MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[origin] = zone
+        return zone
+
+    __call__ = resolve
+
+    def _scan(self, origin):
+        # Same precedence as the old per-zone loop: first zone in profile order wins
+        best = None
+        for m in self._pattern.finditer(origin):
+            zone = self._hub_zone[m.group(0)]
+            if best is None or self._zone_order[zone] < self._zone_order[best]:
+                best = zone
+        return best
@@ -1,175 +1,233 @@
-from flask import Flask, render_template, jsonify, request
-from datetime import datetime, timedelta
-import random
-import requests
+from flask import Flask, Response, abort, render_template, jsonify, request, stream_with_context
+from datetime import datetime
 import os
 import sys
-from dotenv import load_dotenv
+import threading
+import time
 
-# Load environment variables from .env file (for local development)
-load_dotenv()
+# Load environment variables from .env file (for local development only:
+# VERCEL is set on every deployment, where the filesystem scan is wasted cold-start time)
+if not os.environ.get("VERCEL"):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # Vercel structure: this file is in api/ folder, templates/static are in root
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if base_dir not in sys.path: sys.path.insert(0, base_dir)
+
+from advisor.cache import TTLCache, make_backend
+from advisor.core import PROFILES, demo_flights
+from advisor.geo import StationIndex
+from advisor.ingest import FlightStore, ingest
+from advisor.metrics import PROFILER, REGISTRY, begin_request, end_request, stage
+from advisor.prefetch import Job, Prefetcher, QuotaBudget, adaptive_interval
+from advisor.payload import compact_flights, compress, content_etag, dumps
+from advisor.stream import HEARTBEAT_SECONDS, Broker
+from advisor.timeline import DAY, ExitTimeline, now_minute, unix_time
+from advisor.upstream import Source, UpstreamError, fetch_json, gather
+
 app = Flask(__name__, 
             template_folder=base_dir, 
             static_folder=os.path.join(base_dir, 'static'))
 
 application = app  # Alias for Vercel/WSGI compatibility
 
+def lazy(build):
+    """Build on first call (once, thread-safe), then reuse.
+
+    Serverless cold starts only pay for NumPy, the EV table etc. when a route needs them.
+    """
+    lock = threading.Lock()
+    built = []
+    def get():
+        if not built:
+            with lock:
+                if not built: built.append(build())
+        return built[0]
+    return get
+
 # ================= CONFIGURATION =================
 LINE_NOTIFY_TOKEN = os.environ.get("LINE_NOTIFY_TOKEN")
 AVIATION_STACK_API_KEY = os.environ.get("AVIATION_STACK_API_KEY")
 NOSTRA_API_KEY = os.environ.get("NOSTRA_API_KEY")
 FACEBOOK_ACCESS_TOKEN = os.environ.get("FACEBOOK_ACCESS_TOKEN")
+LONGDO_API_KEY = os.environ.get("LONGDO_API_KEY")
+TRAFFIC_API_URL = os.environ.get("TRAFFIC_API_URL")
+NEWS_API_URL = os.environ.get("NEWS_API_URL")
 USE_DEMO_DATA = os.environ.get("USE_DEMO_DATA", "True").lower() == "true"
 AIRPORT_CODE = os.environ.get("AIRPORT_CODE", "BKK")
+# Every airport ingested each refresh; ?airport= picks one of them, AIRPORT_CODE is the default
+AIRPORTS = list(dict.fromkeys(a.strip().upper() for a in os.environ.get("AIRPORTS", f"{AIRPORT_CODE},DMK").split(",") if a.strip()))
+if AIRPORT_CODE not in AIRPORTS: AIRPORTS.insert(0, AIRPORT_CODE)
+INGEST_MAX_PAGES = int(os.environ.get("INGEST_MAX_PAGES", 10))
+# City events shown to a driver: letting out within the next EVENT_WINDOW_MINUTES, within EVENT_RADIUS_KM
+EVENT_WINDOW_MINUTES = int(os.environ.get("EVENT_WINDOW_MINUTES", 180))
+EVENT_RADIUS_KM = float(os.environ.get("EVENT_RADIUS_KM", 30))
 # =================================================
 
 # ================= CACHING SYSTEM =================
-CACHE = {
-    "flights": {"data": None, "expires": None},
-    "traffic": {"data": None, "expires": None},
-    "news": {"data": None, "expires": None}
-}
 CACHE_DURATION_MINUTES = 10
-API_CALL_COUNT = {"flights": 0, "traffic": 0, "news": 0}
-
-def get_cached(key):
-    if CACHE[key]["data"] and CACHE[key]["expires"]:
-        if datetime.now() < CACHE[key]["expires"]:
-            return CACHE[key]["data"]
-    return None
-
-def set_cache(key, data):
-    CACHE[key]["data"] = data
-    CACHE[key]["expires"] = datetime.now() + timedelta(minutes=CACHE_DURATION_MINUTES)
-    API_CALL_COUNT[key] += 1
+CACHE_TTL = {"flights": CACHE_DURATION_MINUTES * 60, "traffic": 2 * 60, "news": 15 * 60}
+CACHE_STALE_SECONDS = int(os.environ.get("CACHE_STALE_SECONDS", 5 * 60))
+# CACHE_BACKEND=sqlite shares entries across instances/cold starts via a file in the temp dir
+CACHE = TTLCache(ttl=CACHE_DURATION_MINUTES * 60, stale_ttl=CACHE_STALE_SECONDS, backend=make_backend(maxsize=64))
+
+def get_or_fetch(key, fetch):
+    return CACHE.get_or_fetch(key, fetch, ttl=CACHE_TTL.get(key))
 # =================================================
 
-FLIGHT_PROFILE = {
-    "Europe": {
-        "hubs": ["London", "Frankfurt", "Paris", "Zurich", "Munich", "Amsterdam", "Helsinki", "Copenhagen"],
-        "exit_delay": 50,
-        "fare_range": "500-800",
-        "comment": "กระเป๋าเยอะ เข้าเมืองไกล (สุขุมวิท/สีลม)",
-        "icon": "💶",
-        "color": "#3B82F6"
-    },
-    "MiddleEast": {
-        "hubs": ["Dubai", "Doha", "Abu Dhabi", "Istanbul", "Tel Aviv", "Riyadh", "Kuwait"],
-        "exit_delay": 60,
-        "fare_range": "450-650",
-        "comment": "มาเป็นครอบครัวใหญ่ ทิปหนัก (โซนนานา)",
-        "icon": "🛢️",
-        "color": "#F59E0B"
-    },
-    "Russia": {
-        "hubs": ["Moscow", "Saint Petersburg", "Novosibirsk"],
-        "exit_delay": 55,
-        "fare_range": "500-1500",
-        "comment": "โอกาสเหมาไปพัทยา/หัวหินสูงมาก",
-        "icon": "🇷🇺",
-        "color": "#EF4444"
-    },
-    "EastAsia": {
-        "hubs": ["Tokyo", "Osaka", "Seoul", "Taipei"],
-        "exit_delay": 45,
-        "fare_range": "400-550",
-        "comment": "สุภาพ จ่ายตรง (แต่อาจจะใช้ App เรียกรถ)",
-        "icon": "🇯🇵",
-        "color": "#EC4899"
-    },
-    "China": {
-        "hubs": ["Shanghai", "Beijing", "Guangzhou", "Chengdu", "Kunming"],
-        "exit_delay": 75,
-        "fare_range": "350-500",
-        "comment": "ระวัง! รอนานตรวจวีซ่า (ไปโซนรัชดา)",
-        "icon": "🇨🇳",
-        "color": "#F97316"
-    },
-    "India": {
-        "hubs": ["Delhi", "Mumbai", "Kolkata", "Bangalore"],
-        "exit_delay": 70,
-        "fare_range": "350-500",
-        "comment": "ไปโซนประตูน้ำ/พาหุรัด",
-        "icon": "🇮🇳",
-        "color": "#22C55E"
-    }
+def parse_items(*keys):
+    def parse(data):
+        if isinstance(data, list): return data
+        for key in keys:
+            if isinstance(data.get(key), list): return data[key]
+        return []
+    return parse
+
+# ================= UPSTREAM SOURCES =================
+# Traffic/news feeds are opt-in: without a URL the endpoints keep returning empty lists
+UPSTREAMS = {
+    # paged per airport by advisor.ingest (arr_iata/limit/offset are added per request)
+    "flights": Source("flights", "http://api.aviationstack.com/v1/flights",
+                      params=lambda: {'access_key': AVIATION_STACK_API_KEY}, timeout=10, retries=1),
+    "traffic": Source("traffic", TRAFFIC_API_URL, params={"key": LONGDO_API_KEY} if LONGDO_API_KEY else None,
+                      parse=parse_items("incidents", "data", "events"), timeout=5) if TRAFFIC_API_URL else None,
+    "news": Source("news", NEWS_API_URL, parse=parse_items("news", "data", "articles"), timeout=5) if NEWS_API_URL else None,
 }
+UPSTREAM_TIMEOUT = 12
+
+# Opt-in history for backtesting: every real AviationStack result is appended to SNAPSHOT_DIR
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR")
+SNAPSHOTS = None
+if SNAPSHOT_DIR:
+    from advisor.snapshots import SnapshotRecorder
+    SNAPSHOTS = SnapshotRecorder(SNAPSHOT_DIR)
+
+def fetch_flights():
+    """Every page of every airport in AIRPORTS (see advisor.ingest); raises when no airport answered."""
+    result = ingest(UPSTREAMS["flights"], AIRPORTS, max_pages=INGEST_MAX_PAGES, timeout=UPSTREAM_TIMEOUT)
+    if not result["flights"]: raise UpstreamError(f"flights: {result['errors']}")
+    if SNAPSHOTS is not None:
+        for airport in result["complete"]: SNAPSHOTS.record(airport, result["flights"][airport])
+    return result
 
-def get_flight_data_demo():
-    airlines = ["Emirates", "Qatar Airways", "Thai Airways", "China Eastern", "Lufthansa", "EVA Air", "Spring Airlines", "IndiGo", "ANA", "Korean Air"]
-    origins = ["London", "Dubai", "Frankfurt", "Tokyo", "Shanghai", "Singapore", "Mumbai", "Beijing", "Seoul", "Moscow"]
-    mock_flights = []
-    base_hour = datetime.now().hour
-    for i in range(random.randint(12, 20)):
-        hour = (base_hour + random.randint(0, 2)) % 24
-        minute = random.randint(0, 59)
-        flight = {
-            "airline": random.choice(airlines),
-            "flight_number": f"{random.choice(['TG', 'EK', 'QR', 'LH', '9C', '6E', 'NH', 'KE'])}{random.randint(100, 999)}",
-            "origin": random.choice(origins),
-            "arrival_time": f"{hour:02}:{minute:02}"
-        }
-        mock_flights.append(flight)
-    return mock_flights
-
-def get_flight_data_real():
-    cached = get_cached("flights")
-    if cached: return cached
+def upstream_fetcher(name):
+    if name == "flights": return fetch_flights
+    source = UPSTREAMS[name]
+    return lambda: fetch_json(source)
+
+def fetch_source(name):
+    """Cached, single-flight fetch of one upstream; None when not configured or no data.
+
+    With prefetching on, requests only read the cache and never wait on the upstream,
+    except on a cold cache in cron mode: no thread will fill it before the next cron
+    tick, so one request does a budget-charged refresh the others wait on.
+    """
+    if UPSTREAMS.get(name) is None: return None
+    scheduler = prefetcher()
+    if scheduler is not None and name in scheduler.jobs:
+        value = CACHE.peek(name)
+        if value is None:
+            if PREFETCH_MODE == "thread": scheduler.wake()
+            else: value = scheduler.fill(name)
+        return value
+    return get_or_fetch(name, upstream_fetcher(name))
+
+# ================= PREFETCH =================
+# PREFETCH=thread: a background thread refreshes caches before they expire (gunicorn etc.)
+# PREFETCH=cron: Vercel cron calls /api/cron/prefetch; requests read the cache (one fill when it is cold)
+# The AviationStack quota count is only shared by processes that open the same QUOTA_PATH file;
+# the temp-dir default is per instance on Vercel, so cron mode there needs QUOTA_PATH on shared storage
+PREFETCH_MODE = os.environ.get("PREFETCH", "").lower()
+AVIATIONSTACK_MONTHLY_QUOTA = int(os.environ.get("AVIATIONSTACK_MONTHLY_QUOTA", 10000))
+
+@lazy
+def prefetcher():
+    if PREFETCH_MODE not in ("thread", "cron"): return None
+    jobs = []
+    if not USE_DEMO_DATA:
+        if PREFETCH_MODE == "cron" and not os.environ.get("QUOTA_PATH"):
+            app.logger.warning("PREFETCH=cron without QUOTA_PATH: the quota count is per instance, not shared")
+        budget = QuotaBudget(AVIATIONSTACK_MONTHLY_QUOTA, path=os.environ.get("QUOTA_PATH"))
+        # one refresh = one call per page; charge (and space refreshes by) what the last one took
+        cost = lambda: max(FLIGHT_INGEST_CALLS[0], len(AIRPORTS))
+        jobs.append(Job("flights", upstream_fetcher("flights"), lambda now: budget.interval(now) * cost(), budget=budget, cost=cost))
+    for name in ("traffic", "news"):
+        if UPSTREAMS.get(name) is not None:
+            jobs.append(Job(name, upstream_fetcher(name), adaptive_interval(CACHE_TTL[name]), lead=30))
+    scheduler = Prefetcher(CACHE, jobs)
+    if PREFETCH_MODE == "thread": scheduler.start()
+    return scheduler
+# =================================================
+
+# Ingested flights per airport; a refresh only replaces records whose status or times changed
+FLIGHT_STORE = FlightStore()
+FLIGHT_INGEST_CALLS = [0]
+FLIGHT_FEED_DOWN = set()  # airports the last flight fetch brought no data for
+
+def get_flight_data_real(airport):
+    # Single-flight: concurrent misses share one ingestion pass, stale data is served while refreshing
     try:
-        url = "http://api.aviationstack.com/v1/flights"
-        params = {'access_key': AVIATION_STACK_API_KEY, 'arr_iata': AIRPORT_CODE, 'flight_status': 'active', 'limit': 20}
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        if 'error' in data: return get_flight_data_demo()
-        real_flights = []
-        if 'data' in data:
-            for f in data['data']:
-                try:
-                    flight = {
-                        "airline": f['airline']['name'] if f.get('airline') else 'Unknown',
-                        "flight_number": f['flight']['iata'] if f.get('flight') else 'N/A',
-                        "origin": f['departure']['airport'] if f.get('departure') else 'Unknown',
-                        "arrival_time": datetime.strptime(f['arrival']['scheduled'], "%Y-%m-%dT%H:%M:%S+00:00").strftime("%H:%M") if f.get('arrival') and f['arrival'].get('scheduled') else "00:00"
-                    }
-                    real_flights.append(flight)
-                except: continue
-        if real_flights:
-            set_cache("flights", real_flights)
-            return real_flights
-        return get_flight_data_demo()
-    except: return get_flight_data_demo()
-
-def analyze_flights():
-    flights = get_flight_data_demo() if USE_DEMO_DATA else get_flight_data_real()
-    if not flights: flights = get_flight_data_demo()
-    smart_alerts = []
-    for f in flights:
-        origin = f['origin']
-        arrival_time_str = f['arrival_time']
-        profile = None
-        for zone, data in FLIGHT_PROFILE.items():
-            if any(hub in origin for hub in data['hubs']):
-                profile = data
-                matched_zone = zone
-                break
-        if profile:
-            try:
-                h, m = map(int, arrival_time_str.split(':'))
-                total_mins = h * 60 + m + profile['exit_delay']
-                exit_time_str = f"{(total_mins // 60) % 24:02}:{total_mins % 60:02}"
-                fare_parts = profile['fare_range'].split('-')
-                smart_alerts.append({
-                    "airline": f['airline'], "flight": f['flight_number'], "origin": origin,
-                    "land_time": arrival_time_str, "exit_time": exit_time_str,
-                    "fare_range": profile['fare_range'], "fare_min": int(fare_parts[0]), "fare_max": int(fare_parts[1]),
-                    "note": profile['comment'], "zone": matched_zone, "icon": profile['icon'], "color": profile['color']
-                })
-            except: pass
-    smart_alerts.sort(key=lambda x: x['exit_time'])
-    return smart_alerts, len(flights)
+        result = fetch_source("flights")
+    except Exception:
+        result = None
+    if result:
+        FLIGHT_STORE.sync(result)
+        FLIGHT_INGEST_CALLS[0] = result["calls"]
+    if result and airport in result["flights"]: FLIGHT_FEED_DOWN.discard(airport)
+    else: FLIGHT_FEED_DOWN.add(airport)
+    return FLIGHT_STORE.flights(airport)
+
+def get_flight_data(airport=None):
+    """Demo flights only with USE_DEMO_DATA; in production a cold or failed feed is an empty list, never made-up data."""
+    airport = airport or AIRPORT_CODE
+    return demo_flights() if USE_DEMO_DATA else get_flight_data_real(airport)
+
+def flight_feed_status(airport=None):
+    """None when flights are live; "stale" (last fetch failed, older flights shown) or "unavailable" (nothing to show)."""
+    airport = airport or AIRPORT_CODE
+    if USE_DEMO_DATA or airport not in FLIGHT_FEED_DOWN: return None
+    return "stale" if FLIGHT_STORE.flights(airport) else "unavailable"
+
+def requested_airport():
+    """?airport= (one of AIRPORTS), AIRPORT_CODE when absent; 400 otherwise."""
+    airport = (request.args.get('airport') or AIRPORT_CODE).upper()
+    if airport not in AIRPORTS:
+        response = jsonify({"error": f"unknown airport {airport!r}", "airports": AIRPORTS})
+        response.status_code = 400
+        abort(response)
+    return airport
+
+# Exit windows per airport, kept sorted by absolute exit minute (correct across midnight);
+# a refresh only re-inserts new or changed flights
+TIMELINES = {airport: ExitTimeline() for airport in AIRPORTS}
+EXIT_GRACE_MINUTES = 15  # passengers are still coming out this long after the predicted exit
+
+def analyze_flights(flights=None, now=None, airport=None):
+    """Alerts exiting from ``now - EXIT_GRACE_MINUTES`` on, in exit order, and the flight count."""
+    timeline = TIMELINES[airport or AIRPORT_CODE]
+    if flights is None:
+        with stage("flights"): flights = get_flight_data(airport)
+    profiles = PROFILES.current()
+    now_abs = now_minute(now)
+    # a reloaded profile file is a new snapshot: the timeline rebuilds every alert once
+    with stage("analyze"): timeline.update(flights, profiles.build_alert, now_abs, version=profiles)
+    return timeline.between(now_abs - EXIT_GRACE_MINUTES, now_abs + DAY), len(flights)
+
+@app.route('/api/exits')
+def get_exits():
+    """Upcoming exit windows: ?within=30 (minutes from now) or ?next=5; ?airport=DMK."""
+    airport = requested_airport()
+    analyze_flights(airport=airport)
+    timeline = TIMELINES[airport]
+    now_abs = now_minute()
+    n = request.args.get('next', type=int)
+    if n is not None:
+        alerts = timeline.next(now_abs, max(0, min(n, 200)))
+    else:
+        alerts = timeline.between(now_abs, now_abs + request.args.get('within', 30, type=int) + 1)
+    return jsonify({"alerts": alerts, "count": len(alerts), "current_time": datetime.now().strftime("%H:%M"), "airport": airport,
+                    "flight_feed": flight_feed_status(airport)})
 
 @app.route('/debug')
 def debug_paths():
@@ -182,54 +240,348 @@ def debug_paths():
         "files": files,
         "template_folder": app.template_folder,
         "static_folder": app.static_folder,
-        "index_exists": os.path.exists(os.path.join(base_dir, 'index.html'))
+        "index_exists": os.path.exists(os.path.join(base_dir, 'index.html')),
+        "cache": CACHE.stats,
+        "flights": {airport: len(FLIGHT_STORE.flights(airport)) for airport in AIRPORTS},
+        "prefetch": prefetcher().status() if prefetcher() else None,
+        "profiles": PROFILES.status(),
+        "snapshots": {"written": SNAPSHOTS.written, "dropped": SNAPSHOTS.dropped, "errors": SNAPSHOTS.errors} if SNAPSHOTS else None
     })
 
 @app.route('/')
 def index():
-    return render_template('index.html', airport=AIRPORT_CODE)
+    return render_template('index.html', airport=AIRPORT_CODE, stream_enabled=STREAM_ENABLED)
+
+def polled_json(payload):
+    """JSON for polled endpoints: weak ETag on the content (304 when unchanged) and br/gzip bodies."""
+    with stage("serialize"):
+        etag = content_etag(payload)
+        if request.if_none_match.contains_weak(etag):
+            body = None
+        else:
+            body, encoding = compress(dumps(payload).encode(), request.headers.get('Accept-Encoding'))
+    if body is None:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='application/json')
+        if encoding: response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'  # browser revalidates every poll with If-None-Match
+    response.vary.add('Accept-Encoding')
+    return response
+
+def get_city_alerts(driver_lat, driver_lng, within=None, radius_km=None, now=None):
+    """Events letting out in the next ``within`` minutes (within ``radius_km`` of the driver), best score first.
+
+    Each carries ``end_at`` (Unix seconds) and the client counts down to it; a
+    server-side "minutes left" would change the content ETag every minute.
+    """
+    located = bool(driver_lat and driver_lng)
+    now_abs = now_minute(now)
+    radar = PROFILES.current().event_index  # shared read-only snapshot; each response gets its own copies
+    found = radar.radar(now_abs, EVENT_WINDOW_MINUTES if within is None else within,
+                        driver_lat if located else None, driver_lng if located else None,
+                        EVENT_RADIUS_KM if radius_km is None else radius_km)
+    city_alerts = []
+    for score, end_abs, dist, event in found:
+        city_alerts.append(dict(event, distance=f"{dist:.1f} km" if located else None, score=score, end_at=unix_time(end_abs),
+                                note=f"ห่าง {dist:.1f} กม." if located else "ไม่ทราบพิกัด"))
+    return city_alerts
+
+@app.route('/api/events')
+def get_events():
+    """City events letting out in the next ?within= minutes, within ?radius= km of ?lat=&lng= (defaults: EVENT_WINDOW_MINUTES, EVENT_RADIUS_KM)."""
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    within = max(0, min(request.args.get('within', EVENT_WINDOW_MINUTES, type=int), 7 * 24 * 60))
+    radius = max(0.0, request.args.get('radius', EVENT_RADIUS_KM, type=float))
+    events = get_city_alerts(lat, lng, within, radius)
+    return jsonify({"events": events, "count": len(events), "current_time": datetime.now().strftime("%H:%M")})
 
 @app.route('/api/flights')
 def get_flights():
-    alerts, total = analyze_flights()
+    airport = requested_airport()
+    alerts, total = analyze_flights(airport=airport)
     driver_lat = request.args.get('lat', type=float)
     driver_lng = request.args.get('lng', type=float)
-    
-    EVENT_LOCATIONS = [
-        {"name": "Impact Arena", "event": "HEAVEN SKATEBOARD", "end_time": "22:00", "people": "20,000", "fare_range": "300-500", "fare_min": 300, "fare_max": 500, "icon": "🎸", "lat": 13.911, "lng": 100.550},
-        {"name": "BITEC Bangna", "event": "Motor Show 2026", "end_time": "21:00", "people": "50,000", "fare_range": "200-400", "fare_min": 200, "fare_max": 400, "icon": "🚗", "lat": 13.669, "lng": 100.610},
-        {"name": "Rajamangala Stadium", "event": "Coldplay World Tour", "end_time": "23:00", "people": "60,000", "fare_range": "400-800", "fare_min": 400, "fare_max": 800, "icon": "🏟️", "lat": 13.755, "lng": 100.622}
-    ]
-    
-    city_alerts = []
-    for event in EVENT_LOCATIONS:
-        if driver_lat and driver_lng:
-            import math
-            R = 6371
-            dlat, dlon = math.radians(event['lat'] - driver_lat), math.radians(event['lng'] - driver_lng)
-            a = math.sin(dlat / 2)**2 + math.cos(math.radians(driver_lat)) * math.cos(math.radians(event['lat'])) * math.sin(dlon / 2)**2
-            dist = R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-            event['distance'], event['score'], event['note'] = f"{dist:.1f} km", ((event['fare_min'] + event['fare_max']) / 2) - (dist * 5), f"ห่าง {dist:.1f} กม."
-        else:
-            event['distance'], event['score'], event['note'] = None, 0, "ไม่ทราบพิกัด"
-        city_alerts.append(event)
-
-    if driver_lat: city_alerts.sort(key=lambda x: x['score'], reverse=True)
-    return jsonify({
+    with stage("scoring"): city_alerts = get_city_alerts(driver_lat, driver_lng)
+    payload = {
         "alerts": alerts, "city_alerts": city_alerts, "total_flights": total,
         "high_value_count": len(alerts) + len(city_alerts), "current_time": datetime.now().strftime("%H:%M"),
-        "airport": AIRPORT_CODE
-    })
+        "airport": airport, "flight_feed": flight_feed_status(airport)
+    }
+    if request.args.get('format') == 'compact': payload = compact_flights(payload)
+    return polled_json(payload)
+
+def get_source_items(name):
+    try:
+        return fetch_source(name) or []
+    except Exception:
+        return []
+
+def traffic_section():
+    incidents = get_source_items("traffic")
+    return {"incidents": incidents, "count": len(incidents), "source": "Longdo Traffic", "updated": datetime.now().strftime("%H:%M")}
+
+def news_section():
+    news = get_source_items("news")
+    return {"news": news, "count": len(news), "updated": datetime.now().strftime("%H:%M")}
 
 @app.route('/api/traffic')
 def get_traffic():
-    return jsonify({"incidents": [], "count": 0, "source": "Longdo Traffic", "updated": datetime.now().strftime("%H:%M")})
+    return jsonify(traffic_section())
 
 @app.route('/api/news')
 def get_news():
-    return jsonify({"news": [], "count": 0, "updated": datetime.now().strftime("%H:%M")})
+    return jsonify(news_section())
+
+# ================= DASHBOARD (one round trip) =================
+def flights_section(airport=None):
+    alerts, total = analyze_flights(airport=airport)
+    return {"alerts": alerts, "total_flights": total, "flight_feed": flight_feed_status(airport)}
+
+DASHBOARD_SECTIONS = {
+    "flights": lambda lat, lng, airport: flights_section(airport),
+    "events": lambda lat, lng, airport: {"city_alerts": get_city_alerts(lat, lng)},
+    "traffic": lambda lat, lng, airport: traffic_section(),
+    "news": lambda lat, lng, airport: news_section(),
+}
+
+@app.route('/api/dashboard')
+def get_dashboard():
+    """All dashboard sections in one response, built in parallel. ?sections=flights,traffic picks a subset."""
+    airport = requested_airport()
+    driver_lat = request.args.get('lat', type=float)
+    driver_lng = request.args.get('lng', type=float)
+    wanted = request.args.get('sections')
+    names = [n for n in wanted.split(',') if n in DASHBOARD_SECTIONS] if wanted else list(DASHBOARD_SECTIONS)
+    tasks = {n: (lambda fn=DASHBOARD_SECTIONS[n]: fn(driver_lat, driver_lng, airport)) for n in names}
+    sections, errors = gather(tasks, timeout=UPSTREAM_TIMEOUT)
+    payload = {n: sections[n] for n in names if n in sections}
+    if 'flights' in payload and request.args.get('format') == 'compact':
+        payload['flights'] = compact_flights(payload['flights'])
+    payload.update({"errors": errors, "current_time": datetime.now().strftime("%H:%M"), "airport": airport})
+    return polled_json(payload)
+
+# ================= LIVE STREAM (SSE) =================
+# One producer per process recomputes alerts only when the flight list changes
+# and pushes the diff to every connected driver.
+STREAM_INTERVAL_SECONDS = int(os.environ.get("STREAM_INTERVAL_SECONDS", 60))
+# Each SSE client holds a worker for as long as it is connected: the page only opens the stream
+# when the server can afford that (threaded/gevent gunicorn), not on Vercel functions or sync workers
+STREAM_ENABLED = os.environ.get("STREAM_ENABLED", "False").lower() == "true"
+BROKER = Broker()
+_producer = None
+_producer_lock = threading.Lock()
+
+def produce_alerts_once(last_hash=None):
+    alerts, _ = analyze_flights()
+    alerts_hash = content_etag(alerts)
+    if alerts_hash != last_hash:
+        BROKER.publish_alerts(alerts)
+    return alerts_hash
+
+def _produce_forever():
+    last_hash = None
+    while True:
+        try:
+            last_hash = produce_alerts_once(last_hash)
+        except Exception as e:
+            app.logger.warning("stream producer: %s", e)
+        time.sleep(STREAM_INTERVAL_SECONDS)
+
+def ensure_producer():
+    global _producer
+    if _producer is None:
+        with _producer_lock:
+            if _producer is None:
+                produce_alerts_once()
+                _producer = threading.Thread(target=_produce_forever, name="alert-producer", daemon=True)
+                _producer.start()
+
+@app.route('/api/stream')
+def stream_alerts():
+    """SSE: snapshot (or missed events after Last-Event-ID), then alert diffs and heartbeats."""
+    ensure_producer()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    sub = BROKER.subscribe(last_event_id)
+
+    def events():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                message = sub.get(timeout=HEARTBEAT_SECONDS)
+                yield message if message is not None else ": ping\n\n"
+        finally:
+            BROKER.unsubscribe(sub)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# ================= EV STATIONS =================
+@lazy
+def ev_index():
+    from ev_stations_data import EV_STATIONS_BANGKOK
+    return StationIndex(EV_STATIONS_BANGKOK)
+
+def ev_station_json(station, dist=None):
+    item = dict(station)
+    if dist is not None:
+        item['distance_km'] = round(dist, 2)
+        item['distance_str'] = f"{dist:.1f} กม."
+    return item
+
+def peak_price(station):
+    try:
+        return float(station['pricing']['peak'].split()[0])
+    except (KeyError, ValueError, IndexError):
+        return float('inf')
+
+def parse_bool(value):
+    if value is None: return None
+    return value.lower() in ('1', 'true', 'yes')
+
+@app.route('/api/ev')
+def get_ev():
+    """Nearest (k) or within-radius EV stations; filters: provider, charger (dc/ac/ccs/chademo/ultra), open_24h."""
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    filters = {
+        "provider": request.args.get('provider'),
+        "charger": request.args.get('charger'),
+        "open_24h": parse_bool(request.args.get('open_24h')),
+    }
+    if lat is None or lng is None:
+        stations = [ev_station_json(s) for s in ev_index().filter(**filters)]
+        return jsonify({"stations": stations, "count": len(stations), "has_location": False})
+    radius = request.args.get('radius_km', type=float)
+    if radius is not None:
+        found = ev_index().within(lat, lng, radius, **filters)
+    else:
+        found = ev_index().nearest(lat, lng, k=min(request.args.get('k', 5, type=int), 50), **filters)
+    stations = [ev_station_json(s, d) for d, s in found]
+    return jsonify({"stations": stations, "count": len(stations), "has_location": True})
+
+@app.route('/api/ev-stations')
+def get_ev_stations():
+    """Dashboard EV tab: 3 nearest and 3 cheapest of the 20 nearest."""
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    if lat is None or lng is None:
+        return jsonify({"has_location": False, "top_nearest": [], "top_cheapest": []})
+    nearby = ev_index().nearest(lat, lng, k=20)
+    cheapest = sorted(nearby, key=lambda x: (peak_price(x[1]), x[0]))[:3]
+    return jsonify({
+        "has_location": True,
+        "top_nearest": [ev_station_json(s, d) for d, s in nearby[:3]],
+        "top_cheapest": [ev_station_json(s, d) for d, s in cheapest],
+    })
+
+# ================= PASSENGER FLOW FORECAST =================
+FORECASTS = []  # [(profiles, {airport: FlowForecast})], rebuilt when the profile file is reloaded
+FORECASTS_LOCK = threading.Lock()
+
+def flow_forecasts():
+    from advisor.forecast import FlowForecast
+    profiles = PROFILES.current()
+    with FORECASTS_LOCK:
+        if not FORECASTS or FORECASTS[0][0] is not profiles:
+            FORECASTS[:] = [(profiles, {airport: FlowForecast(profiles.zones, profiles.resolver) for airport in AIRPORTS})]
+        return FORECASTS[0][1]
+
+@app.route('/api/forecast')
+def get_forecast():
+    """Expected passengers leaving per minute for the next ?hours=3, per terminal, with the 15-min peak."""
+    from advisor.forecast import peak_window
+    airport = requested_airport()
+    hours = min(max(request.args.get('hours', 3, type=float), 0.5), 12)
+    horizon = int(hours * 60)
+    now_abs = now_minute()
+    forecast = flow_forecasts()[airport]
+    forecast.update(get_flight_data(airport), now_abs)
+    curve = forecast.curve(now_abs, horizon)
+    offset, passengers = peak_window(curve["total"])
+    clock = lambda m: f"{(m // 60) % 24:02}:{m % 60:02}"
+    return jsonify({
+        "start": clock(now_abs), "minutes": horizon,
+        "total": [round(x, 1) for x in curve["total"].tolist()],
+        "terminals": {t: [round(x, 1) for x in c.tolist()] for t, c in curve["terminals"].items()},
+        "peak": {"start": clock(now_abs + offset), "end": clock(now_abs + offset + 15), "passengers": round(passengers)},
+        "airport": airport
+    })
+
+# ================= FLEET (batch, NDJSON) =================
+AIRPORT_COORDS = {"BKK": (13.690, 100.750), "DMK": (13.913, 100.604)}
+
+def fleet_opportunities(alerts, airport=None, now=None):
+    """Shared candidates for every driver: city events letting out soon plus the airport (if A+ flights are coming)."""
+    airport = airport or AIRPORT_CODE
+    found = PROFILES.current().event_index.radar(now_minute(now), EVENT_WINDOW_MINUTES)
+    opportunities = [dict(e, type="event") for _, _, _, e in found]
+    if alerts and airport in AIRPORT_COORDS:
+        lat, lng = AIRPORT_COORDS[airport]
+        opportunities.append({
+            "type": "airport", "name": f"สนามบิน {airport}", "lat": lat, "lng": lng,
+            "fare_min": sum(a['fare_min'] for a in alerts) / len(alerts),
+            "fare_max": sum(a['fare_max'] for a in alerts) / len(alerts),
+        })
+    return opportunities
+
+@app.route('/api/fleet/recommendations', methods=['POST'])
+def fleet_recommendations():
+    """NDJSON in ({"id","lat","lng"} per line), NDJSON out (ranked opportunities per driver), streamed."""
+    from advisor.fleet import rank_fleet, to_ndjson
+    k = min(request.args.get('k', 3, type=int), 20)
+    airport = requested_airport()
+    alerts, _ = analyze_flights(airport=airport)
+    opportunities = fleet_opportunities(alerts, airport)
+    results = rank_fleet(request.stream, opportunities, k=k)
+    return Response(stream_with_context(to_ndjson(results)), mimetype='application/x-ndjson')
+
+@app.route('/api/cron/prefetch')
+def cron_prefetch():
+    """Vercel cron target: refresh whatever is due. Requires 'Authorization: Bearer $CRON_SECRET' when set."""
+    secret = os.environ.get("CRON_SECRET")
+    if secret and request.headers.get('Authorization') != f"Bearer {secret}":
+        return jsonify({"error": "unauthorized"}), 401
+    scheduler = prefetcher()
+    if scheduler is None: return jsonify({"error": "prefetch disabled, set PREFETCH=cron"}), 404
+    return jsonify({"refreshed": scheduler.run_due(), "status": scheduler.status()})
+
+# ================= METRICS =================
+# Per-stage timings go out as Server-Timing on every response and as histograms on /metrics
+@app.before_request
+def start_timing():
+    begin_request()
+
+@app.after_request
+def add_server_timing(response):
+    timing = end_request(request.endpoint, response.status_code)
+    if timing: response.headers['Server-Timing'] = timing
+    return response
+
+@REGISTRY.collector
+def app_gauges():
+    stats = CACHE.stats
+    gauges = [(f"smart_taxi_cache_{k}", "gauge", f"Entries in the upstream cache ({k}).", stats[k]) for k in ("size", "inflight")]
+    gauges += [(f"smart_taxi_cache_{k}_total", "counter", f"Upstream cache {k}.", v)
+               for k, v in stats.items() if k not in ("size", "inflight") and isinstance(v, (int, float))]
+    gauges.append(("smart_taxi_stream_subscribers", "gauge", "Connected SSE clients.", BROKER.subscriber_count))
+    if SNAPSHOTS:
+        gauges.append(("smart_taxi_snapshots_dropped_total", "counter", "Flight snapshots dropped because the writer was behind.", SNAPSHOTS.dropped))
+    return gauges
+
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profile')
+def profile():
+    """Folded stacks from the sampling profiler (PROFILE_INTERVAL_MS); feed to flamegraph.pl or speedscope."""
+    if PROFILER is None: return jsonify({"error": "profiler disabled, set PROFILE_INTERVAL_MS"}), 404
+    return Response(PROFILER.folded(reset=request.args.get('reset') == '1'), mimetype='text/plain')
 
-# EV stations and AI agent routes can be added here if needed, 
+# AI agent routes can be added here if needed,
 # but let's keep it simple to fix the deployment first.
 
 if __name__ == '__main__':
@@ -0,0 +1,72 @@
+"""Cold start: fresh interpreter -> ``import api.index`` -> first /api/flights response.
+
+Each run is a new subprocess (what a serverless cold start pays). Reports
+the median wall time from spawn to exit, the import and first-request split
+measured inside the child, and the slowest imports from ``-X importtime``.
+The floor is a child that only imports Flask: the part of a cold start this
+app cannot trim, so "app share" is what the repo itself costs.
+
+Run: python benchmarks/bench_coldstart.py [runs] [path]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import time
+t0 = time.perf_counter()
+import api.index as web
+t1 = time.perf_counter()
+response = web.app.test_client().get({path!r})
+t2 = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(t1 - t0, t2 - t1)
+"""
+
+
+FLOOR = "import flask; print(0, 0)"
+
+
+def run_once(path, env, code=None):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code or CHILD.format(path=path)], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    imported, first = map(float, out.stdout.split())
+    return wall, imported, first
+
+
+def slowest_imports(env, top=12):
+    """Direct imports of api.index (and itself), by cumulative microseconds."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import api.index"], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    path = sys.argv[2] if len(sys.argv) > 2 else "/api/flights?lat=13.75&lng=100.55"
+    env = dict(os.environ, USE_DEMO_DATA="True", VERCEL="1")
+    run_once(path, env)  # make sure .pyc files exist, as they do in a deployed bundle
+    results = [run_once(path, env) for _ in range(runs)]
+    wall, imported, first = (statistics.median(col) for col in zip(*results))
+    floor = statistics.median(run_once(path, env, FLOOR)[0] for _ in range(runs))
+    print(f"{runs} cold starts of {path}")
+    print(f"  spawn -> first response  {wall * 1000:7.1f} ms (median)")
+    print(f"  import api.index         {imported * 1000:7.1f} ms")
+    print(f"  first request            {first * 1000:7.1f} ms")
+    print(f"  floor (python + flask)   {floor * 1000:7.1f} ms")
+    print(f"  app share                {(wall - floor) * 1000:7.1f} ms")
+    print("\nslowest imports (cumulative, -X importtime):")
+    for cumulative, name in slowest_imports(env):
+        print(f"  {cumulative / 1000:7.1f} ms  {name}")
@@ -0,0 +1,83 @@
+"""Flight records vs the old list-of-dicts pipeline, per 100k flights.
+
+"dicts" is what taxi_advisor.py did before advisor.core: every analysis
+re-splits the "HH:MM" strings and builds the alert from the profile on the
+spot. "records" is ``advisor.core``: ``Flight`` with ``__slots__`` and
+integer minutes, parsed once, analyzed by ``analyze``.
+
+Run: python benchmarks/bench_core.py [N]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic
+from advisor.core import PROFILES, Flight, analyze
+
+FLIGHT_PROFILE = PROFILES.current().zones
+ZONE_RESOLVER = PROFILES.current().resolver
+NOW = datetime(2026, 1, 17, 18, 0)
+
+
+def analyze_dicts(flights):
+    """The pre-core CLI loop, kept here as the baseline."""
+    alerts = []
+    for f in flights:
+        arrival = f['arrival_time']
+        if 'T' in arrival:
+            arrival = arrival.split('T')[-1][:5]
+        zone = ZONE_RESOLVER(f['origin']) or "Other"
+        profile = FLIGHT_PROFILE.get(zone)
+        if profile:
+            try:
+                h, m = map(int, arrival.split(':'))
+                total = h * 60 + m + profile['exit_delay']
+                alerts.append({"airline": f['airline'], "flight": f['flight_number'], "origin": f['origin'],
+                               "land_time": arrival, "exit_time": f"{(total // 60) % 24:02}:{total % 60:02}",
+                               "fare": profile['fare_range'], "note": profile['comment'], "zone": zone})
+            except Exception:
+                continue
+    alerts.sort(key=lambda x: x['exit_time'])
+    return alerts
+
+
+def measure(build):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    data = build()
+    elapsed = time.perf_counter() - t0
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return data, size, elapsed
+
+
+def best_of(fn, rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    raw = synthetic.flights(n)
+    dicts, dict_bytes, _ = measure(lambda: [dict(f) for f in raw])
+    records, record_bytes, _ = measure(lambda: [Flight.from_dict(f) for f in raw])
+    ZONE_RESOLVER(raw[0]['origin'])  # same warm memo for both sides
+    for f in raw:
+        ZONE_RESOLVER(f['origin'])
+    dict_s = best_of(lambda: analyze_dicts(dicts))
+    record_s = best_of(lambda: analyze(records, NOW))
+    parse_s = best_of(lambda: [Flight.from_dict(f) for f in raw], rounds=3)
+    per = 100_000 / n
+    print(f"{n} flights, figures per 100k:")
+    print(f"  memory   dicts {dict_bytes * per / 2**20:6.1f} MiB   records {record_bytes * per / 2**20:6.1f} MiB   ({record_bytes / dict_bytes:.0%})")
+    print(f"  analyze  dicts {dict_s * per * 1000:6.0f} ms    records {record_s * per * 1000:6.0f} ms    ({record_s / dict_s:.0%})")
+    print(f"  building the records once: {parse_s * per * 1000:.0f} ms")
@@ -0,0 +1,45 @@
+"""EV station queries: StationIndex vs haversine to every station, 5k synthetic national sites.
+
+Run: python benchmarks/bench_ev_index.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from advisor.geo import StationIndex, charger_tags, haversine_km
+from ev_stations_data import EV_STATIONS_BANGKOK
+
+
+def synthetic_stations(n, seed=42):
+    rng = random.Random(seed)
+    return [dict(rng.choice(EV_STATIONS_BANGKOK), lat=rng.uniform(5.6, 20.4), lng=rng.uniform(97.4, 105.6)) for _ in range(n)]
+
+
+def brute_nearest(stations, lat, lng, k):
+    ok = [s for s in stations if s["open_24h"] and "dc" in charger_tags(s["charger_types"])]
+    return sorted(ok, key=lambda s: haversine_km(lat, lng, s["lat"], s["lng"]))[:k]
+
+
+def timeit(label, fn, queries):
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    per = (time.perf_counter() - t0) / len(queries)
+    print(f"{label:<36} {per * 1e6:9.1f} µs/query")
+    return per
+
+
+if __name__ == "__main__":
+    stations = synthetic_stations(5000)
+    t0 = time.perf_counter()
+    index = StationIndex(stations)
+    print(f"index build: {(time.perf_counter() - t0) * 1000:.1f} ms for {len(stations)} stations")
+    rng = random.Random(1)
+    queries = [(rng.uniform(13.5, 14.0), rng.uniform(100.3, 100.9)) for _ in range(500)]
+    brute = timeit("brute force k=5 (dc, open_24h)", lambda a, b: brute_nearest(stations, a, b, 5), queries)
+    indexed = timeit("index k=5 (dc, open_24h)", lambda a, b: index.nearest(a, b, 5, charger="dc", open_24h=True), queries)
+    timeit("index radius 10 km", lambda a, b: index.within(a, b, 10), queries)
+    print(f"speedup k-nearest: {brute / indexed:.0f}x")
@@ -0,0 +1,66 @@
+"""Event radar: EventIndex vs scanning the whole calendar, 20k synthetic events over 30 days.
+
+Query: events letting out in the next 60 minutes within 10 km of a driver.
+
+Run: python benchmarks/bench_events.py [N]
+"""
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic
+from advisor.events import LET_OUT_MINUTES, day_minute
+from advisor.geo import haversine_km
+from advisor.profiles import DEFAULT_PATH, Profiles
+from advisor.scoring import expected_fare
+from advisor.timeline import anchor, now_minute
+
+WITHIN, RADIUS_KM = 60, 10
+
+
+def scan(calendar, now_abs, lat, lng):
+    """A per-request loop over the calendar (dated end times precomputed, daily ones anchored)."""
+    found = []
+    for end, e in calendar:
+        end = anchor(e["end_minute"], now_abs) if end is None else end
+        if not now_abs - LET_OUT_MINUTES <= end <= now_abs + WITHIN:
+            continue
+        dist = haversine_km(lat, lng, e["lat"], e["lng"])
+        if dist <= RADIUS_KM:
+            found.append((expected_fare(e) - dist * 5, end, dist, e))
+    found.sort(key=lambda t: (-t[0], t[1]))
+    return found
+
+
+def timeit(label, fn, queries):
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    per = (time.perf_counter() - t0) / len(queries)
+    print(f"{label:<24} {per * 1e6:9.1f} µs/query")
+    return per
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with open(DEFAULT_PATH, encoding="utf-8") as fh:
+        data = dict(json.load(fh), events=synthetic.events(n))
+    t0 = time.perf_counter()
+    profiles = Profiles(data)
+    print(f"compile + index: {(time.perf_counter() - t0) * 1000:.0f} ms for {n} events")
+    index = profiles.event_index
+    rng = random.Random(1)
+    base = now_minute(datetime(2026, 1, 1))
+    queries = [(base + rng.randrange(30 * 24 * 60), *synthetic.drivers(1, seed=i)[0]) for i in range(200)]
+    calendar = [(day_minute(e["date"]) + e["end_minute"] if e.get("date") else None, e) for e in index.events]
+    for q in queries[:20]:
+        assert [t[3]["name"] for t in scan(calendar, *q)] == [t[3]["name"] for t in index.radar(q[0], WITHIN, q[1], q[2], RADIUS_KM)]
+    brute = timeit("scan the calendar", lambda t, a, b: scan(calendar, t, a, b), queries)
+    indexed = timeit("EventIndex.radar", lambda t, a, b: index.radar(t, WITHIN, a, b, RADIUS_KM), queries)
+    print(f"speedup: {brute / indexed:.0f}x")
@@ -0,0 +1,35 @@
+"""Bytes per /api/flights poll: full JSON vs compact vs compressed vs 304.
+
+Run: python benchmarks/bench_payload.py
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.index import app
+
+
+def poll(client, query="", headers=None, seed=7):
+    random.seed(seed)  # same demo flight list every poll
+    return client.get(f"/api/flights?lat=13.72&lng=100.78{query}", headers=headers or {})
+
+
+if __name__ == "__main__":
+    client = app.test_client()
+    baseline = poll(client)
+    etag = baseline.headers["ETag"]
+    cases = [
+        ("full JSON", "", {}),
+        ("full JSON + gzip", "", {"Accept-Encoding": "gzip"}),
+        ("compact", "&format=compact", {}),
+        ("compact + gzip", "&format=compact", {"Accept-Encoding": "gzip"}),
+        ("unchanged poll (304)", "", {"If-None-Match": etag}),
+    ]
+    print(f"{'case':<24} {'status':>6} {'bytes':>8} {'vs full':>8}")
+    full = len(baseline.data)
+    for label, query, headers in cases:
+        r = poll(client, query, headers)
+        size = len(r.data)
+        print(f"{label:<24} {r.status_code:>6} {size:>8} {size / full:>7.0%}")
@@ -0,0 +1,58 @@
+"""Event/venue scoring: per-pair math loop (old /api/flights code) vs advisor.scoring matrix.
+
+Run: python benchmarks/bench_scoring.py
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from advisor.scoring import rank
+
+
+def loop_rank(drivers, items, k):
+    out = []
+    for lat, lng in drivers:
+        scored = []
+        for i, item in enumerate(items):
+            dlat, dlon = math.radians(item['lat'] - lat), math.radians(item['lng'] - lng)
+            a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat)) * math.cos(math.radians(item['lat'])) * math.sin(dlon / 2) ** 2
+            dist = 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+            scored.append((i, (item['fare_min'] + item['fare_max']) / 2 - dist * 5, dist))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        out.append(scored[:k])
+    return out
+
+
+def synthetic(n_drivers, n_items, seed=42):
+    rng = random.Random(seed)
+    drivers = [(rng.uniform(13.5, 14.0), rng.uniform(100.3, 100.9)) for _ in range(n_drivers)]
+    items = []
+    for _ in range(n_items):
+        lo = rng.randrange(150, 600, 50)
+        items.append({"lat": rng.uniform(13.5, 14.0), "lng": rng.uniform(100.3, 100.9), "fare_min": lo, "fare_max": lo + rng.randrange(100, 700, 50)})
+    return drivers, items
+
+
+def best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+if __name__ == "__main__":
+    print(f"{'drivers x candidates':<22} {'loop':>10} {'numpy':>10} {'speedup':>8}")
+    for n_drivers, n_items in [(1, 3), (1, 1000), (100, 1000), (500, 2000)]:
+        drivers, items = synthetic(n_drivers, n_items)
+        a = loop_rank(drivers, items, 5)
+        b = rank(drivers, items, 5)
+        assert [[i for i, _, _ in row] for row in a] == [[i for i, _, _ in row] for row in b]
+        t_loop = best_of(lambda: loop_rank(drivers, items, 5))
+        t_np = best_of(lambda: rank(drivers, items, 5))
+        print(f"{n_drivers:>6} x {n_items:<13} {t_loop * 1000:>8.2f}ms {t_np * 1000:>8.2f}ms {t_loop / t_np:>7.1f}x")
@@ -0,0 +1,53 @@
+"""Snapshot store: write 90 synthetic days (one fetch every 10 min), then scan them.
+
+Run: python benchmarks/bench_snapshots.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from advisor.snapshots import SnapshotReader, SnapshotWriter
+
+ORIGINS = ["London", "Dubai", "Singapore", "Tokyo", "Seoul", "Doha", "Frankfurt", "Sydney", "Delhi", "Shanghai"]
+
+
+def synthetic_day(rng, n=20):
+    return [{"airline": "Thai", "flight_number": f"TG{rng.randint(100, 999)}", "origin": rng.choice(ORIGINS),
+             "arrival_time": f"{rng.randint(0, 23):02}:{rng.randint(0, 59):02}", "status": "active"} for _ in range(n)]
+
+
+if __name__ == "__main__":
+    days, per_day = 90, 144
+    rng = random.Random(42)
+    root = tempfile.mkdtemp(prefix="snapshots-")
+    writer = SnapshotWriter(root)
+    start = datetime(2026, 1, 1).timestamp()
+    t0 = time.perf_counter()
+    for i in range(days * per_day):
+        writer.write("BKK", synthetic_day(rng), start + i * 600)
+    write_s = time.perf_counter() - t0
+    rows = days * per_day * 20
+    size = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(root) for f in fs)
+    print(f"write: {rows} rows in {write_s:.2f} s ({write_s / (days * per_day) * 1e6:.0f} µs/snapshot), {size / rows:.1f} B/row on disk")
+
+    reader = SnapshotReader(root)
+    t0 = time.perf_counter()
+    late = 0
+    for _, cols in reader.scan("BKK"):
+        late += int(np.count_nonzero(cols["scheduled"] >= 17 * 60))
+    print(f"mmap column scan: {rows} rows in {(time.perf_counter() - t0) * 1000:.1f} ms ({late} evening arrivals)")
+
+    t0 = time.perf_counter()
+    n = sum(len(f) for _, f in reader.snapshots("BKK"))
+    print(f"rebuild flight dicts: {n} rows in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    t0 = time.perf_counter()
+    n = sum(len(f) for _, f in reader.records("BKK"))
+    print(f"rebuild Flight records: {n} rows in {(time.perf_counter() - t0) * 1000:.0f} ms")
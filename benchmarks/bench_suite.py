@@ -0,0 +1,157 @@
+"""Regression benchmarks (pytest-benchmark), all data seeded.
+
+The default ``pytest`` run only collects test_*.py, so this file runs on
+demand (``pip install pytest-benchmark``):
+
+    python -m pytest benchmarks/bench_suite.py --benchmark-save=baseline   # record a baseline
+    python -m pytest benchmarks/bench_suite.py --benchmark-compare=0001 --benchmark-compare-fail=min:20%
+
+``min`` is the steadier statistic on a shared machine; the mean of a noisy
+single-core VM moves by 30%+ between identical runs.
+
+Results are stored under benchmarks/results/<machine>/ (see conftest.py).
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic
+from advisor.cache import TTLCache
+from advisor.profiles import load
+from advisor.scoring import rank
+from advisor.timeline import ExitTimeline
+from advisor.zones import ZoneResolver
+
+import api.index as web
+
+FLIGHT_PROFILE = load().zones
+
+NOW = datetime(2026, 1, 17, 18, 0)
+
+
+@pytest.mark.parametrize("n", [20, 2000, 200000])
+def test_analyze_flights_cold(benchmark, monkeypatch, n):
+    flights = synthetic.records(n)
+
+    def setup():
+        monkeypatch.setitem(web.TIMELINES, web.AIRPORT_CODE, ExitTimeline())
+        return (flights, NOW), {}
+
+    rounds = 3 if n >= 200000 else 20
+    alerts, total = benchmark.pedantic(web.analyze_flights, setup=setup, rounds=rounds)
+    assert total == n and alerts
+
+
+@pytest.mark.parametrize("n", [20, 2000, 200000])
+def test_analyze_flights_refresh(benchmark, monkeypatch, n):
+    """A new list with the same flights: every record is compared, nothing rebuilt."""
+    flights = synthetic.records(n)
+    monkeypatch.setitem(web.TIMELINES, web.AIRPORT_CODE, ExitTimeline())
+    web.analyze_flights(flights, NOW)
+    benchmark.pedantic(web.analyze_flights, setup=lambda: ((list(flights), NOW), {}), rounds=3 if n >= 200000 else 20)
+
+
+def test_zone_matching_unmemoized(benchmark):
+    resolver = ZoneResolver(FLIGHT_PROFILE)
+    origins = synthetic.origins(10000)
+    benchmark.pedantic(lambda: [resolver(o) for o in origins], setup=resolver._memo.clear, rounds=20)
+
+
+def test_zone_matching_memoized(benchmark):
+    resolver = ZoneResolver(FLIGHT_PROFILE)
+    origins = synthetic.origins(10000)
+    benchmark(lambda: [resolver(o) for o in origins])
+
+
+def test_event_scoring_single_driver(benchmark):
+    benchmark(web.get_city_alerts, 13.75, 100.55)
+
+
+def test_event_scoring_fleet(benchmark):
+    drivers = synthetic.drivers(500)
+    items = web.PROFILES.current().events * 50
+    benchmark(rank, drivers, items, 3)
+
+
+def test_cache_hit(benchmark):
+    cache = TTLCache(ttl=600)
+    cache.set("flights", synthetic.flights(20))
+    benchmark(cache.get_or_fetch, "flights", lambda: None)
+
+
+def test_cache_miss(benchmark):
+    cache = TTLCache(maxsize=128, ttl=600)
+    data = synthetic.flights(20)
+    keys = iter(range(10 ** 9))
+    benchmark(lambda: cache.get_or_fetch(f"k{next(keys)}", lambda: data))
+
+
+@pytest.fixture
+def seeded_app(monkeypatch):
+    flights = synthetic.records(20)
+    monkeypatch.setattr(web, "get_flight_data", lambda airport=None: flights)
+    monkeypatch.setitem(web.TIMELINES, web.AIRPORT_CODE, ExitTimeline())
+    return web.app
+
+
+def test_api_flights_test_client(benchmark, seeded_app):
+    client = seeded_app.test_client()
+    response = benchmark(client.get, "/api/flights?lat=13.75&lng=100.55")
+    assert response.status_code == 200
+    if benchmark.stats:  # None under --benchmark-disable
+        benchmark.extra_info["rps"] = round(1 / benchmark.stats.stats.mean)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def gunicorn_url():
+    pytest.importorskip("gunicorn")
+    requests = pytest.importorskip("requests")
+    port = _free_port()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, USE_DEMO_DATA="True", DEMO_SEED="1")  # the same demo flights in every worker and run
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-w", "2", "--threads", "4", "-b", f"127.0.0.1:{port}", "api.index:app"],
+                            cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/api/flights?lat=13.75&lng=100.55"
+    try:
+        for _ in range(100):
+            try:
+                requests.get(url, timeout=1)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        else:
+            pytest.skip("gunicorn did not start")
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+def test_api_flights_gunicorn(benchmark, gunicorn_url):
+    import requests
+    session = requests.Session()
+    batch, clients = 200, 8
+
+    def run_batch():
+        with ThreadPoolExecutor(clients) as pool:
+            statuses = list(pool.map(lambda _: session.get(gunicorn_url).status_code, range(batch)))
+        assert set(statuses) == {200}
+
+    benchmark.pedantic(run_batch, rounds=5, warmup_rounds=1)
+    if benchmark.stats:
+        benchmark.extra_info["rps"] = round(batch / benchmark.stats.stats.mean)
@@ -0,0 +1,50 @@
+"""Zone matching: old per-flight hub scan vs ZoneResolver on 10k synthetic origins.
+
+Run: python benchmarks/bench_zones.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from advisor.profiles import load
+from advisor.zones import KNOWN_AIRPORTS, ZoneResolver
+
+FLIGHT_PROFILE = load().zones
+
+
+def legacy_zone(origin):
+    for zone, data in FLIGHT_PROFILE.items():
+        if any(hub in origin for hub in data['hubs']):
+            return zone
+    return None
+
+
+def synthetic_origins(n, seed=42):
+    rng = random.Random(seed)
+    hubs = [h for d in FLIGHT_PROFILE.values() for h in d['hubs']]
+    pool = hubs + [f"{h} International Airport" for h in hubs] + list(KNOWN_AIRPORTS)
+    pool += ["Singapore Changi", "Hong Kong International", "Kuala Lumpur International", "Sydney Kingsford Smith", "Phuket", "Chiang Mai"]
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def bench(label, fn, origins, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for o in origins:
+            fn(o)
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<28} {best * 1000:8.2f} ms  ({best / len(origins) * 1e6:.2f} µs/origin)")
+    return best
+
+
+if __name__ == "__main__":
+    origins = synthetic_origins(10000)
+    legacy = bench("legacy hub scan", legacy_zone, origins)
+    resolver = ZoneResolver(FLIGHT_PROFILE)
+    bench("resolver (no memo)", lambda o: resolver._exact.get(o) or resolver._scan(o), origins)
+    warm = bench("resolver (memoized)", resolver, origins)
+    print(f"speedup (memoized): {legacy / warm:.1f}x")
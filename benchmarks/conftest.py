@@ -0,0 +1,7 @@
+import os
+
+
+def pytest_configure(config):
+    # Keep saved runs next to the suite so a baseline can be committed and compared against
+    if hasattr(config.option, "benchmark_storage") and config.option.benchmark_storage == "file://./.benchmarks":
+        config.option.benchmark_storage = "file://" + os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
@@ -0,0 +1,63 @@
+"""Load test for /api/stream: N local SSE clients, measure broadcast fan-out latency.
+
+Run: python benchmarks/load_stream.py [clients]
+"""
+import http.client
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+
+import api.index as web
+
+
+def client(port, ready, received, stop):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", "/api/stream")
+    resp = conn.getresponse()
+    ready.release()
+    event = None
+    while not stop.is_set():
+        line = resp.fp.readline()
+        if not line:
+            break
+        if line.startswith(b"event: "):
+            event = line[7:].strip()
+        elif line.startswith(b"data: ") and event == b"alerts" and b"LOADTEST" in line:
+            received.append(time.perf_counter())
+            break
+    conn.close()
+
+
+def main(n):
+    web.STREAM_INTERVAL_SECONDS = 3600  # the load test publishes by hand
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, web.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ready, received, stop = threading.Semaphore(0), [], threading.Event()
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(server.port, ready, received, stop), daemon=True) for _ in range(n)]
+    for t in threads: t.start()
+    for _ in range(n): ready.acquire()
+    while web.BROKER.subscriber_count < n: time.sleep(0.01)
+    print(f"{n} clients subscribed in {time.perf_counter() - t0:.2f}s")
+
+    alert = {"flight": "LOADTEST1", "land_time": "23:50", "exit_time": "01:05", "airline": "Test", "origin": "London", "zone": "Europe"}
+    sent = time.perf_counter()
+    web.BROKER.publish_alerts(web.BROKER.snapshot + [alert])
+    for t in threads: t.join(timeout=30)
+    stop.set()
+    lat = sorted(r - sent for r in received)
+    print(f"delivered to {len(lat)}/{n} clients")
+    if lat:
+        print(f"fan-out latency p50={lat[len(lat) // 2] * 1000:.1f} ms  p99={lat[int(len(lat) * 0.99) - 1] * 1000:.1f} ms  max={lat[-1] * 1000:.1f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,57 @@
+"""Seeded data generators shared by the benchmark suite."""
+import random
+from datetime import date, timedelta
+
+from advisor.core import PROFILES, Flight
+from advisor.zones import KNOWN_AIRPORTS
+
+HUBS = [h for d in PROFILES.current().zones.values() for h in d['hubs']]
+OTHER_ORIGINS = ["Singapore Changi", "Hong Kong International", "Kuala Lumpur International", "Sydney Kingsford Smith", "Phuket", "Chiang Mai"]
+AIRLINES = ["Thai Airways", "Emirates", "Qatar Airways", "Lufthansa", "Singapore Airlines", "Air India", "ANA", "Korean Air"]
+
+
+def origins(n, seed=42):
+    rng = random.Random(seed)
+    pool = HUBS + [f"{h} International Airport" for h in HUBS] + list(KNOWN_AIRPORTS) + OTHER_ORIGINS
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def flights(n, seed=42):
+    """``n`` flights with unique flight numbers, shaped like ``advisor.ingest.parse_record`` output."""
+    rng = random.Random(seed)
+    pool = HUBS + OTHER_ORIGINS
+    return [{
+        "airline": rng.choice(AIRLINES),
+        "flight_number": f"{rng.choice(['TG', 'EK', 'QR', 'LH', 'SQ', 'AI', 'NH', 'KE'])}{i}",
+        "origin": rng.choice(pool),
+        "origin_iata": None,
+        "terminal": rng.choice([None, "1", "2"]),
+        "arrival_time": f"{rng.randrange(24):02}:{rng.randrange(60):02}",
+    } for i in range(n)]
+
+
+def records(n, seed=42):
+    """The same flights as ``advisor.core.Flight`` records, what the web app analyzes."""
+    return [Flight.from_dict(f) for f in flights(n, seed)]
+
+
+def drivers(n, seed=42):
+    rng = random.Random(seed)
+    return [(rng.uniform(13.6, 13.95), rng.uniform(100.4, 100.8)) for _ in range(n)]
+
+
+def events(n, days=30, start="2026-01-01", daily_share=0.05, seed=42):
+    """A city calendar shaped like the ``events`` of data/profiles.json: ``n`` events over ``days`` days
+    around Bangkok, ``daily_share`` of them recurring every day (no ``date``)."""
+    rng = random.Random(seed)
+    first = date.fromisoformat(start)
+    out = []
+    for i in range(n):
+        lo = rng.randrange(100, 600, 50)
+        e = {"name": f"Venue {i}", "event": f"Event {i}", "end_time": f"{rng.randrange(24):02}:{rng.randrange(0, 60, 15):02}",
+             "people": f"{rng.randrange(500, 60000, 500):,}", "fare_range": f"{lo}-{lo + rng.randrange(100, 500, 50)}",
+             "icon": "🎫", "lat": rng.uniform(13.5, 14.0), "lng": rng.uniform(100.3, 100.9)}
+        if rng.random() >= daily_share:
+            e["date"] = (first + timedelta(days=rng.randrange(days))).isoformat()
+        out.append(e)
+    return out
@@ -1,13 +1,24 @@
-import requests
 import json
-from datetime import datetime, timedelta
+import os
+import signal
+import threading
 import time
-import random
+from collections import Counter
+
+from advisor.core import Flight, analyze, demo_flights
+from advisor.ingest import parse_page
+from advisor.notify import Dispatcher, token_id
+from advisor.prefetch import adaptive_interval
+from advisor.upstream import get_session
 
 # ================= CONFIGURATION =================
 # ใส่ Line Notify Token ของคุณที่นี่ (สมัครได้ที่ notify-bot.line.me)
 LINE_NOTIFY_TOKEN = "YOUR_LINE_TOKEN_HERE"
 
+# รายชื่อคนขับที่สมัครรับแจ้งเตือน (ถ้าไม่มีไฟล์ จะส่งหา LINE_NOTIFY_TOKEN คนเดียว)
+# [{"token": "...", "zones": ["Europe", "MiddleEast"]}, ...]  ไม่ใส่ zones = รับทุกโซน
+SUBSCRIBERS_FILE = "subscribers.json"
+
 # ใส่ AviationStack API Key ของคุณที่นี่ (สมัครฟรีที่ aviationstack.com)
 # ถ้าไม่มีคีย์ ให้ตั้งค่า USE_DEMO_DATA = True เพื่อทดสอบระบบด้วยข้อมูลจำลอง
 AVIATION_STACK_API_KEY = "YOUR_API_KEY_HERE"
@@ -15,27 +26,22 @@ USE_DEMO_DATA = True  # เปลี่ยนเป็น False เมื่อ
 
 # สนามบินที่ต้องการเช็ค (BKK = สุวรรณภูมิ, DMK = ดอนเมือง)
 AIRPORT_CODE = "BKK" 
+
+# โหมด daemon (python taxi_advisor.py --daemon): เช็คทุก POLL_SECONDS ในช่วงปกติ
+# ช่วงพีค 17:00-01:00 ถี่ขึ้น 3 เท่า กลางดึกห่างขึ้น; สถานะเก็บไว้ใน STATE_FILE ข้ามการรีสตาร์ท
+POLL_SECONDS = 300
+STATE_FILE = "taxi_advisor_state.json"
 # =================================================
 
+# ================= ALGORITHM: "Golden Window" & "Fare Estimator" =================
+# ตาราง Profiling แยกตามโซนประเทศ, การจับคู่โซน และการคำนวณเวลาคนออก อยู่ใน advisor.core (ใช้ร่วมกับเว็บ)
+
 def get_flight_data_demo():
     """
     สร้างข้อมูลเที่ยวบินจำลองสำหรับการทดสอบ
     """
     print("⚠️ กำลังใช้โหมด Demo (จำลองข้อมูล)...")
-    airlines = ["Emirates", "Qatar Airways", "Thai Airways", "China Eastern", "Lufthansa", "EVA Air", "Spring Airlines", "IndiGo"]
-    origins = ["London", "Dubai", "Frankfurt", "Tokyo", "Shanghai", "Singapore", "Mumbai", "Beijing"]
-    
-    mock_flights = []
-    # สุ่มสร้าง 15-25 เที่ยวบิน
-    for _ in range(random.randint(15, 25)):
-        flight = {
-            "airline": random.choice(airlines),
-            "flight_number": f"{random.choice(['TG', 'EK', 'QR', 'LH', '9C', '6E'])}{random.randint(100, 999)}",
-            "origin": random.choice(origins),
-            "arrival_time": datetime.now().strftime("%H:%M")
-        }
-        mock_flights.append(flight)
-    return mock_flights
+    return demo_flights()
 
 def get_flight_data_real():
     """
@@ -53,26 +59,26 @@ def get_flight_data_real():
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = get_session().get(url, params=params, timeout=10)  # keep-alive ข้ามรอบใน daemon
         data = response.json()
         
         if 'data' not in data:
             return []
-
-        flights = []
-        for item in data['data']:
-            flight = {
-                "airline": item['airline']['name'],
-                "flight_number": item['flight']['iata'],
-                "origin": item['departure']['airport'],
-                "arrival_time": item['arrival']['scheduled'].split('T')[-1][:5] # เอาแค่เวลา HH:MM
-            }
-            flights.append(flight)
-        return flights
+        return [Flight.from_dict(record) for record in parse_page(data)[0]]
     except Exception as e:
         print(f"❌ Error API: {e}")
         return []
 
+# ส่งพร้อมกันหลายคน: worker pool + session เดียว, จำกัดความถี่ต่อ token และรวม, retry 429/5xx, ไม่ส่งข้อความซ้ำ
+DISPATCHER = Dispatcher()
+
+def load_subscribers(path=SUBSCRIBERS_FILE):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return [] if LINE_NOTIFY_TOKEN == "YOUR_LINE_TOKEN_HERE" else [{"token": LINE_NOTIFY_TOKEN}]
+
 def send_line_notify(message):
     """
     ส่งข้อความแจ้งเตือนผ่าน Line Notify
@@ -81,158 +87,202 @@ def send_line_notify(message):
         print("⚠️ ยังไม่ได้ใส่ Line Token (ข้อความจะแสดงแค่ในจอนี้)")
         print(f"💬 ข้อความที่จะส่ง: {message}")
         return
+    outcome = DISPATCHER.send(LINE_NOTIFY_TOKEN, message)
+    print("✅ ส่ง Line เรียบร้อย!" if outcome == "sent" else f"❌ ส่ง Line ไม่สำเร็จ: {outcome}")
 
-    url = "https://notify-api.line.me/api/notify"
-    headers = {"Authorization": f"Bearer {LINE_NOTIFY_TOKEN}"}
-    data = {"message": message}
-    
-    try:
-        response = requests.post(url, headers=headers, data=data)
-        if response.status_code == 200:
-            print("✅ ส่ง Line เรียบร้อย!")
-        else:
-            print(f"❌ ส่ง Line ไม่สำเร็จ: {response.status_code}")
-    except Exception as e:
-        print(f"❌ Error Line: {e}")
+def find_alerts(flights, now=None):
+    # เที่ยวบิน A+ เรียงตามเวลาคนออก (ข้ามเที่ยงคืนถูกต้อง) เพื่อให้คนขับรู้ลำดับ
+    return analyze(flights, now)
 
-def analyze_and_notify():
-    print(f"✈️ กำลังเช็คข้อมูลเที่ยวบินขาเข้าสนามบิน {AIRPORT_CODE}...")
-    
-    if USE_DEMO_DATA:
-        flights = get_flight_data_demo()
-    else:
-        flights = get_flight_data_real()
-        
-    count = len(flights)
-    print(f"พบ {count} เที่ยวบินในช่วงนี้")
-
-    # ================= ALGORITHM: "Golden Window" & "Fare Estimator" =================
-    # ข้อมูล Profiling แยกตามโซนประเทศ (สถิติจากพฤติกรรมนักท่องเที่ยว)
-    FLIGHT_PROFILE = {
-        "Europe": {
-            "hubs": ["London", "Frankfurt", "Paris", "Zurich", "Munich", "Amsterdam", "Helsinki", "Copenhagen"],
-            "exit_delay": 50,  # นานที่รอกระเป๋า + ไม่ต้องทำ Visa
-            "fare_range": "500-800", # ปรับปี 2569: ค่าโดยสาร + ทางด่วน + ทิป
-            "comment": "กระเป๋าเยอะ เข้าเมืองไกล (สุขุมวิท/สีลม)"
-        },
-        "MiddleEast": {
-            "hubs": ["Dubai", "Doha", "Abu Dhabi", "Istanbul", "Tel Aviv", "Riyadh", "Kuwait"],
-            "exit_delay": 60, 
-            "fare_range": "450-650", # ปรับขึ้นเล็กน้อย
-            "comment": "มาเป็นครอบครัวใหญ่ ทิปหนัก (โซนนานา)"
-        },
-        "Russia": {
-            "hubs": ["Moscow", "Saint Petersburg", "Novosibirsk"],
-            "exit_delay": 55,
-            "fare_range": "500-1500", # เพิ่มโอกาสเหมาพัทยา
-            "comment": "โอกาสเหมาไปพัทยา/หัวหินสูงมาก"
-        },
-        "EastAsia": {
-            "hubs": ["Tokyo", "Osaka", "Seoul", "Taipei"],
-            "exit_delay": 45, 
-            "fare_range": "400-550", # ปรับฐานขึ้นตาม Grab 2569
-            "comment": "สุภาพ จ่ายตรง (แต่อาจจะใช้ App เรียกรถ)"
-        },
-        "China": {
-            "hubs": ["Shanghai", "Beijing", "Guangzhou", "Chengdu", "Kunming"],
-            "exit_delay": 75, # VOA คิวยาว
-            "fare_range": "350-500", 
-            "comment": "ระวัง! รอนานตรวจวีซ่า (ไปโซนรัชดา)"
-        },
-        "India": {
-            "hubs": ["Delhi", "Mumbai", "Kolkata", "Bangalore"],
-            "exit_delay": 70, 
-            "fare_range": "350-500", 
-            "comment": "ไปโซนประตูน้ำ/พาหุรัด"
-        }
-    }
+SEPARATOR = "-------------------------------\n"
+MAP_LINKS = {
+    "BKK": "https://www.google.com/maps/@13.690,100.750,14z/data=!5m1!1e1",
+    "DMK": "https://www.google.com/maps/@13.913,100.604,14z/data=!5m1!1e1",
+}
 
-    smart_alerts = [] # เก็บรายการแจ้งเตือนแบบรายละเอียด
+def render_alert(item):
+    return (
+        f"{item['icon']} {item['airline']} ({item['origin']})\n"
+        f"   🛬 ลง: {item['land_time']} --> 🚶‍♂️ออก: {item['exit_time']}\n"
+        f"   💸 คาดการณ์: {item['fare_range']}฿\n"
+        f"   💡 {item['note']}\n"
+        + SEPARATOR
+    )
 
-    for f in flights:
-        origin = f['origin']
-        arrival_time_str = f['arrival_time'] # คาดว่า format 18:30 หรือ T18:30:00
-        if 'T' in arrival_time_str:
-             arrival_time_str = arrival_time_str.split('T')[-1][:5]
-        
-        # 1. Match Region
-        matched_zone = "Other"
-        profile = None
-        
-        for zone, data in FLIGHT_PROFILE.items():
-            if any(hub in origin for hub in data['hubs']):
-                matched_zone = zone
-                profile = data
-                break
-        
-        # ถ้าเจอโซนเป้าหมาย ให้คำนวณละเอียด
-        if profile:
-            # 2. Calculate "Golden Window" (เวลาคนออกมาจริงๆ)
-            try:
-                h, m = map(int, arrival_time_str.split(':'))
-                total_mins = h * 60 + m + profile['exit_delay']
-                
-                # แปลงกลับเป็นเวลาคนออก (Exit Time)
-                exit_h = (total_mins // 60) % 24
-                exit_m = total_mins % 60
-                exit_time_str = f"{exit_h:02}:{exit_m:02}"
-                
-                # บันทึกข้อมูล
-                smart_alerts.append({
-                    "airline": f['airline'],
-                    "flight": f['flight_number'],
-                    "origin": origin,
-                    "land_time": arrival_time_str,
-                    "exit_time": exit_time_str,
-                    "fare": profile['fare_range'],
-                    "note": profile['comment'],
-                    "zone": matched_zone
-                })
-            except Exception as e:
-                print(f"Error parsing time {arrival_time_str}: {e}")
+class Report:
+    """
+    รายงานหนึ่งรอบ: แต่ละเที่ยวบินถูก render ครั้งเดียว แล้วประกอบเป็นข้อความตามโซนที่คนขับเลือก
+    (คนที่เลือกโซนเหมือนกันได้ string เดียวกัน)
+    """
+    def __init__(self, alerts, count, top=7, low_fare=True):
+        self.alerts = alerts
+        self.count = count
+        self.top = top
+        self.low_fare = low_fare  # ส่งข้อความ Low Fare ให้คนที่ไม่มีเที่ยวบินในโซนตัวเอง
+        self.blocks = [render_alert(item) for item in alerts]
+        self.footer = (
+            "\nกลยุทธ์แนะนำ:\n"
+            "🚀 ออกรถเลย! เพื่อไปถึงหน้างานตอน {first_exit}\n"
+            "ลูกค้าจะเริ่มทะลักออกมาพอดี ท่านจะได้คิวแรกๆ ของรอบนี้!"
+            f"\n\n🚦 เช็คจราจร:\n{MAP_LINKS.get(AIRPORT_CODE, MAP_LINKS['DMK'])}"
+        )
+        self._messages = {}
 
-    # ================= สร้างข้อความแจ้งเตือน (Smart Report) =================
-    if len(smart_alerts) > 0:
-        # Sort ตามเวลาคนออก (Exit Time) เพื่อให้คนขับรู้ลำดับ
-        smart_alerts.sort(key=lambda x: x['exit_time'])
-        
-        message = (
+    def message(self, zones=None):
+        key = frozenset(zones) if zones else None
+        if key not in self._messages:
+            self._messages[key] = self._compose(key)
+        return self._messages[key]
+
+    def _compose(self, zones):
+        picked = [i for i, item in enumerate(self.alerts) if zones is None or item['zone'] in zones]
+        if not picked:
+            if self.count == 0 or not self.low_fare: return None
+            # กรณีไม่เจอ High Value เลย แต่มีไฟล์ททั่วไป
+            return f"🤖 มีเที่ยวบิน {self.count} ลำ แต่เป็นระยะสั้น (Low Fare) อาจจะไม่คุ้มรอ หรือเน้นรับไวครับ"
+        header = (
             f"\n🧠 Smart Advisor: วิเคราะห์เวลารับงาน\n"
             f"📍 สนามบิน: {AIRPORT_CODE}\n"
-            f"💰 พบลูกค้าเกรด A+ ทั้งหมด {len(smart_alerts)} ลำ\n"
-            f"-------------------------------\n"
+            f"💰 พบลูกค้าเกรด A+ ทั้งหมด {len(picked)} ลำ\n"
+            + SEPARATOR
         )
-        
-        for item in smart_alerts[:7]: # ยกมา 7 อันดับแรก
-            icon = "💶" if item['zone'] == "Europe" else ("🛢️" if item['zone'] == "MiddleEast" else "🌏")
-            message += (
-                f"{icon} {item['airline']} ({item['origin']})\n"
-                f"   🛬 ลง: {item['land_time']} --> 🚶‍♂️ออก: {item['exit_time']}\n"
-                f"   💸 คาดการณ์: {item['fare']}฿\n"
-                f"   💡 {item['note']}\n"
-            )
-            message += "-------------------------------\n"
-            
-        message += "\nกลยุทธ์แนะนำ:\n"
-        first_exit = smart_alerts[0]['exit_time']
-        message += f"🚀 ออกรถเลย! เพื่อไปถึงหน้างานตอน {first_exit}\n"
-        message += "ลูกค้าจะเริ่มทะลักออกมาพอดี ท่านจะได้คิวแรกๆ ของรอบนี้!"
-        
-        # เพิ่ม Link MAP
-        if AIRPORT_CODE == "BKK":
-            map_link = "https://www.google.com/maps/@13.690,100.750,14z/data=!5m1!1e1" 
-        else:
-            map_link = "https://www.google.com/maps/@13.913,100.604,14z/data=!5m1!1e1" 
-        message += f"\n\n🚦 เช็คจราจร:\n{map_link}"
-        
-        send_line_notify(message)
-        
-    elif count > 0:
-        # กรณีไม่เจอ High Value เลย แต่มีไฟล์ททั่วไป
-        send_line_notify(f"🤖 มีเที่ยวบิน {count} ลำ แต่เป็นระยะสั้น (Low Fare) อาจจะไม่คุ้มรอ หรือเน้นรับไวครับ")
-    
-    else:
+        first_exit = self.alerts[picked[0]]['exit_time']
+        return "".join([header, *(self.blocks[i] for i in picked[:self.top]), self.footer.format(first_exit=first_exit)])
+
+def get_flights():
+    print(f"✈️ กำลังเช็คข้อมูลเที่ยวบินขาเข้าสนามบิน {AIRPORT_CODE}...")
+    flights = get_flight_data_demo() if USE_DEMO_DATA else get_flight_data_real()
+    print(f"พบ {len(flights)} เที่ยวบินในช่วงนี้")
+    return flights
+
+def notify(report, missed=None):
+    """
+    ส่งรายงานให้ทุกคน; คนที่มีเที่ยวบินค้างส่งจากรอบก่อน (missed = {token_id: [alert]}) ได้รวมไปด้วย
+    คืน {token_id: [alert ที่ส่งไม่สำเร็จ]} (ว่าง = ส่งครบ)
+    """
+    subscribers = load_subscribers()
+    if not subscribers:
+        message = report.message()
+        if message: send_line_notify(message)
+        return {}
+    missed = missed or {}
+    reports = {}  # คนที่ค้างชุดเดียวกันใช้ Report เดียวกัน
+    messages, picked = [], {}
+    for s in subscribers:
+        tid, r = token_id(s['token']), report
+        if missed.get(tid):
+            keys = frozenset(alert_key(item) for item in missed[tid])
+            if keys not in reports:
+                merged = sorted(report.alerts + missed[tid], key=lambda item: item['exit_at'])
+                reports[keys] = Report(merged, report.count, report.top, report.low_fare)
+            r = reports[keys]
+        message = r.message(s.get('zones'))
+        if message:
+            messages.append((s['token'], message))
+            picked[s['token']] = (tid, [item for item in r.alerts if not s.get('zones') or item['zone'] in s['zones']])
+    results = DISPATCHER.dispatch(messages)
+    outcomes = Counter(outcome.split(":")[0] for outcome in results.values())
+    print(f"📨 ส่งถึง {len(subscribers)} คน: " + ", ".join(f"{k} {v}" for k, v in outcomes.items()))
+    return dict(picked[token] for token, outcome in results.items() if outcome.startswith("failed"))
+
+def analyze_and_notify():
+    flights = get_flights()
+    count = len(flights)
+
+    # ================= สร้างข้อความแจ้งเตือน (Smart Report) =================
+    report = Report(find_alerts(flights), count)
+    if count == 0:
         print("เงียบกริบ ไม่มีเครื่องลง")
+        return report
+    notify(report)
+    return report
+
+# ================= DAEMON =================
+def alert_key(item):
+    return f"{item['flight']}|{item['origin']}"
+
+def diff_alerts(previous, alerts):
+    """เที่ยวบิน A+ ที่เพิ่งเข้าเกณฑ์ หรือเวลาออกเปลี่ยนไปจากรอบก่อน (previous = {key: exit_time})"""
+    return [item for item in alerts if previous.get(alert_key(item)) != item['exit_time']]
+
+# token_id -> {alert_key: exit_time} ที่ส่งถึงคนนั้นไม่สำเร็จ; รอบหน้าส่งซ้ำเฉพาะคนนั้น
+MISSED = {}
+
+def poll_once(previous, now=None):
+    """หนึ่งรอบ: แจ้งเฉพาะที่ใหม่/เปลี่ยน; คืนสถานะใหม่ (ที่ส่งไม่สำเร็จจะถูกส่งซ้ำรอบหน้า เฉพาะคนที่ยังไม่ได้)"""
+    flights = get_flights()
+    if not flights:
+        # API error/ว่าง (get_flight_data_real คืน []): เก็บสถานะเดิมไว้ ไม่งั้นรอบถัดไปจะแจ้งซ้ำทุกลำ
+        print("⚠️ ไม่ได้ข้อมูลเที่ยวบินรอบนี้ ใช้สถานะเดิม")
+        return previous
+    alerts = find_alerts(flights, now)
+    current = {alert_key(item): item['exit_time'] for item in alerts}
+    changed = diff_alerts(previous, alerts)
+    changed_keys = {alert_key(item) for item in changed}
+    # ของที่ค้าง: ส่งซ้ำเฉพาะที่ยังอยู่และเวลาไม่เปลี่ยน (ที่เปลี่ยนอยู่ใน changed แล้ว ที่หายไปไม่ต้องส่ง)
+    missed = {tid: [item for item in alerts if alert_key(item) not in changed_keys and keys.get(alert_key(item)) == item['exit_time']]
+              for tid, keys in MISSED.items()}
+    missed = {tid: items for tid, items in missed.items() if items}
+    if changed or missed:
+        print(f"🔔 มีเที่ยวบินใหม่/เปลี่ยนเวลา {len(changed)} ลำ, ค้างส่ง {len(missed)} คน")
+        failed = notify(Report(changed, len(flights), low_fare=False), missed)
+    else:
+        failed = {}
+    MISSED.clear()
+    MISSED.update({tid: {alert_key(item): item['exit_time'] for item in items} for tid, items in failed.items()})
+    return current
+
+def is_token_id(key):
+    return len(key) == 16 and all(c in "0123456789abcdef" for c in key)
+
+def load_state(path):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_state(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, ensure_ascii=False)
+    os.replace(tmp, path)  # ไม่มีไฟล์ครึ่งๆ กลางๆ ถ้าถูกหยุดระหว่างเขียน
+
+def run_daemon(state_path=STATE_FILE, base_interval=POLL_SECONDS, stop=None):
+    """วนเช็คจนได้ SIGTERM/SIGINT; เก็บเที่ยวบินที่แจ้งแล้วและข้อความล่าสุดของแต่ละ token (เก็บแค่ hash ของ token) ลงดิสก์ทุกรอบ"""
+    stop = stop or threading.Event()
+    handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            handlers[sig] = signal.signal(sig, lambda signum, frame: stop.set())
+    interval = adaptive_interval(base_interval)
+    state = load_state(state_path)
+    previous = state.get("alerts", {})
+    # ไฟล์สถานะรุ่นเก่าใช้ token ดิบเป็น key: ทิ้งไป จะได้ไม่ถูกเขียนกลับลงดิสก์
+    DISPATCHER.last_sent.update({k: v for k, v in state.get("sent", {}).items() if is_token_id(k)})
+    MISSED.update({k: v for k, v in state.get("missed", {}).items() if is_token_id(k)})
+    print(f"🟢 เริ่มโหมด daemon (จำได้ {len(previous)} เที่ยวบิน)")
+    try:
+        while not stop.is_set():
+            try:
+                previous = poll_once(previous)
+            except Exception as e:
+                print(f"❌ Error: {e}")
+            save_state(state_path, {"alerts": previous, "sent": DISPATCHER.last_sent, "missed": MISSED, "saved_at": time.time()})
+            stop.wait(interval())
+    finally:
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+    print("👋 หยุดทำงาน บันทึกสถานะแล้ว")
 
 if __name__ == "__main__":
-    analyze_and_notify()
+    import argparse
+    parser = argparse.ArgumentParser(description="Smart Taxi Advisor: แจ้งเตือนเที่ยวบินผ่าน LINE")
+    parser.add_argument("--daemon", action="store_true", help="ทำงานต่อเนื่อง แจ้งเฉพาะเที่ยวบินใหม่/เปลี่ยนเวลา")
+    parser.add_argument("--state", default=STATE_FILE, help="ไฟล์เก็บสถานะของโหมด daemon")
+    parser.add_argument("--interval", type=int, default=POLL_SECONDS, help="วินาทีระหว่างรอบ (ช่วงปกติ)")
+    args = parser.parse_args()
+    if args.daemon:
+        run_daemon(args.state, args.interval)
+    else:
+        analyze_and_notify()
@@ -0,0 +1,110 @@
+import gzip
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import api.index as web
+from api.index import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture
+def all_day_events(monkeypatch):
+    """Every (daily) demo event lets out within the window, whatever the time of the test run."""
+    monkeypatch.setattr(web, "EVENT_WINDOW_MINUTES", 24 * 60)
+
+
+def test_dashboard_returns_all_sections(client, all_day_events):
+    data = client.get('/api/dashboard?lat=13.7&lng=100.5').get_json()
+    for section in ("flights", "events", "traffic", "news"):
+        assert section in data
+    assert data["errors"] == {}
+    assert data["flights"]["total_flights"] >= len(data["flights"]["alerts"])
+    assert data["events"]["city_alerts"][0]["distance"].endswith("km")
+
+
+def test_dashboard_section_filter(client):
+    data = client.get('/api/dashboard?sections=traffic,unknown').get_json()
+    assert "traffic" in data and "flights" not in data and "unknown" not in data
+
+
+def test_flights_etag_returns_304_when_unchanged(client):
+    random.seed(1)
+    first = client.get('/api/flights')
+    assert first.status_code == 200 and first.headers['ETag'].startswith('W/')
+    random.seed(1)
+    again = client.get('/api/flights', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.data == b''
+
+
+def test_dashboard_etag_ignores_section_clocks(client, monkeypatch):
+    clock = [datetime(2026, 1, 17, 18, 0)]
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock[0]
+
+    monkeypatch.setattr(web, "datetime", Clock)
+    random.seed(1)
+    first = client.get('/api/dashboard')
+    clock[0] += timedelta(minutes=2)  # traffic/news "updated" and current_time all move
+    random.seed(1)
+    again = client.get('/api/dashboard', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.headers['ETag'] == first.headers['ETag']
+
+
+def test_flights_compact_and_gzip(client):
+    random.seed(2)
+    full = client.get('/api/flights').get_json()
+    random.seed(2)
+    r = client.get('/api/flights?format=compact', headers={'Accept-Encoding': 'gzip'})
+    assert r.headers['Content-Encoding'] == 'gzip'
+    compact = json.loads(gzip.decompress(r.data))
+    rows = [dict(zip(compact['alert_fields'], row), **compact['zones'][row[-1]]) for row in compact['alerts']]
+    assert rows == full['alerts']
+
+
+def test_ev_nearest_with_filters(client):
+    data = client.get('/api/ev?lat=13.69&lng=100.75&k=3&charger=dc&open_24h=true').get_json()
+    assert data["count"] == 3
+    assert data["stations"][0]["name"] == "EGAT EleXA - Suvarnabhumi Airport"
+    assert all(s["open_24h"] for s in data["stations"])
+    distances = [s["distance_km"] for s in data["stations"]]
+    assert distances == sorted(distances)
+
+
+def test_ev_radius_and_provider(client):
+    data = client.get('/api/ev?lat=13.7467&lng=100.5392&radius_km=3&provider=pea%20volta').get_json()
+    assert data["count"] > 0
+    assert all(s["provider"] == "PEA VOLTA" and s["distance_km"] <= 3 for s in data["stations"])
+
+
+def test_ev_stations_dashboard_tab(client):
+    data = client.get('/api/ev-stations?lat=13.7&lng=100.5').get_json()
+    assert data["has_location"] and len(data["top_nearest"]) == 3 and len(data["top_cheapest"]) == 3
+
+
+def test_fleet_recommendations_ndjson(client, all_day_events):
+    drivers = [{"id": "taxi-1", "lat": 13.627, "lng": 100.415}, {"id": "taxi-2", "lat": 13.98, "lng": 100.61}]
+    body = "\n".join(json.dumps(d) for d in drivers) + "\nnot json\n"
+    r = client.post('/api/fleet/recommendations?k=2', data=body, content_type='application/x-ndjson')
+    assert r.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in r.data.decode().splitlines()]
+    assert [l.get("id") for l in lines[:2]] == ["taxi-1", "taxi-2"]
+    assert len(lines[0]["opportunities"]) == 2
+    scores = [o["score"] for o in lines[1]["opportunities"]]
+    assert scores == sorted(scores, reverse=True)
+    assert lines[2]["line"] == 3 and "error" in lines[2]
+
+
+def test_page_opens_the_stream_only_when_the_server_supports_it(client, monkeypatch):
+    assert b"const STREAM_ENABLED = false;" in client.get('/').data
+    monkeypatch.setattr(web, "STREAM_ENABLED", True)
+    assert b"const STREAM_ENABLED = true;" in client.get('/').data
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import pytest
+
+from advisor.backtest import load_days, replay, summarize, sweep, synthetic_days, variants
+from advisor.profiles import load
+from advisor.snapshots import SnapshotWriter
+
+FLIGHT_PROFILE = load().zones
+
+
+def test_replay_finds_the_hidden_exit_offset():
+    records = replay(synthetic_days(FLIGHT_PROFILE, 2, seed=1, late_sigma=0), FLIGHT_PROFILE)
+    summary = summarize(records, FLIGHT_PROFILE)
+    assert summary["exit"]["n"] > 300
+    # exits are 8 min later than the profile and flights land ~5 min late
+    assert -16 < summary["exit"]["bias"] < -10
+    europe = summary["zones"]["Europe"]
+    assert 60 <= europe["suggested_exit_delay"] <= 66
+
+
+def test_prediction_is_made_when_first_seen():
+    t = datetime(2026, 1, 17, 16, 0).timestamp()
+    flight = {"flight_number": "BA9", "origin": "London", "arrival_time": "18:00"}
+    landed = dict(flight, actual_time="18:20", exit_actual="19:15", fare_actual=600)
+    [rec] = replay([(t, [flight]), (t + 3 * 3600, [landed])], FLIGHT_PROFILE)
+    assert rec["predicted"] - rec["scheduled"] == FLIGHT_PROFILE["Europe"]["exit_delay"]
+    assert rec["lead"] == 120 + FLIGHT_PROFILE["Europe"]["exit_delay"]
+    assert rec["exited"] - rec["scheduled"] == 75 and rec["landed"] - rec["scheduled"] == 20
+
+
+def test_sweep_over_recorded_snapshots(tmp_path):
+    writer = SnapshotWriter(str(tmp_path))
+    for t, flights in synthetic_days(FLIGHT_PROFILE, 1, flights_per_day=40):
+        writer.write("BKK", flights, t)
+    spec = ("snapshots", str(tmp_path), "BKK", None, None)
+    summary = summarize(replay(load_days(spec), FLIGHT_PROFILE), FLIGHT_PROFILE)
+    assert summary["flights"] > 0 and summary["landing"]["n"] > 0
+    assert summary["exit"] is None and summary["fare"] is None  # the store keeps landings only
+    with pytest.raises(ValueError, match="nothing to score"):
+        sweep(spec, variants(FLIGHT_PROFILE, (0, 5), (1.0,)), workers=1)
+
+
+def test_variants_stay_valid_profiles():
+    from advisor.profiles import _zone
+    for _, profile in variants(FLIGHT_PROFILE, (-100, 0), (1.0,)):
+        assert all(_zone(name, dict(p, hubs=list(p["hubs"])))["exit_delay"] >= 1 for name, p in profile.items())
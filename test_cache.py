@@ -0,0 +1,118 @@
+import multiprocessing
+import threading
+import time
+
+from advisor.cache import SQLiteBackend, TTLCache, make_backend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_per_key_ttl_and_lru_eviction():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=100)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.stats["evictions"] == 1
+    clock.now = 50
+    assert cache.get("a") is None and cache.get("c") is None
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return ["TG100"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("flights", fetch))) for _ in range(20)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(calls) == 1
+    assert results == [["TG100"]] * 20
+    stats = cache.stats
+    assert stats["misses"] == 1 and stats["coalesced"] + stats["hits"] == 19
+
+
+def test_stale_while_revalidate():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, stale_ttl=30, clock=clock)
+    cache.set("flights", "old")
+    clock.now = 15
+    refreshed = threading.Event()
+
+    def fetch():
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_fetch("flights", fetch) == "old"
+    assert refreshed.wait(1)
+    for _ in range(100):
+        if cache.get("flights") == "new": break
+        time.sleep(0.01)
+    assert cache.get("flights") == "new"
+
+
+def test_none_and_errors_are_not_cached():
+    cache = TTLCache(ttl=60)
+    assert cache.get_or_fetch("k", lambda: None) is None
+    try:
+        cache.get_or_fetch("k", lambda: 1 / 0)
+    except ZeroDivisionError:
+        pass
+    assert cache.get_or_fetch("k", lambda: 42) == 42
+    assert cache.stats["errors"] == 1
+
+
+def _write_many(path, worker, n):
+    backend = SQLiteBackend(path)
+    for i in range(n):
+        backend.set(f"w{worker}-{i % 5}", {"worker": worker, "i": i, "flights": ["TG100"] * 10}, time.time() + 60, time.time() + 120)
+        backend.set("flights", {"worker": worker, "i": i}, time.time() + 60, time.time() + 120)
+
+
+def test_sqlite_backend_concurrent_writers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteBackend(path)
+    procs = [multiprocessing.Process(target=_write_many, args=(path, w, 50)) for w in range(4)]
+    threads = [threading.Thread(target=_write_many, args=(path, 10 + w, 50)) for w in range(4)]
+    for p in procs: p.start()
+    for t in threads: t.start()
+    for p in procs: p.join()
+    for t in threads: t.join()
+    assert all(p.exitcode == 0 for p in procs)
+    backend = SQLiteBackend(path)
+    assert len(backend) == 8 * 5 + 1
+    value, expires, _ = backend.get("flights")
+    assert value["i"] == 49 and expires > time.time()
+
+
+def test_sqlite_backend_shared_between_cache_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    warm = TTLCache(ttl=60, backend=SQLiteBackend(path))
+    assert warm.get_or_fetch("flights", lambda: [{"flight_number": "TG100"}]) == [{"flight_number": "TG100"}]
+    cold = TTLCache(ttl=60, backend=make_backend("sqlite", path=path))
+    assert cold.get_or_fetch("flights", lambda: 1 / 0) == [{"flight_number": "TG100"}]
+    assert cold.stats["fetches"] == 0
+
+
+def test_sqlite_backend_expiry_and_lru(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), maxsize=2)
+    now = time.time()
+    backend.set("gone", 1, now - 20, now - 10)
+    backend.set("a", 1, now + 60, now + 60)
+    backend.set("b", 2, now + 60, now + 60)
+    backend.get("a")
+    backend.set("c", 3, now + 60, now + 60)
+    assert backend.get("gone") is None and backend.get("b") is None
+    assert backend.get("a")[0] == 1 and backend.get("c")[0] == 3
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HEAVY = ["numpy", "requests", "dotenv", "ev_stations_data", "advisor.forecast", "advisor.fleet", "advisor.snapshots"]
+
+
+def loaded_after(code, **env):
+    probe = f"import sys\n{code}\nprint(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True,
+                         env=dict(os.environ, USE_DEMO_DATA="True", VERCEL="1", **env))
+    return out.stdout.split()
+
+
+def test_import_and_first_flights_request_stay_light():
+    assert loaded_after("import api.index") == []
+    first = "import api.index as web\nassert web.app.test_client().get('/api/flights?lat=13.75&lng=100.55').status_code == 200"
+    assert loaded_after(first) == []
+
+
+def test_heavy_routes_load_on_demand():
+    code = "import api.index as web\nc = web.app.test_client()\nc.get('/api/ev?lat=13.75&lng=100.55')\nc.get('/api/forecast')"
+    assert set(loaded_after(code)) == {"numpy", "ev_stations_data", "advisor.forecast"}
@@ -0,0 +1,95 @@
+import json
+import os
+import signal
+from datetime import datetime
+
+import taxi_advisor
+from advisor.notify import token_id
+from advisor.core import Flight, parse_minute
+
+NOW = datetime(2026, 1, 17, 17, 0)
+NOTIFY = taxi_advisor.notify
+
+
+def flight(number, origin, arrival):
+    return Flight("Test Air", number, origin, parse_minute(arrival))
+
+
+def fake_cycle(monkeypatch, batches, on_poll=None):
+    sent, polls = [], []
+
+    def get_flights():
+        polls.append(1)
+        if on_poll: on_poll(len(polls))
+        return batches[min(len(polls), len(batches)) - 1]
+
+    monkeypatch.setattr(taxi_advisor, "get_flights", get_flights)
+    monkeypatch.setattr(taxi_advisor, "notify", lambda report, missed=None: sent.append([a["flight"] for a in report.alerts]) or {})
+    monkeypatch.setattr(taxi_advisor, "MISSED", {})
+    return sent, polls
+
+
+def test_poll_notifies_only_new_or_moved_exit_windows(monkeypatch):
+    batches = [
+        [flight("EK1", "Dubai", "18:00"), flight("LH1", "Frankfurt", "18:10"), flight("FD1", "Phuket", "18:20")],
+        [flight("EK1", "Dubai", "18:00"), flight("LH1", "Frankfurt", "18:40"), flight("QR1", "Doha", "19:00")],
+        [flight("EK1", "Dubai", "18:00"), flight("LH1", "Frankfurt", "18:40"), flight("QR1", "Doha", "19:00")],
+    ]
+    sent, _ = fake_cycle(monkeypatch, batches)
+    state = {}
+    for _ in batches:
+        state = taxi_advisor.poll_once(state, NOW)
+    assert sent == [["EK1", "LH1"], ["LH1", "QR1"]]
+    assert state == {"EK1|Dubai": "19:00", "LH1|Frankfurt": "19:30", "QR1|Doha": "20:00"}
+
+
+def test_failed_or_empty_fetch_keeps_the_notified_state(monkeypatch):
+    batch = [flight("EK1", "Dubai", "18:00"), flight("LH1", "Frankfurt", "18:10")]
+    sent, _ = fake_cycle(monkeypatch, [batch, [], batch])
+    state = {}
+    for _ in range(3):
+        state = taxi_advisor.poll_once(state, NOW)
+    assert sent == [["EK1", "LH1"]]
+    assert state == {"EK1|Dubai": "19:00", "LH1|Frankfurt": "19:00"}
+
+
+def test_failed_delivery_is_retried_next_poll_only_for_that_driver(monkeypatch):
+    batches = [[flight("EK1", "Dubai", "18:00")], [flight("EK1", "Dubai", "18:00"), flight("QR1", "Doha", "18:30")]]
+    fake_cycle(monkeypatch, batches)
+    monkeypatch.setattr(taxi_advisor, "notify", NOTIFY)  # the real one, over a stubbed dispatcher
+    monkeypatch.setattr(taxi_advisor, "load_subscribers", lambda: [{"token": "ok"}, {"token": "down"}])
+    down = [True]
+    received = []
+
+    def dispatch(messages):
+        messages = dict(messages)
+        received.append({t: m.count("🛬") for t, m in messages.items()})  # one 🛬 per flight block
+        return {t: "failed: HTTP 500" if t == "down" and down[0] else "sent" for t in messages}
+
+    monkeypatch.setattr(taxi_advisor.DISPATCHER, "dispatch", dispatch)
+    state = taxi_advisor.poll_once({}, NOW)
+    assert state == {"EK1|Dubai": "19:00"} and taxi_advisor.MISSED == {token_id("down"): {"EK1|Dubai": "19:00"}}
+    down[0] = False
+    taxi_advisor.poll_once(state, NOW)
+    assert received == [{"ok": 1, "down": 1}, {"ok": 1, "down": 2}]  # "ok" only gets the new QR1
+    assert taxi_advisor.MISSED == {}
+
+
+def test_daemon_persists_state_and_stops_on_sigterm(monkeypatch, tmp_path):
+    path = str(tmp_path / "state.json")
+    batches = [[flight("EK1", "Dubai", "18:00")]]
+    stop_on_second = lambda n: n == 2 and os.kill(os.getpid(), signal.SIGTERM)
+    sent, polls = fake_cycle(monkeypatch, batches, on_poll=stop_on_second)
+    monkeypatch.setattr(taxi_advisor, "adaptive_interval", lambda base: lambda: 0)
+    before = signal.getsignal(signal.SIGTERM)
+    taxi_advisor.DISPATCHER.last_sent[token_id("driver")] = "abc"
+    taxi_advisor.run_daemon(path)
+    assert len(polls) == 2 and sent == [["EK1"]]
+    assert signal.getsignal(signal.SIGTERM) is before
+    state = taxi_advisor.load_state(path)
+    assert state["alerts"] == {"EK1|Dubai": "19:00"} and state["sent"][token_id("driver")] == "abc"
+    assert "driver" not in json.dumps(state)  # the state file never holds a raw token
+    # a restart remembers what was already sent
+    sent2, _ = fake_cycle(monkeypatch, batches, on_poll=lambda n: os.kill(os.getpid(), signal.SIGTERM))
+    taxi_advisor.run_daemon(path)
+    assert sent2 == []
@@ -0,0 +1,69 @@
+import json
+import random
+from datetime import datetime
+
+import api.index as web
+from advisor.events import day_minute
+from advisor.geo import haversine_km
+from advisor.profiles import DEFAULT_PATH, Profiles
+from advisor.timeline import anchor, now_minute
+
+
+def compiled(events):
+    with open(DEFAULT_PATH, encoding="utf-8") as fh:
+        return Profiles(dict(json.load(fh), events=events))
+
+
+def event(name, end_time, lat=13.75, lng=100.55, people="10,000", fare_range="300-500", date=None):
+    e = {"name": name, "event": name, "end_time": end_time, "people": people, "fare_range": fare_range,
+         "icon": "🎫", "lat": lat, "lng": lng}
+    if date:
+        e["date"] = date
+    return e
+
+
+def test_radar_matches_a_full_scan():
+    rng = random.Random(3)
+    events = [event(f"E{i}", f"{rng.randrange(24):02}:{rng.randrange(60):02}", rng.uniform(13.5, 14.0), rng.uniform(100.3, 100.9),
+                    date=None if i % 10 == 0 else f"2026-01-{rng.randrange(1, 8):02}") for i in range(2000)]
+    index = compiled(events).event_index
+    for _ in range(50):
+        now_abs = now_minute(datetime(2026, 1, 1)) + rng.randrange(7 * 24 * 60)
+        lat, lng, within, radius = rng.uniform(13.5, 14.0), rng.uniform(100.3, 100.9), rng.choice([30, 90, 180]), rng.choice([2, 8, 20])
+        expected = set()
+        for e in index.events:
+            end = day_minute(e["date"]) + e["end_minute"] if e.get("date") else anchor(e["end_minute"], now_abs)
+            if now_abs - 30 <= end <= now_abs + within and haversine_km(lat, lng, e["lat"], e["lng"]) <= radius:
+                expected.add(e["name"])
+        assert {e["name"] for _, _, _, e in index.radar(now_abs, within, lat, lng, radius)} == expected
+
+
+def test_daily_events_wrap_midnight_and_stay_while_the_crowd_leaves():
+    index = compiled([event("late", "00:15"), event("over", "23:20"), event("tomorrow", "23:59", date="2026-01-18")]).event_index
+    now_abs = now_minute(datetime(2026, 1, 17, 23, 45))
+    found = {e["name"]: end - now_abs for _, end, _, e in index.radar(now_abs, 60)}
+    assert found == {"late": 30, "over": -25}
+
+
+def test_score_weighs_crowd_and_fare_against_distance():
+    index = compiled([
+        event("small fair", "21:00", people="1,000", fare_range="400-600"),
+        event("stadium", "21:00", people="60,000", fare_range="300-500", lat=13.80),
+        event("far stadium", "21:00", people="60,000", fare_range="300-500", lat=14.2),
+    ]).event_index
+    now_abs = now_minute(datetime(2026, 1, 17, 20, 40))
+    ranked = [e["name"] for _, _, _, e in index.radar(now_abs, 60, 13.75, 100.55, 30)]
+    assert ranked == ["stadium", "small fair"]  # "far stadium" is outside 30 km
+
+
+def test_events_endpoint_filters_by_time_and_radius(monkeypatch):
+    profiles = compiled([event("now", "20:50"), event("later", "23:00"), event("far", "20:50", lat=14.5)])
+    monkeypatch.setattr(web.PROFILES, "current", lambda: profiles)
+    now = datetime(2026, 1, 17, 20, 40)
+    alerts = web.get_city_alerts(13.75, 100.55, within=30, radius_km=20, now=now)
+    assert [(a["name"], a["end_at"] - now.timestamp()) for a in alerts] == [("now", 600)]
+    assert alerts[0]["note"] == "ห่าง 0.0 กม." and alerts[0]["distance"] == "0.0 km"
+    later = web.get_city_alerts(13.75, 100.55, within=30, radius_km=20, now=datetime(2026, 1, 17, 20, 45))
+    assert web.content_etag({"city_alerts": later}) == web.content_etag({"city_alerts": alerts})  # no per-minute churn
+    data = web.app.test_client().get('/api/events?lat=13.75&lng=100.55&within=1400&radius=20').get_json()
+    assert sorted(e["name"] for e in data["events"]) == ["later", "now"]
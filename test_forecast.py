@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import numpy as np
+
+from advisor.core import Flight
+from advisor.forecast import FlowForecast, delay_kernel, peak_window
+from advisor.profiles import load
+from advisor.timeline import now_minute
+from advisor.zones import ZoneResolver
+
+FLIGHT_PROFILE = load().zones
+
+NOW = now_minute(datetime(2026, 1, 17, 18, 0))
+
+
+def flight(number, arrival, origin="London", terminal=None, date=None):
+    return Flight.from_dict({"flight_number": number, "origin": origin, "arrival_time": arrival, "terminal": terminal, "date": date})
+
+
+def test_kernel_is_a_distribution_around_the_delay():
+    k = delay_kernel(50)
+    assert abs(k.sum() - 1) < 1e-9
+    assert 45 <= int(np.argmax(k)) <= 50
+
+
+def test_passengers_are_conserved_and_split_by_terminal():
+    fc = FlowForecast(FLIGHT_PROFILE, ZoneResolver(FLIGHT_PROFILE), passengers=200)
+    fc.update([flight("BA9", "18:10", terminal="1"), flight("EK1", "18:20", "Dubai", terminal="2"), flight("SQ1", "18:00", "Singapore")], NOW)
+    curve = fc.curve(NOW, 240)
+    assert abs(curve["total"].sum() - 400) < 1e-6
+    assert set(curve["terminals"]) == {"1", "2"}
+    start, passengers = peak_window(curve["total"], 15)
+    assert 50 <= start <= 90 and passengers > 0
+
+
+def test_incremental_update_tracks_changes():
+    fc = FlowForecast(FLIGHT_PROFILE, ZoneResolver(FLIGHT_PROFILE), passengers=100)
+    flights = [flight("BA9", "18:10"), flight("LH1", "18:30", "Frankfurt")]
+    assert fc.update(flights, NOW)
+    assert not fc.update(flights, NOW)  # same list object: nothing to do
+    assert not fc.update(list(flights), NOW)  # same content
+    first = fc.curve(NOW, 240)["total"].copy()
+    assert fc.update([flight("BA9", "19:10")], NOW)
+    second = fc.curve(NOW, 240)["total"]
+    assert abs(second.sum() - 100) < 1e-6
+    assert 110 <= np.argmax(second) <= 125 and np.argmax(first) < 90
+
+
+def test_dated_flights_land_on_their_own_day():
+    fc = FlowForecast(FLIGHT_PROFILE, ZoneResolver(FLIGHT_PROFILE), passengers=100)
+    fc.update([flight("BA9", "18:10", date="2026-01-16"), flight("BA9", "18:10", date="2026-01-17"),
+               flight("BA9", "18:10", date="2026-01-18")], NOW)
+    assert abs(fc.curve(NOW, 240)["total"].sum() - 100) < 1e-6  # yesterday's run is gone, tomorrow's is past the horizon
+    assert len(fc._flights) == 2
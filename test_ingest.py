@@ -0,0 +1,134 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from advisor.ingest import FlightStore, ingest, parse_page, parse_record
+from advisor.upstream import MAX_WORKERS, Source, UpstreamError, gather
+
+
+def record(number, scheduled="2026-01-17T18:25:00+00:00", actual=None, status="scheduled", origin="Dubai", iata="DXB"):
+    return {"airline": {"name": "Emirates"}, "flight": {"iata": number}, "flight_status": status,
+            "departure": {"airport": origin, "iata": iata},
+            "arrival": {"scheduled": scheduled, "actual": actual, "terminal": "1"}}
+
+
+def test_parse_record_slices_times_and_tolerates_missing_sections():
+    f = parse_record(record("EK372", actual="2026-01-17T18:41:00+00:00", status="landed"))
+    assert f == {"airline": "Emirates", "flight_number": "EK372", "origin": "Dubai", "origin_iata": "DXB", "terminal": "1",
+                 "arrival_time": "18:25", "actual_time": "18:41", "status": "landed", "date": "2026-01-17"}
+    bare = parse_record({"flight_status": "active", "airline": None})
+    assert bare["airline"] == "Unknown" and bare["arrival_time"] == "00:00" and bare["date"] is None
+
+
+def test_parse_page_reads_total_and_raises_on_api_errors():
+    records, total = parse_page({"pagination": {"total": 250}, "data": [record("EK372"), None]})
+    assert len(records) == 1 and total == 250
+    with pytest.raises(UpstreamError):
+        parse_page({"error": {"code": "usage_limit_reached"}})
+
+
+def fake_feed(totals, fail=()):
+    calls = []
+
+    def fetch(source):
+        airport, offset, limit = source.params["arr_iata"], source.params["offset"], source.params["limit"]
+        calls.append((airport, offset))
+        if (airport, offset) in fail:
+            raise UpstreamError("boom")
+        data = [record(f"{airport}{i}") for i in range(offset, min(offset + limit, totals[airport]))]
+        return source.parse({"pagination": {"total": totals[airport]}, "data": data})
+    return fetch, calls
+
+
+def test_ingest_pages_every_airport():
+    fetch, calls = fake_feed({"BKK": 250, "DMK": 40})
+    result = ingest(Source("flights", "http://x", params={"access_key": "k"}), ["BKK", "DMK"], fetch=fetch)
+    assert [f["flight_number"] for f in result["flights"]["BKK"]] == [f"BKK{i}" for i in range(250)]
+    assert len(result["flights"]["DMK"]) == 40
+    assert result["complete"] == ["BKK", "DMK"] and result["errors"] == {}
+    assert sorted(calls) == [("BKK", 0), ("BKK", 100), ("BKK", 200), ("DMK", 0)] and result["calls"] == 4
+
+
+def test_ingest_reports_partial_airports():
+    fetch, _ = fake_feed({"BKK": 250, "DMK": 40}, fail={("BKK", 100), ("DMK", 0)})
+    result = ingest(Source("flights", "http://x"), ["BKK", "DMK"], fetch=fetch, max_pages=2)
+    assert len(result["flights"]["BKK"]) == 100 and "DMK" not in result["flights"]
+    assert result["complete"] == [] and set(result["errors"]) == {"DMK", "BKK@100"}
+
+
+def test_ingest_inside_every_upstream_worker_does_not_starve_the_pool():
+    fetch, _ = fake_feed({"BKK": 250, "DMK": 40})
+    slow = lambda source: time.sleep(0.01) or fetch(source)
+    sections = {i: (lambda: ingest(Source("flights", "http://x"), ["BKK", "DMK"], fetch=slow, timeout=5))
+                for i in range(MAX_WORKERS)}  # like concurrent /api/dashboard flights sections
+    start = time.monotonic()
+    results, errors = gather(sections, timeout=10)
+    assert errors == {} and all(r["complete"] == ["BKK", "DMK"] for r in results.values())
+    assert time.monotonic() - start < 3
+
+
+def test_store_merges_incrementally():
+    store = FlightStore()
+    first = [parse_record(record(n)) for n in ("TG1", "TG2", "TG3")]
+    assert store.merge("BKK", first) == {"added": 3, "changed": 0, "removed": 0, "unchanged": 0}
+    listed = store.flights("BKK")
+    assert store.merge("BKK", [dict(f) for f in first])["unchanged"] == 3
+    assert store.flights("BKK") is listed  # nothing changed, same list for the timeline
+    landed = parse_record(record("TG2", actual="2026-01-17T18:30:00+00:00", status="landed"))
+    assert store.merge("BKK", [first[0], landed]) == {"added": 0, "changed": 1, "removed": 1, "unchanged": 1}
+    assert [f.to_dict() for f in store.flights("BKK")] == [first[0], landed]
+    assert store.merge("BKK", [], complete=False)["removed"] == 0 and len(store) == 2
+
+
+def test_store_drops_cancelled_and_keeps_each_date_of_a_flight():
+    store = FlightStore()
+    today = parse_record(record("TG1"))
+    tomorrow = parse_record(record("TG1", scheduled="2026-01-18T18:25:00+00:00"))
+    assert store.merge("BKK", [today, tomorrow])["added"] == 2
+    assert len({f.key for f in store.flights("BKK")}) == 2  # distinct timeline/forecast keys
+    cancelled = parse_record(record("TG1", status="cancelled"))
+    assert store.merge("BKK", [cancelled, tomorrow], complete=False) == {"added": 0, "changed": 0, "removed": 1, "unchanged": 1}
+    assert store.merge("BKK", [parse_record(record("TG9", status="diverted"))], complete=False)["added"] == 0
+    assert [f.date for f in store.flights("BKK")] == ["2026-01-18"]
+
+
+def test_api_serves_each_airport_from_the_store(monkeypatch):
+    import api.index as web
+    stamp = lambda minutes: (datetime.now() + timedelta(minutes=minutes)).strftime("%Y-%m-%dT%H:%M:00+00:00")
+    result = {"flights": {"BKK": [parse_record(record("EK372", scheduled=stamp(30))),
+                                  parse_record(record("EK384", scheduled=stamp(-180))),  # its passengers left long ago
+                                  parse_record(record("EK370", scheduled=stamp(40), status="cancelled"))],
+                          "DMK": [parse_record(record(f"FD{i}", origin="Yangon", iata="RGN")) for i in range(3)]},
+              "complete": ["BKK", "DMK"], "errors": {}, "calls": 2}
+    monkeypatch.setattr(web, "USE_DEMO_DATA", False)
+    monkeypatch.setattr(web, "fetch_source", lambda name: result)
+    client = web.app.test_client()
+    dmk = client.get('/api/flights?airport=dmk').get_json()
+    assert dmk["airport"] == "DMK" and dmk["total_flights"] == 3 and dmk["alerts"] == []
+    bkk = client.get('/api/flights').get_json()
+    assert bkk["airport"] == "BKK" and bkk["total_flights"] == 2 and [a["flight"] for a in bkk["alerts"]] == ["EK372"]
+    bad = client.get('/api/flights?airport=XXX')
+    assert bad.status_code == 400 and "DMK" in bad.get_json()["airports"]
+
+
+def test_production_never_serves_demo_flights(monkeypatch):
+    import api.index as web
+    from advisor.timeline import ExitTimeline
+    monkeypatch.setattr(web, "USE_DEMO_DATA", False)
+    monkeypatch.setattr(web, "FLIGHT_STORE", FlightStore())
+    monkeypatch.setattr(web, "FLIGHT_FEED_DOWN", set())
+    monkeypatch.setitem(web.TIMELINES, "BKK", ExitTimeline())
+    monkeypatch.setattr(web, "demo_flights", lambda *a, **k: pytest.fail("demo flights in production"))
+    monkeypatch.setattr(web, "fetch_source", lambda name: None)  # cold cache / failed ingest
+    client = web.app.test_client()
+    data = client.get('/api/flights').get_json()
+    assert data["alerts"] == [] and data["total_flights"] == 0 and data["flight_feed"] == "unavailable"
+    assert client.get('/api/dashboard?sections=flights').get_json()["flights"]["flight_feed"] == "unavailable"
+
+    result = {"flights": {"BKK": [parse_record(record("EK372"))]}, "complete": ["BKK"], "errors": {}, "calls": 1}
+    monkeypatch.setattr(web, "fetch_source", lambda name: result)
+    assert client.get('/api/flights').get_json()["flight_feed"] is None
+    monkeypatch.setattr(web, "fetch_source", lambda name: None)
+    data = client.get('/api/flights').get_json()
+    assert data["total_flights"] == 1 and data["flight_feed"] == "stale"
@@ -1,71 +1,38 @@
-import math
+from datetime import datetime
 
-# --- 1. MOCK DATA (Copy from app.py) ---
-EVENT_LOCATIONS = [
-    {
-        "name": "Impact Arena",
-        "fare_min": 300,
-        "fare_max": 500,
-        "lat": 13.911,
-        "lng": 100.550
-    },
-    {
-        "name": "BITEC Bangna",
-        "fare_min": 200,
-        "fare_max": 400,
-        "lat": 13.669,
-        "lng": 100.610
-    },
-    {
-        "name": "Rajamangala Stadium",
-        "fare_min": 400,
-        "fare_max": 800,
-        "lat": 13.755,
-        "lng": 100.622
-    }
-]
+from advisor.core import PROFILES, Flight, analyze, parse_minute
+from advisor.scoring import FUEL_COST_PER_KM, expected_fare, rank
 
-# --- 2. LOGIC FUNCTIONS ---
-def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in km
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = math.sin(dlat / 2) * math.sin(dlat / 2) + \
-        math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
-        math.sin(dlon / 2) * math.sin(dlon / 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+# --- 1. LOGIC FUNCTIONS ---
+# Events, zones and the golden window come from advisor.core (same data as the web app and CLI)
+# Distance/score math lives in advisor.scoring (same engine as /api/flights)
+EVENT_LOCATIONS = PROFILES.current().events
 
 def get_recommendation(driver_name, driver_lat, driver_lng):
     print(f"\n🚙 Driver: {driver_name} (Lat: {driver_lat}, Lng: {driver_lng})")
     print("-" * 50)
     
-    scored_events = []
-    for event in EVENT_LOCATIONS:
-        dist = calculate_distance(driver_lat, driver_lng, event['lat'], event['lng'])
-        
-        # Logic: Avg Fare - (Distance * 5 Baht fuel/depreciation)
-        avg_fare = (event['fare_min'] + event['fare_max']) / 2
-        fuel_cost = dist * 5
-        score = avg_fare - fuel_cost
-        
-        scored_events.append({
-            "name": event['name'],
-            "distance": dist,
-            "avg_fare": avg_fare,
-            "fuel_cost": fuel_cost,
-            "score": score
-        })
+    # Logic: Avg Fare x crowd demand - (Distance * 5 Baht fuel/depreciation), sorted by Score (Highest first)
+    ranked = rank([(driver_lat, driver_lng)], EVENT_LOCATIONS)[0]
     
-    # Sort by Score (Highest first)
-    scored_events.sort(key=lambda x: x['score'], reverse=True)
-    
-    for i, res in enumerate(scored_events, 1):
-        print(f"{i}. {res['name']}")
-        print(f"   📏 Dist: {res['distance']:.1f} km | ⛽ Cost: {res['fuel_cost']:.0f}฿ | 💰 Fare: {res['avg_fare']:.0f}฿")
-        print(f"   ⭐ Score: {res['score']:.1f} (Profit Potential)")
+    for i, (idx, score, dist) in enumerate(ranked, 1):
+        event = EVENT_LOCATIONS[idx]
+        fare = expected_fare(event)  # demand-weighted, so Fare - Cost == Score
+        fuel_cost = dist * FUEL_COST_PER_KM
+        print(f"{i}. {event['name']}")
+        print(f"   📏 Dist: {dist:.1f} km | ⛽ Cost: {fuel_cost:.0f}฿ | 💰 Fare: {fare:.0f}฿ (x{event['demand']:.2f} demand)")
+        print(f"   ⭐ Score: {score:.1f} (Profit Potential)")
+    return ranked
+
+def get_golden_windows(now, flights):
+    print(f"\n✈️ Golden windows at {now:%H:%M}")
+    print("-" * 50)
+    alerts = analyze(flights, now)
+    for a in alerts:
+        print(f"{a['icon']} {a['flight']} ({a['origin']}) 🛬 {a['land_time']} --> 🚶 {a['exit_time']} | 💸 {a['fare_range']}฿")
+    return alerts
 
-# --- 3. SCENARIOS ---
+# --- 2. SCENARIOS ---
 
 # Scenario A: Rama 2 (Central Rama 2 approx)
 get_recommendation("Driver @ Rama 2", 13.627, 100.415)
@@ -75,3 +42,13 @@ get_recommendation("Driver @ Lat Krabang", 13.723, 100.778)
 
 # Scenario C: Rangsit (Near Impact)
 get_recommendation("Driver @ Rangsit", 13.98, 100.61)
+
+# Scenario D: late-evening arrivals, exits spill past midnight
+alerts = get_golden_windows(datetime(2026, 1, 17, 23, 0), [
+    Flight("China Eastern", "MU541", "Shanghai", parse_minute("23:50")),
+    Flight("Lufthansa", "LH772", "Frankfurt International Airport", parse_minute("22:15")),
+    Flight("Thai AirAsia", "FD3012", "Phuket", parse_minute("23:30")),
+])
+assert [a['flight'] for a in alerts] == ["LH772", "MU541"]
+assert [a['exit_time'] for a in alerts] == ["23:05", "01:05"]
+assert alerts[1]['exit_at'] - alerts[0]['exit_at'] == 120 * 60  # absolute: 01:05 sorts after 23:05 on the client too
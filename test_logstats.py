@@ -0,0 +1,47 @@
+import io
+import os
+import random
+
+from advisor.logstats import Histogram, analyze, path_of, traceback_signature
+
+HEADER = "TimeUTC,timestampInMs,requestPath,responseStatusCode,level,type,vercelCache,deploymentId,durationMs,maxMemoryUsed,memorySize,message,instanceId\n"
+
+
+def test_histogram_percentiles_are_close():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(3, 1) for _ in range(20000)]
+    h = Histogram()
+    for v in values:
+        h.add(v)
+    values.sort()
+    for q in (50, 95, 99):
+        exact = values[int(q / 100 * len(values)) - 1]
+        assert abs(h.percentile(q) - exact) / exact < 0.02
+
+
+def test_repo_export():
+    with open(os.path.join(os.path.dirname(__file__), "logs_result.csv"), newline="", encoding="utf-8") as fh:
+        summary = analyze(fh)
+    root = summary["paths"]["/"]
+    assert root["errors_5xx"] == 7 and root["cold_ms"]["count"] == 2
+    assert root["cold_ms"]["p50"] > 10 * root["warm_ms"]["p50"]
+    assert root["memory"]["memory_size_mb"] == 2048
+    [tb] = summary["tracebacks"]
+    assert tb["exception"] == "jinja2.exceptions.TemplateNotFound: index.html"
+    assert tb["where"].endswith("index.py:218 in index")
+
+
+def test_multiline_messages_and_cold_starts():
+    traceback = 'Traceback (most recent call last):\n  File "/var/task/api/index.py", line {0}, in f\n    x()\nKeyError: \'k\''
+    csv_text = HEADER
+    csv_text += f'2026-01-17 18:00:02,2000,app.vercel.app/api/flights,500,error,serverless,,d1,,,,"{traceback.format(10)}",\n'
+    csv_text += f'2026-01-17 18:00:03,3000,app.vercel.app/api/flights,500,error,serverless,,d1,,,,"{traceback.format(10)}",\n'
+    csv_text += "2026-01-17 18:00:02,2000,app.vercel.app/api/flights,500,,serverless,,d1,40,300,1024,,i1\n"
+    csv_text += "2026-01-17 18:00:01,1000,app.vercel.app/api/flights,200,,serverless,,d1,900,250,1024,,i1\n"
+    summary = analyze(io.StringIO(csv_text))
+    flights = summary["paths"]["/api/flights"]
+    assert flights["cold_ms"]["max"] == 900 and flights["warm_ms"]["count"] == 1
+    assert flights["error_rate_5xx"] == 0.5 and flights["memory"]["min_headroom_mb"] == 724
+    assert summary["tracebacks"][0]["count"] == 2
+    assert traceback_signature("plain message") is None
+    assert path_of("host.app/api/x") == "/api/x" and path_of("https://h/a") == "/a"
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from advisor import metrics
+from advisor.metrics import REGISTRY, SamplingProfiler, stage
+from advisor.upstream import Source, UpstreamError, fetch_json
+from api.index import app
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_server_timing_and_metrics_endpoint(client):
+    response = client.get("/api/flights?lat=13.75&lng=100.5")
+    names = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+    assert names == ["flights", "analyze", "scoring", "serialize", "total"]
+    body = client.get("/metrics").data.decode()
+    assert 'smart_taxi_stage_seconds_count{stage="scoring"}' in body
+    assert 'smart_taxi_request_seconds_bucket{endpoint="get_flights",status="200",le="+Inf"}' in body
+    assert "smart_taxi_cache_size" in body
+
+
+def test_disabled_is_a_shared_noop(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    before = metrics.STAGE_SECONDS.count("disabled")
+    assert stage("disabled") is stage("other")
+    with stage("disabled"):
+        pass
+    assert metrics.STAGE_SECONDS.count("disabled") == before
+    metrics.begin_request()
+    assert metrics.end_request("x", 200) is None
+
+
+class FakeResponse:
+    def __init__(self, status, data=None):
+        self.status_code, self._data = status, data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def get(self, url, params=None, timeout=None):
+        return self.responses.pop(0)
+
+
+def test_upstream_outcomes_are_counted():
+    source = Source("metrics-test", "http://x", retries=1)
+    fetch_json(source, FakeSession(FakeResponse(503), FakeResponse(200, {"ok": 1})), sleep=lambda s: None)
+    with pytest.raises(UpstreamError):
+        fetch_json(source, FakeSession(FakeResponse(502), FakeResponse(503)), sleep=lambda s: None)
+    assert metrics.UPSTREAM_CALLS.value("metrics-test", "ok") == 1
+    assert metrics.UPSTREAM_CALLS.value("metrics-test", "http_503") == 2
+    assert metrics.UPSTREAM_SECONDS.count("metrics-test") == 4
+    assert 'smart_taxi_upstream_requests_total{source="metrics-test",outcome="http_502"} 1' in REGISTRY.render()
+
+
+def busy_loop_for_profiler(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_folds_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop_for_profiler, args=(stop,))
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001).start()
+    time.sleep(0.2)
+    profiler.stop()
+    stop.set()
+    worker.join()
+    folded = profiler.folded()
+    assert profiler.samples > 0
+    assert any("busy_loop_for_profiler" in line and line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
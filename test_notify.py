@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+import taxi_advisor
+from advisor.core import Flight
+from advisor.notify import Dispatcher, TokenBucket, token_id
+
+
+class NotifyStub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received = []  # (token, message) of every accepted post
+    attempts = {}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        token = self.headers["Authorization"].split()[-1]
+        body = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        with NotifyStub.lock:
+            n = NotifyStub.attempts[token] = NotifyStub.attempts.get(token, 0) + 1
+        if token == "bad":
+            return self._send(401, headers={})
+        if token == "busy" and n < 3:
+            return self._send(429, headers={"Retry-After": "0"})
+        if token == "flaky" and n < 2:
+            return self._send(503, headers={})
+        with NotifyStub.lock:
+            NotifyStub.received.append((token, body["message"][0]))
+        self._send(200, headers={})
+
+    def _send(self, status, headers):
+        payload = b'{"status":%d}' % status
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    NotifyStub.received, NotifyStub.attempts = [], {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NotifyStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/api/notify"
+    server.shutdown()
+
+
+def test_token_bucket_spaces_calls_beyond_the_burst():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    now[0] = 2.0
+    assert bucket.reserve() == 0.0
+
+
+def test_dispatch_retries_skips_bad_tokens_and_dedupes(stub):
+    sleeps = []
+    dispatcher = Dispatcher(url=stub, rate=1000, per_token_rate=1000, backoff=0.01, sleep=sleeps.append)
+    messages = {f"driver{i}": f"report for zone {i % 3}" for i in range(30)}
+    messages.update(busy="hello", flaky="hello", bad="hello")
+    results = dispatcher.dispatch(messages.items())
+    assert results["busy"] == "sent" and results["flaky"] == "sent" and results["bad"] == "failed: HTTP 401"
+    assert sorted(NotifyStub.received) == sorted((t, m) for t, m in messages.items() if t != "bad")
+    assert NotifyStub.attempts["busy"] == 3 and NotifyStub.attempts["bad"] == 1
+    again = dispatcher.dispatch(dict(messages, driver0="updated").items())
+    assert again["driver0"] == "sent" and again["driver1"] == "duplicate" and again["bad"] == "failed: HTTP 401"
+    assert dispatcher.stats["sent"] == 33 and dispatcher.stats["duplicate"] == 31
+    assert "driver0" not in dispatcher.last_sent and dispatcher.last_sent[token_id("driver0")]  # no raw tokens to persist
+
+
+def test_per_token_rate_limit_delays_repeat_posts(stub):
+    sleeps = []
+    dispatcher = Dispatcher(url=stub, rate=1000, per_token_rate=0.5, per_token_burst=1, sleep=sleeps.append)
+    for i in range(3):
+        assert dispatcher.send("driver", f"message {i}") == "sent"
+    assert sleeps[0] == 0 and sleeps[1] > 1.5 and sleeps[2] > 3.5  # the fake sleep never waits, so debt piles up
+
+
+def test_report_renders_each_flight_once_per_cycle(monkeypatch):
+    alerts = taxi_advisor.find_alerts([
+        Flight("Emirates", "EK372", "Dubai", 18 * 60),
+        Flight("Lufthansa", "LH772", "Frankfurt", 17 * 60 + 30),
+        Flight("AirAsia", "FD1", "Phuket", 17 * 60),
+    ], datetime(2026, 1, 17, 17, 0))
+    rendered = []
+    render = taxi_advisor.render_alert
+    monkeypatch.setattr(taxi_advisor, "render_alert", lambda item: rendered.append(item["flight"]) or render(item))
+    report = taxi_advisor.Report(alerts, count=3)
+    europe = report.message(["Europe"])
+    assert "Lufthansa" in europe and "Emirates" not in europe and "ทั้งหมด 1 ลำ" in europe
+    assert report.message(["Europe"]) is europe
+    both = report.message(["MiddleEast", "Europe"])
+    assert both.index("Lufthansa") < both.index("Emirates") and "ออกรถเลย! เพื่อไปถึงหน้างานตอน 18:20" in both
+    assert "Low Fare" in report.message(["China"])
+    assert sorted(rendered) == ["EK372", "LH772"]
@@ -0,0 +1,118 @@
+import threading
+from datetime import datetime
+
+from advisor.cache import TTLCache
+from advisor.prefetch import MAX_INTERVAL, MIN_INTERVAL, Job, Prefetcher, QuotaBudget, adaptive_interval, weighted_hours
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def at(*args):
+    return datetime(*args).timestamp()
+
+
+def test_quota_never_runs_ahead_of_the_monthly_pace(tmp_path):
+    budget = QuotaBudget(1000, path=str(tmp_path / "q.sqlite3"), reserve=0.0, burst=0.01)
+    now = at(2026, 3, 1, 0, 30)
+    spent = sum(budget.try_spend(now=now) for _ in range(50))
+    assert 10 <= spent < 15  # the 1% burst plus the first half hour's share
+    assert budget.used(now) == spent
+    # next month starts from zero
+    assert budget.try_spend(now=at(2026, 4, 1, 0, 30)) and budget.used(at(2026, 4, 2)) == 1
+
+
+def test_quota_interval_is_shorter_at_the_evening_peak(tmp_path):
+    budget = QuotaBudget(3000, path=str(tmp_path / "q.sqlite3"))
+    peak, night = budget.interval(at(2026, 3, 10, 20)), budget.interval(at(2026, 3, 10, 3))
+    assert MIN_INTERVAL <= peak < night <= MAX_INTERVAL
+    assert abs(night / peak - 10) < 0.5
+    assert weighted_hours(at(2026, 3, 10), at(2026, 3, 11)) > 24
+
+
+def test_adaptive_interval_follows_hourly_weight():
+    interval = adaptive_interval(600)
+    assert interval(at(2026, 3, 10, 12)) == 600
+    assert interval(at(2026, 3, 10, 19)) == 200
+    assert interval(at(2026, 3, 10, 3)) == 2000
+
+
+def test_jobs_refresh_before_expiry_and_back_off_on_failure(tmp_path):
+    clock = FakeClock(at(2026, 3, 10, 12))
+    cache = TTLCache(ttl=60, clock=clock)
+    calls = []
+    fail = [False]
+
+    def fetch():
+        calls.append(clock.now)
+        if fail[0]: raise RuntimeError("down")
+        return ["TG100"]
+
+    budget = QuotaBudget(10000, path=str(tmp_path / "q.sqlite3"), clock=clock)
+    prefetcher = Prefetcher(cache, [Job("flights", fetch, lambda now: 600, budget=budget, lead=60, retry=30)], clock=clock)
+    assert prefetcher.run_due() == {"flights": "refreshed"}
+    assert cache.peek("flights") == ["TG100"] and round(cache.expires_in("flights")) == 660
+    clock.now += 500
+    assert prefetcher.run_due() == {}  # 160 s left, not due yet
+    clock.now += 120
+    fail[0] = True
+    assert prefetcher.run_due()["flights"].startswith("error")
+    assert cache.peek("flights") == ["TG100"]  # still served until it expires
+    clock.now += 10
+    assert prefetcher.run_due() == {}  # backing off
+    clock.now += 30
+    fail[0] = False
+    assert prefetcher.run_due() == {"flights": "refreshed"}
+    assert len(calls) == 3 and budget.used() == 3
+
+
+def test_requests_read_the_cache_while_the_thread_refreshes():
+    cache = TTLCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_fetch():
+        started.set()
+        release.wait(5)
+        return ["TG100"]
+
+    prefetcher = Prefetcher(cache, [Job("flights", slow_fetch, lambda now: 600)], tick=0.01).start()
+    try:
+        assert started.wait(5)
+        assert cache.peek("flights") is None  # a request mid-refresh gets no data, not a wait
+        release.set()
+        for _ in range(500):
+            if cache.peek("flights"): break
+            threading.Event().wait(0.01)
+        assert cache.peek("flights") == ["TG100"]
+        assert prefetcher.status()["flights"]["last"]["outcome"] == "refreshed"
+    finally:
+        prefetcher.stop()
+
+
+def test_cold_cache_fill_spends_one_call_for_concurrent_requests(tmp_path):
+    clock = FakeClock(at(2026, 3, 10, 12))
+    cache = TTLCache(ttl=60, clock=clock)
+    calls = []
+
+    def fetch():
+        calls.append(clock.now)
+        threading.Event().wait(0.05)
+        return ["TG100"]
+
+    budget = QuotaBudget(10000, path=str(tmp_path / "q.sqlite3"), clock=clock)
+    prefetcher = Prefetcher(cache, [Job("flights", fetch, lambda now: 600, budget=budget)], clock=clock)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(prefetcher.fill("flights"))) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert results == [["TG100"]] * 4 and len(calls) == 1 and budget.used() == 1
+
+    misses = []
+    empty = Prefetcher(TTLCache(ttl=60, clock=clock), [Job("flights", lambda: misses.append(1), lambda now: 600, retry=60)], clock=clock)
+    assert empty.fill("flights") is None and empty.fill("flights") is None
+    assert len(misses) == 1 and empty.jobs["flights"].last[1] == "empty"  # no retry per request before job.retry
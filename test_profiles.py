@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pytest
+
+import api.index as web
+from advisor.core import Flight, analyze
+from advisor.profiles import DEFAULT_PATH, ProfileSource, load
+from advisor.timeline import ExitTimeline, now_minute
+
+NOW = datetime(2026, 1, 17, 18, 0)
+
+
+@pytest.fixture
+def profile_file(tmp_path):
+    path = tmp_path / "profiles.json"
+    shutil.copy(DEFAULT_PATH, path)
+    return path
+
+
+def rewrite(path, edit):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    edit(data)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    stamp = path.stat().st_mtime_ns + 10**9  # a visibly newer mtime even on coarse filesystems
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_compiled_snapshot_is_read_only_and_parsed_once():
+    profiles = load()
+    assert profiles.alert_fields["Europe"]["fare_min"] == 500 and profiles.alert_fields["Europe"]["fare_max"] == 800
+    assert all(isinstance(e["fare_min"], int) for e in profiles.events)
+    assert profiles.resolver("Frankfurt International") == "Europe"
+    with pytest.raises(TypeError):
+        profiles.events[0]["fare_min"] = 0
+    with pytest.raises(TypeError):
+        profiles.zones["Europe"]["exit_delay"] = 0
+    web.get_city_alerts(13.75, 100.55)
+    assert not any("distance" in e for e in web.PROFILES.current().events)
+
+
+def test_source_reloads_on_change_and_keeps_the_last_good_version(profile_file):
+    now = [0.0]
+    source = ProfileSource(str(profile_file), check_interval=5, clock=lambda: now[0])
+    first = source.current()
+    rewrite(profile_file, lambda d: d["zones"]["Europe"].update(fare_range="600-900") or d.update(version=2))
+    assert source.current() is first  # not re-checked within check_interval
+    now[0] = 5.0
+    second = source.current()
+    assert second.version == 2 and second.alert_fields["Europe"]["fare_min"] == 600 and source.reloads == 1
+    now[0] = 10.0
+    assert source.current() is second  # unchanged file: nothing re-parsed
+    rewrite(profile_file, lambda d: d["zones"]["Europe"].update(fare_range="cheap"))
+    now[0] = 15.0
+    assert source.current() is second and "fare_range" in source.status()["error"]
+    rewrite(profile_file, lambda d: d["zones"]["Europe"].update(exit_delay=0))  # delay_kernel(0) would fail later
+    now[0] = 20.0
+    assert source.current() is second and "exit_delay" in source.status()["error"]
+
+
+def test_reload_rebuilds_the_timeline_once(profile_file, monkeypatch):
+    source = ProfileSource(str(profile_file), check_interval=0)
+    monkeypatch.setattr(web, "PROFILES", source)
+    monkeypatch.setitem(web.TIMELINES, web.AIRPORT_CODE, ExitTimeline())
+    flights = [Flight("Lufthansa", "LH772", "Frankfurt", 17 * 60 + 30), Flight("AirAsia", "FD1", "Phuket", 17 * 60)]
+    alerts, _ = web.analyze_flights(flights, NOW)
+    assert [a["fare_range"] for a in alerts] == ["500-800"]
+    rewrite(profile_file, lambda d: d["zones"]["Europe"].update(fare_range="600-900", exit_delay=40))
+    alerts, _ = web.analyze_flights(flights, NOW)
+    assert [(a["fare_range"], a["exit_time"]) for a in alerts] == [("600-900", "18:10")]
+    assert analyze(flights, NOW, source.current()) == alerts
+    assert web.TIMELINES[web.AIRPORT_CODE].update(flights, source.current().build_alert, now_minute(NOW),
+                                                  version=source.current())["unchanged"] == 1
@@ -0,0 +1,42 @@
+import json
+from datetime import datetime
+
+import numpy as np
+
+from advisor.geo import haversine_km
+from advisor.profiles import DEFAULT_PATH, Profiles
+from advisor.scoring import distance_matrix, rank, top_k
+from advisor.timeline import now_minute
+
+
+def test_distance_matrix_matches_scalar_haversine():
+    drivers = [(13.627, 100.415), (13.98, 100.61)]
+    venues = [(13.911, 100.550), (13.669, 100.610), (13.755, 100.622)]
+    dist = distance_matrix(drivers, venues)
+    assert dist.shape == (2, 3)
+    for r, d in enumerate(drivers):
+        for c, v in enumerate(venues):
+            assert abs(dist[r, c] - haversine_km(*d, *v)) < 1e-9
+
+
+def test_top_k_orders_best_first():
+    scores = np.array([[1.0, 5.0, 3.0, 4.0], [9.0, 0.0, 2.0, 8.0]])
+    assert top_k(scores, 2).tolist() == [[1, 3], [0, 3]]
+    assert top_k(scores, 10).tolist() == [[1, 3, 2, 0], [0, 3, 2, 1]]
+
+
+def test_rank_scores_avg_fare_minus_fuel():
+    items = [{"lat": 13.7, "lng": 100.5, "fare_min": 300, "fare_max": 500}]
+    [[(idx, score, dist)]] = rank([(13.7, 100.5)], items)
+    assert idx == 0 and dist == 0 and score == 400
+
+
+def test_single_driver_radar_scores_like_the_fleet_engine():
+    with open(DEFAULT_PATH, encoding="utf-8") as fh:
+        index = Profiles(json.load(fh)).event_index
+    driver = (13.75, 100.55)
+    found = index.radar(now_minute(datetime(2026, 1, 17, 18, 0)), 24 * 60, *driver, 100)
+    items = [e for _, _, _, e in found]
+    [ranked] = rank([driver], items)
+    assert len(ranked) == len(items) > 0
+    assert all(abs(score - found[i][0]) < 1e-6 and abs(dist - found[i][2]) < 1e-6 for i, score, dist in ranked)
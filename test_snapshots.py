@@ -0,0 +1,81 @@
+import os
+import queue
+from datetime import datetime
+
+from advisor.core import Flight
+from advisor.snapshots import SnapshotReader, SnapshotRecorder, SnapshotWriter
+
+T0 = datetime(2026, 1, 17, 18, 0).timestamp()
+T1 = datetime(2026, 1, 18, 9, 30).timestamp()
+
+
+def flight(number, arrival, origin="London", **extra):
+    return {"flight_number": number, "airline": "Thai", "origin": origin, "origin_iata": None,
+            "terminal": extra.get("terminal"), "status": extra.get("status"),
+            "arrival_time": arrival, "actual_time": extra.get("actual_time")}
+
+
+def test_round_trip_partitioned_by_day_and_airport(tmp_path):
+    w = SnapshotWriter(str(tmp_path))
+    w.write("BKK", [flight("TG1", "18:10", actual_time="18:25", status="landed"), flight("EK1", "18:20", "Dubai")], T0)
+    w.write("BKK", [flight("TG1", "18:10")], T0 + 600)
+    w.write("BKK", [flight("QR9", "09:45", "Doha", terminal="1")], T1)
+    w.write("DMK", [flight("FD1", "10:00", "Chiang Mai")], T1)
+
+    reader = SnapshotReader(str(tmp_path))
+    assert reader.airports() == ["BKK", "DMK"]
+    assert reader.days("BKK") == ["2026-01-17", "2026-01-18"]
+    snaps = list(reader.snapshots("BKK"))
+    assert [int(t) for t, _ in snaps] == [int(T0), int(T0 + 600), int(T1)]
+    assert snaps[0][1][0] == flight("TG1", "18:10", actual_time="18:25", status="landed")
+    assert snaps[2][1] == [flight("QR9", "09:45", "Doha", terminal="1")]
+
+    _, cols = next(reader.scan("BKK", start="2026-01-17", end="2026-01-17"))
+    assert cols["scheduled"].tolist() == [18 * 60 + 10, 18 * 60 + 20, 18 * 60 + 10]
+    assert cols["actual"].tolist() == [18 * 60 + 25, -1, -1]
+
+
+def test_uncommitted_rows_are_ignored(tmp_path):
+    w = SnapshotWriter(str(tmp_path))
+    w.write("BKK", [flight("TG1", "18:10")], T0)
+    part = os.path.join(str(tmp_path), "BKK", "2026-01-17")
+    with open(os.path.join(part, "scheduled.i2"), "ab") as fh:
+        fh.write(b"\x01\x00")  # torn write: column appended, batch marker never written
+    assert [len(f) for _, f in SnapshotReader(str(tmp_path)).snapshots("BKK")] == [1]
+    w.write("BKK", [flight("EK1", "18:20", "Dubai")], T0 + 600)  # next append drops the torn row first
+    assert [f for _, fs in SnapshotReader(str(tmp_path)).snapshots("BKK") for f in fs] == \
+        [flight("TG1", "18:10"), flight("EK1", "18:20", "Dubai")]
+
+
+def test_two_writers_on_one_partition_share_string_ids(tmp_path):
+    a, b = SnapshotWriter(str(tmp_path)), SnapshotWriter(str(tmp_path))  # e.g. two gunicorn workers
+    batches = [(a, [flight("TG1", "18:10")]), (b, [flight("LH9", "18:30", "Frankfurt")]),
+               (a, [flight("QR5", "18:40", "Doha")]), (b, [flight("TG1", "18:10"), flight("QR5", "18:40", "Doha")])]
+    for i, (w, flights) in enumerate(batches):
+        w.write("BKK", flights, T0 + 60 * i)
+    assert [fs for _, fs in SnapshotReader(str(tmp_path)).snapshots("BKK")] == [fs for _, fs in batches]
+
+
+def test_recorder_writes_in_background_and_drops_when_full(tmp_path):
+    rec = SnapshotRecorder(str(tmp_path), queue_size=1)
+    assert rec.record("BKK", [flight("TG1", "18:10")], T0)
+    rec.flush()
+    assert rec.written == 1
+    assert len(list(SnapshotReader(str(tmp_path)).snapshots("BKK"))) == 1
+    rec.close()
+
+    stalled = SnapshotRecorder.__new__(SnapshotRecorder)
+    stalled.queue, stalled.dropped = queue.Queue(1), 0
+    assert stalled.record("BKK", [], T0) and not stalled.record("BKK", [], T0)
+    assert stalled.dropped == 1
+
+
+def test_records_come_back_without_a_string_round_trip(tmp_path):
+    w = SnapshotWriter(str(tmp_path))
+    w.write("BKK", [flight("TG1", "18:10", actual_time="18:25", status="landed")], T0)
+    w.write("BKK", [Flight("Emirates", "EK1", "Dubai", 18 * 60 + 20, terminal="1")], T0 + 600)  # records are written as-is
+    reader = SnapshotReader(str(tmp_path))
+    [(_, first), (_, second)] = reader.records("BKK")
+    assert first == [Flight("Thai", "TG1", "London", 18 * 60 + 10, actual=18 * 60 + 25, status="landed")]
+    assert second == [Flight("Emirates", "EK1", "Dubai", 18 * 60 + 20, terminal="1")]
+    assert [[Flight.from_dict(f) for f in fs] for _, fs in reader.snapshots("BKK")] == [first, second]
@@ -0,0 +1,55 @@
+from advisor.stream import Broker, diff_alerts
+
+
+def alert(flight, exit_time="20:00"):
+    return {"flight": flight, "land_time": "19:00", "exit_time": exit_time}
+
+
+def drain(sub):
+    out = []
+    while (message := sub.get(timeout=0)) is not None:
+        out.append(message)
+    return out
+
+
+def test_diff_alerts():
+    old = [alert("TG1"), alert("EK2")]
+    new = [alert("TG1", "20:30"), alert("QR3")]
+    change = diff_alerts(old, new)
+    assert [a["flight"] for a in change["added"]] == ["QR3"]
+    assert [a["flight"] for a in change["changed"]] == ["TG1"]
+    assert change["removed"] == ["EK2|19:00"]
+    assert diff_alerts(new, list(new)) is None
+
+
+def test_subscribe_gets_snapshot_then_diffs():
+    broker = Broker()
+    broker.publish_alerts([alert("TG1")])
+    sub = broker.subscribe()
+    broker.publish_alerts([alert("TG1")])  # unchanged: nothing sent
+    broker.publish_alerts([alert("TG1"), alert("EK2")])
+    messages = drain(sub)
+    assert len(messages) == 2
+    assert "event: snapshot" in messages[0] and "TG1" in messages[0]
+    assert "event: alerts" in messages[1] and "EK2" in messages[1]
+
+
+def test_resume_from_last_event_id():
+    broker = Broker()
+    first = broker.publish("alerts", {"n": 1})
+    broker.publish("alerts", {"n": 2})
+    broker.publish("alerts", {"n": 3})
+    messages = drain(broker.subscribe(last_event_id=str(first)))
+    assert [m.split("\n")[0] for m in messages] == ["id: 2", "id: 3"]
+    assert "snapshot" in drain(broker.subscribe(last_event_id="999"))[0]
+
+
+def test_slow_client_queue_is_bounded():
+    broker = Broker(queue_size=4)
+    slow = broker.subscribe()
+    for i in range(50):
+        broker.publish("alerts", {"n": i})
+    messages = drain(slow)
+    assert len(messages) <= 4
+    assert any("event: resync" in m for m in messages)
+    assert slow.dropped > 0
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from advisor.timeline import ExitTimeline, anchor, clock_minutes, now_minute
+
+
+def build(delay):
+    def _build(f, now_abs):
+        exit_minute = anchor(clock_minutes(f["arrival_time"]), now_abs) + delay
+        return exit_minute, {"flight": f["flight_number"], "exit_minute": exit_minute}
+    return _build
+
+
+def flight(number, arrival, origin="Shanghai"):
+    return {"flight_number": number, "origin": origin, "arrival_time": arrival, "airline": "X"}
+
+
+def test_anchor_rolls_over_midnight():
+    now = now_minute(datetime(2026, 1, 17, 23, 55))
+    assert anchor(clock_minutes("00:10"), now) - now == 15
+    assert now - anchor(clock_minutes("23:40"), now) == 15
+    assert now - anchor(clock_minutes("12:00"), now) == 11 * 60 + 55  # today's noon is closer than tomorrow's
+    assert anchor(clock_minutes("11:50"), now) - now == 11 * 60 + 55
+
+
+def test_exit_order_is_correct_across_midnight():
+    now = now_minute(datetime(2026, 1, 17, 23, 0))
+    tl = ExitTimeline()
+    tl.update([flight("MU1", "23:50"), flight("TG2", "22:15")], build(75), now)
+    # 23:50 + 75 min exits at 01:05 the next day, after the 23:30 exit
+    assert [a["flight"] for a in tl.alerts()] == ["TG2", "MU1"]
+
+
+def test_incremental_update_and_range_queries():
+    now = now_minute(datetime(2026, 1, 17, 18, 0))
+    tl = ExitTimeline()
+    flights = [flight(f"TG{i}", f"18:{i * 5:02}") for i in range(6)]
+    assert tl.update(flights, build(45), now)["added"] == 6
+    changed = [dict(f) for f in flights]
+    changed[0]["arrival_time"] = "19:30"
+    stats = tl.update(changed[:5] + [flight("EK9", "18:07", "Dubai")], build(45), now)
+    assert stats == {"added": 1, "changed": 1, "removed": 1, "unchanged": 4}
+    assert [a["flight"] for a in tl.between(now + 50, now + 60)] == ["TG1", "EK9", "TG2"]
+    assert [a["flight"] for a in tl.next(now + 55, 2)] == ["TG2", "TG3"]
+    assert tl.alerts()[-1]["flight"] == "TG0"
@@ -0,0 +1,88 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from advisor.upstream import Source, UpstreamError, fetch_json, gather, get_session
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    hits = {}
+    peers = set()
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        StubHandler.hits[path] = StubHandler.hits.get(path, 0) + 1
+        StubHandler.peers.add(self.client_address)
+        if path == "/flaky" and StubHandler.hits[path] < 3:
+            return self._send(503, {"error": "busy"})
+        if path == "/slow":
+            time.sleep(1)
+        if path == "/broken":
+            return self._send(404, {"error": "nope"})
+        self._send(200, {"data": [path]})
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_retries_with_backoff_then_succeeds(stub):
+    delays = []
+    source = Source("flaky", stub + "/flaky", retries=3, backoff=0.1, parse=lambda d: d["data"])
+    assert fetch_json(source, sleep=delays.append) == ["/flaky"]
+    assert len(delays) == 2 and all(0 <= d <= 0.4 for d in delays)
+
+
+def test_client_errors_are_not_retried(stub):
+    StubHandler.hits.pop("/broken", None)
+    with pytest.raises(UpstreamError):
+        fetch_json(Source("broken", stub + "/broken", retries=3), sleep=lambda s: None)
+    assert StubHandler.hits["/broken"] == 1
+
+
+def test_gather_returns_partial_results(stub):
+    tasks = {
+        "flights": lambda: fetch_json(Source("flights", stub + "/flights")),
+        "traffic": lambda: fetch_json(Source("traffic", stub + "/slow", timeout=0.2, retries=0)),
+        "news": lambda: fetch_json(Source("news", stub + "/news")),
+    }
+    t0 = time.perf_counter()
+    results, errors = gather(tasks, timeout=5)
+    assert time.perf_counter() - t0 < 1
+    assert results == {"flights": {"data": ["/flights"]}, "news": {"data": ["/news"]}}
+    assert "Timeout" in errors["traffic"]
+
+
+def test_sources_run_concurrently(stub):
+    tasks = {f"slow{i}": (lambda: fetch_json(Source("slow", stub + "/slow"))) for i in range(3)}
+    t0 = time.perf_counter()
+    results, errors = gather(tasks, timeout=5)
+    assert not errors and len(results) == 3
+    assert time.perf_counter() - t0 < 2.5
+
+
+def test_session_reuses_connections(stub):
+    StubHandler.peers.clear()
+    session = get_session()
+    for _ in range(5):
+        fetch_json(Source("flights", stub + "/flights"), session=session)
+    assert len(StubHandler.peers) == 1
@@ -0,0 +1,33 @@
+from advisor.profiles import load
+from advisor.zones import ZoneResolver
+
+FLIGHT_PROFILE = load().zones
+
+
+def legacy_zone(origin):
+    for zone, data in FLIGHT_PROFILE.items():
+        if any(hub in origin for hub in data['hubs']):
+            return zone
+    return None
+
+
+def test_matches_legacy_hub_scan():
+    resolver = ZoneResolver(FLIGHT_PROFILE)
+    origins = ["London", "Dubai International", "Tokyo Haneda", "Singapore Changi", "Saint Petersburg Pulkovo", "Mumbai", "Phuket", ""]
+    for origin in origins:
+        assert resolver(origin) == legacy_zone(origin), origin
+
+
+def test_airport_names_and_iata_codes():
+    resolver = ZoneResolver(FLIGHT_PROFILE)
+    assert resolver("Heathrow") == "Europe"
+    assert resolver("DXB") == "MiddleEast"
+    assert resolver("pvg") == "China"
+    assert resolver("Incheon International Airport") == "EastAsia"
+    assert resolver(None) is None
+
+
+def test_memoized_per_origin():
+    resolver = ZoneResolver(FLIGHT_PROFILE)
+    resolver("Frankfurt Main")
+    assert resolver._memo["Frankfurt Main"] == "Europe"